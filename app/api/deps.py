@@ -36,6 +36,8 @@ def get_current_user(
     if user is None:
         raise credentials_exception
     
+    # Lets the session mark this user's commits for read-your-writes routing
+    db.info["user_id"] = user.id
     return user
 
 
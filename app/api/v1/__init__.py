@@ -2,6 +2,9 @@ from fastapi import APIRouter
 from .auth import router as auth_router
 from .users import router as users_router
 from .study_sets import router as study_sets_router
+from .reports import router as reports_router
+from .media import router as media_router
+from .classes import router as classes_router
 
 # Create main v1 router
 router = APIRouter()
@@ -9,4 +12,7 @@ router = APIRouter()
 # Include all routers
 router.include_router(auth_router)
 router.include_router(users_router)
-router.include_router(study_sets_router, prefix="/study-sets", tags=["study-sets"]) 
\ No newline at end of file
+router.include_router(study_sets_router, prefix="/study-sets", tags=["study-sets"])
+router.include_router(reports_router)
+router.include_router(media_router)
+router.include_router(classes_router)
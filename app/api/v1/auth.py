@@ -5,8 +5,9 @@ from app.core.database import get_db
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
+from app.core.profiling import route_class
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=route_class)
 
 
 def _to_user_dict(user: User) -> dict:
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.schemas.study_class import (
+    StudyClassCreate, StudyClassJoin, StudyClassResponse, ClassStudySetAssign, ClassStudySetResponse,
+    LeaderboardResponse
+)
+from app.services.class_service import ClassService
+from app.services.leaderboard_service import LeaderboardService
+from app.utils.serialization import ORJSONResponse
+from app.core.profiling import route_class
+
+router = APIRouter(prefix="/classes", tags=["classes"], route_class=route_class)
+
+
+@router.post("/", response_model=StudyClassResponse, status_code=status.HTTP_201_CREATED)
+def create_class(
+    class_data: StudyClassCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create a class; the creator is its teacher and shares the join code with students"""
+    study_class = ClassService.create_class(db, class_data, current_user.id)
+    return StudyClassResponse.model_validate(study_class)
+
+
+@router.post("/join", response_model=StudyClassResponse)
+def join_class(
+    join_data: StudyClassJoin,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Join a class as a student with its join code"""
+    study_class = ClassService.join_class(db, join_data.join_code, current_user.id)
+    return StudyClassResponse.model_validate(study_class)
+
+
+@router.post("/{class_id}/study-sets", response_model=ClassStudySetResponse, status_code=status.HTTP_201_CREATED)
+def assign_study_set(
+    class_id: int,
+    assign_data: ClassStudySetAssign,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Assign a study set to the class (teacher only); graded answers on it count for the leaderboards"""
+    assignment = ClassService.assign_study_set(db, class_id, assign_data, current_user.id)
+    return ClassStudySetResponse.model_validate(assignment)
+
+
+@router.get("/{class_id}/leaderboard", response_model=LeaderboardResponse)
+def get_leaderboard(
+    class_id: int,
+    by: str = Query("score", pattern="^(score|terms_mastered)$"),
+    limit: int = Query(10, ge=1, le=settings.leaderboard_max_limit),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Top students of a class and the caller's own rank.
+
+    Ranked by correct answers ("score") or distinct terms answered with no typo
+    ("terms_mastered") on the study sets assigned to the class,
+    from a sorted set (Redis, or this worker's memory) loaded from the database.
+    """
+    ClassService.get_class_for_member(db, class_id, current_user.id)
+    leaderboard = LeaderboardService.get_leaderboard(db, class_id, by, limit, current_user.id)
+    return ORJSONResponse(leaderboard)
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.schemas.media import MediaUploadResponse
+from app.services.media_service import MediaService
+from app.utils.serialization import ORJSONResponse
+from app.core.profiling import route_class
+
+router = APIRouter(prefix="/media", tags=["media"], route_class=route_class)
+
+# Serves the stored files; mounted at /media by the app, outside /api/v1
+files_router = APIRouter(route_class=route_class)
+
+# Stored files never change: the name is the hash of the content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.post("/", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload an image or audio file for a term.
+
+    Send the file as the raw request body with its Content-Type (e.g. image/png).
+    Put the returned url in the term's image_url or audio_url.
+    """
+    # The user is loaded; give the pooled connection back before a possibly slow upload
+    db.close()
+    content_length = request.headers.get("content-length")
+    result = await MediaService.store_upload(
+        request.stream(),
+        request.headers.get("content-type", ""),
+        int(content_length) if content_length and content_length.isdigit() else None
+    )
+    return ORJSONResponse(result, status_code=status.HTTP_201_CREATED)
+
+
+@files_router.get("/{shard}/{name}", include_in_schema=False)
+def get_media(shard: str, name: str):
+    """Serve a stored file or variant"""
+    if shard != name[:2]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media not found"
+        )
+    path = MediaService.get_media_file(name)
+    return FileResponse(path, headers={
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        # Uploads are served with the type of their extension only
+        "X-Content-Type-Options": "nosniff"
+    })
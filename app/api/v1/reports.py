@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.models.report import Report
+from app.schemas.report import ReportCreate, ReportResponse
+from app.services.report_service import ReportService
+from app.core.profiling import route_class
+
+router = APIRouter(prefix="/reports", tags=["reports"], route_class=route_class)
+
+
+def _to_report_dict(report: Report) -> dict:
+    """Convert SQLAlchemy report to dict with only required fields"""
+    return {
+        "id": report.id,
+        "reported_by_user_id": report.reported_by_user_id,
+        "reported_entity_type": report.reported_entity_type,
+        "reported_entity_id": report.reported_entity_id,
+        "reason": report.reason,
+        "status": report.status,
+        "reported_at": report.reported_at,
+        "resolved_at": report.resolved_at
+    }
+
+
+@router.post("/", response_model=ReportResponse, status_code=status.HTTP_201_CREATED)
+def create_report(
+    report_data: ReportCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Report a term or study set for moderation"""
+    report = ReportService.create_report(db, report_data, current_user.id)
+    return ReportResponse.model_validate(_to_report_dict(report))
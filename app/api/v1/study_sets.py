@@ -1,62 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.schemas.study_set import (
-    StudySetCreate, StudySetUpdate, StudySetResponse, StudySetDetailResponse,
-    StudySetListResponse, StudySetSearchParams, StudySetListItem,
-    TermCreate, TermUpdate, TermResponse, TermBulkCreate, TermReorder
+    StudySetCreate, StudySetUpdate, StudySetClone, StudySetResponse, StudySetDetailResponse, StudySetBatchResponse,
+    StudySetListResponse, StudySetSearchParams,
+    TermCreate, TermUpdate, TermResponse, TermBulkCreate, TermReorder,
+    StudySetVersionResponse, StudySetVersionDiff, StudySetSuggestion, StudySetFacets, StudySetQuiz, GradeRequest, StudySetGradeResponse
 )
 from app.services.study_set_service import StudySetService, TermService
-from app.schemas.user import UserResponse
+from app.services.version_service import VersionService
+from app.services.grading_service import GradingService
+from app.services.suggest_service import SuggestService
+from app.services.leaderboard_service import leaderboard_flusher
+from app.utils.etag import make_etag, etag_matches
+from app.utils.serialization import (
+    ORJSONResponse, user_info_to_dict, study_set_to_dict, term_to_dict, version_to_dict
+)
+from app.core.profiling import route_class
 
-router = APIRouter()
+router = APIRouter(route_class=route_class)
 
 
-def _get_user_info(user: User) -> dict:
-    """Convert user to dict for response"""
+def _cache_headers(kind: str, study_set) -> dict:
+    """ETag and Cache-Control headers for a study set representation"""
+    if study_set.is_public:
+        cache_control = f"public, max-age={settings.study_set_cache_max_age}, must-revalidate"
+    else:
+        cache_control = "private, no-cache"
     return {
-        "id": user.id,
-        "username": user.username,
-        "full_name": user.full_name,
-        "avatar_url": user.avatar_url
+        "ETag": make_etag(kind, study_set.id, study_set.current_version, study_set.updated_at),
+        "Cache-Control": cache_control
     }
 
 
-def _to_study_set_dict(study_set) -> dict:
-    """Convert SQLAlchemy study_set to dict with only required fields"""
-    return {
-        "id": study_set.id,
-        "title": study_set.title,
-        "description": study_set.description,
-        "user_id": study_set.user_id,
-        "is_public": study_set.is_public,
-        "created_at": study_set.created_at,
-        "updated_at": study_set.updated_at,
-        "terms_count": study_set.terms_count,
-        "language_from": study_set.language_from,
-        "language_to": study_set.language_to,
-        "views_count": study_set.views_count,
-        "favorites_count": study_set.favorites_count,
-        "average_rating": study_set.average_rating
-    }
+def _check_read_access(study_set, current_user: Optional[User]) -> None:
+    """Raise 404/403 unless the study set exists and is visible to the user"""
+    if not study_set:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Study set not found"
+        )
+    if not study_set.is_public and (not current_user or current_user.id != study_set.user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
 
 
-def _to_term_dict(term) -> dict:
-    """Convert SQLAlchemy term to dict with only required fields"""
-    return {
-        "id": term.id,
-        "term": term.term,
-        "definition": term.definition,
-        "image_url": term.image_url,
-        "audio_url": term.audio_url,
-        "study_set_id": term.study_set_id,
-        "position": term.position,
-        "created_at": term.created_at,
-        "updated_at": term.updated_at
-    }
+def _get_readable_study_set(db: Session, study_set_id: int, current_user: Optional[User]):
+    """Look up a study set without counting a view, enforcing visibility"""
+    study_set = StudySetService.get_study_set_meta(db, study_set_id)
+    _check_read_access(study_set, current_user)
+    return study_set
 
 
 @router.post("/", response_model=StudySetResponse, status_code=status.HTTP_201_CREATED)
@@ -67,54 +66,186 @@ def create_study_set(
 ):
     """Create a new study set"""
     study_set = StudySetService.create_study_set(db, study_set_data, current_user.id)
-    data = _to_study_set_dict(study_set)
-    data["user"] = _get_user_info(current_user)
-    resp = StudySetResponse.model_validate(data)
-    return resp
+    data = study_set_to_dict(study_set)
+    data["user"] = user_info_to_dict(current_user)
+    return ORJSONResponse(data, status_code=status.HTTP_201_CREATED)
+
+
+def _parse_ids(ids: str) -> List[int]:
+    """Parse a comma-separated id list, keeping the first occurrence of each id"""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    parsed = list(dict.fromkeys(parsed))
+    if not parsed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must not be empty"
+        )
+    if len(parsed) > settings.study_set_batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.study_set_batch_max_ids} ids can be fetched at once"
+        )
+    return parsed
+
+
+@router.get("/batch", response_model=StudySetBatchResponse)
+def get_study_sets_batch(
+    ids: str = Query(..., description="Comma-separated study set ids"),
+    terms_limit: int = Query(
+        0, ge=0, le=settings.terms_page_max_limit, description="Inline the first terms of each set"
+    ),
+    db: Session = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Get several study sets in one call, for prefetching library and folder pages.
+
+    Uses a fixed number of queries whatever the number of ids and does not count views.
+    Ids that do not exist are listed in missing, private sets of other users in forbidden.
+    """
+    requested = _parse_ids(ids)
+    found = {study_set.id: study_set for study_set in StudySetService.get_study_sets_by_ids(db, requested)}
+
+    readable = []
+    missing = []
+    forbidden = []
+    for study_set_id in requested:
+        study_set = found.get(study_set_id)
+        if study_set is None:
+            missing.append(study_set_id)
+        elif not study_set.is_public and (not current_user or current_user.id != study_set.user_id):
+            forbidden.append(study_set_id)
+        else:
+            readable.append(study_set)
+
+    owner_ids = {study_set.user_id for study_set in readable}
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(owner_ids)).all()} if owner_ids else {}
+    term_pages = TermService.get_first_terms(db, [study_set.id for study_set in readable], terms_limit)
+
+    items = []
+    for study_set in readable:
+        user = users.get(study_set.user_id)
+        terms, next_cursor = term_pages[study_set.id]
+        data = study_set_to_dict(study_set)
+        data["user"] = user_info_to_dict(user) if user else {}
+        data["terms"] = [term_to_dict(term) for term in terms]
+        data["next_terms_cursor"], data["next_terms_after_id"] = next_cursor or (None, None)
+        items.append(data)
+    return ORJSONResponse({"items": items, "missing": missing, "forbidden": forbidden})
+
+
+@router.get("/suggest", response_model=List[StudySetSuggestion])
+def suggest_study_sets(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(
+        settings.suggest_max_per_prefix, ge=1, le=settings.suggest_max_per_prefix, description="Number of suggestions"
+    ),
+    db: Session = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Autocomplete public study set titles, most viewed first.
+
+    Matches the start of any word of the title, ignoring case and accents. Served
+    from an in-memory prefix index instead of a LIKE query per keystroke.
+    """
+    return ORJSONResponse(SuggestService.suggest(db, q, limit))
+
+
+@router.get("/facets", response_model=StudySetFacets)
+def get_study_set_facets(
+    search: Optional[str] = Query(None, description="Search term"),
+    search_mode: str = Query("contains", pattern="^(contains|fuzzy)$", description="contains or fuzzy"),
+    language_from: Optional[str] = Query(None, description="Source language"),
+    language_to: Optional[str] = Query(None, description="Target language"),
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5, description="Minimum rating"),
+    db: Session = Depends(get_read_db)
+):
+    """Count public study sets per language pair and rating band, for the browse page.
+
+    Without filters the counts are read from aggregates kept current on every
+    create, update and delete; with the search filters they are counted live.
+    """
+    params = StudySetSearchParams(
+        search=search,
+        search_mode=search_mode,
+        language_from=language_from,
+        language_to=language_to,
+        user_id=user_id,
+        min_rating=min_rating
+    )
+    return ORJSONResponse(StudySetService.get_facets(db, params))
 
 
 @router.get("/{study_set_id}", response_model=StudySetDetailResponse)
 def get_study_set(
     study_set_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    terms_limit: Optional[int] = Query(
+        None, ge=1, le=settings.terms_page_max_limit, description="Inline at most this many terms"
+    ),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
-    """Get study set details with terms"""
-    study_set = StudySetService.get_study_set_by_id(db, study_set_id)
-    if not study_set:
+    """Get study set details with terms.
+
+    With terms_limit only the first terms are inlined and next_terms_cursor / next_terms_after_id
+    give the after_position / after_id to continue from on the terms endpoint.
+    """
+    meta = StudySetService.get_study_set_meta(db, study_set_id)
+    _check_read_access(meta, current_user)
+    headers = _cache_headers("study-set", meta)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    StudySetService.increment_views(db, study_set_id)
+    body = StudySetService.get_study_set_detail_json(
+        db, study_set_id, terms_limit, version=(meta.current_version, meta.updated_at)
+    )
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Study set not found"
         )
-    if not study_set.is_public and (not current_user or current_user.id != study_set.user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    terms = TermService.get_terms_by_study_set(db, study_set_id)
-    term_responses = [TermResponse.model_validate(_to_term_dict(term)) for term in terms]
-    user = db.query(User).filter(User.id == study_set.user_id).first()
-    user_info = _get_user_info(user) if user else {}
-    data = _to_study_set_dict(study_set)
-    data["user"] = user_info
-    data["terms"] = term_responses
-    resp = StudySetDetailResponse.model_validate(data)
-    return resp
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.put("/{study_set_id}", response_model=StudySetResponse)
 def update_study_set(
     study_set_id: int,
     study_set_data: StudySetUpdate,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update study set"""
-    study_set = StudySetService.update_study_set(db, study_set_id, study_set_data, current_user.id)
-    data = _to_study_set_dict(study_set)
-    data["user"] = _get_user_info(current_user)
-    resp = StudySetResponse.model_validate(data)
-    return resp
+    """Update study set. Send If-Match with the set's ETag to avoid overwriting concurrent edits."""
+    expected_version = None
+    if_match = request.headers.get("if-match")
+    if if_match:
+        meta = StudySetService.get_study_set_meta(db, study_set_id)
+        if not meta or meta.user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Study set not found or you don't have permission to edit it"
+            )
+        if not etag_matches(if_match, _cache_headers("study-set", meta)["ETag"]):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Study set was modified by another request"
+            )
+        expected_version = meta.current_version
+
+    study_set = StudySetService.update_study_set(
+        db, study_set_id, study_set_data, current_user.id, expected_version=expected_version
+    )
+    data = study_set_to_dict(study_set)
+    data["user"] = user_info_to_dict(current_user)
+    return ORJSONResponse(data, headers={"ETag": _cache_headers("study-set", study_set)["ETag"]})
 
 
 @router.delete("/{study_set_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -127,6 +258,23 @@ def delete_study_set(
     StudySetService.delete_study_set(db, study_set_id, current_user.id)
 
 
+@router.post("/{study_set_id}/clone", response_model=StudySetResponse, status_code=status.HTTP_201_CREATED)
+def clone_study_set(
+    study_set_id: int,
+    clone_data: Optional[StudySetClone] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Copy a public (or own) study set with all its terms into the current user's library"""
+    clone_data = clone_data or StudySetClone()
+    study_set = StudySetService.clone_study_set(
+        db, study_set_id, current_user.id, title=clone_data.title, is_public=clone_data.is_public
+    )
+    data = study_set_to_dict(study_set)
+    data["user"] = user_info_to_dict(current_user)
+    return ORJSONResponse(data, status_code=status.HTTP_201_CREATED)
+
+
 @router.get("/", response_model=StudySetListResponse)
 def search_study_sets(
     page: int = Query(1, ge=1, description="Page number"),
@@ -138,7 +286,8 @@ def search_study_sets(
     min_rating: Optional[float] = Query(None, ge=0, le=5, description="Minimum rating"),
     sort_by: str = Query("created_at", description="Sort field"),
     sort_order: str = Query("desc", description="Sort order (asc/desc)"),
-    db: Session = Depends(get_db)
+    search_mode: str = Query("contains", pattern="^(contains|fuzzy)$", description="contains, or fuzzy: accent-insensitive and typo-tolerant"),
+    db: Session = Depends(get_read_db)
 ):
     """Search and filter study sets"""
     params = StudySetSearchParams(
@@ -150,42 +299,41 @@ def search_study_sets(
         user_id=user_id,
         min_rating=min_rating,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        search_mode=search_mode
     )
     study_sets, total = StudySetService.search_study_sets(db, params)
     items = []
     for study_set in study_sets:
         user = db.query(User).filter(User.id == study_set.user_id).first()
-        user_info = _get_user_info(user) if user else {}
-        data = _to_study_set_dict(study_set)
+        user_info = user_info_to_dict(user) if user else {}
+        data = study_set_to_dict(study_set)
         data["user"] = user_info
-        item = StudySetListItem.model_validate(data)
-        items.append(item)
+        items.append(data)
     pages = (total + params.size - 1) // params.size
-    return StudySetListResponse(
-        items=items,
-        total=total,
-        page=params.page,
-        size=params.size,
-        pages=pages
-    )
+    return ORJSONResponse({
+        "items": items,
+        "total": total,
+        "page": params.page,
+        "size": params.size,
+        "pages": pages
+    })
 
 
 @router.get("/user/me", response_model=List[StudySetResponse])
 def get_my_study_sets(
     include_private: bool = Query(True, description="Include private study sets"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get current user's study sets"""
     study_sets = StudySetService.get_user_study_sets(db, current_user.id, include_private)
     result = []
     for study_set in study_sets:
-        data = _to_study_set_dict(study_set)
-        data["user"] = _get_user_info(current_user)
-        resp = StudySetResponse.model_validate(data)
-        result.append(resp)
-    return result
+        data = study_set_to_dict(study_set)
+        data["user"] = user_info_to_dict(current_user)
+        result.append(data)
+    return ORJSONResponse(result)
 
 
 # Terms endpoints
@@ -198,29 +346,52 @@ def create_term(
 ):
     """Add a new term to study set"""
     term = TermService.create_term(db, study_set_id, term_data.dict(), current_user.id)
-    return TermResponse.model_validate(_to_term_dict(term))
+    return ORJSONResponse(term_to_dict(term), status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{study_set_id}/terms/", response_model=List[TermResponse])
 def get_terms(
     study_set_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    after_position: Optional[int] = Query(None, description="Return terms after this position"),
+    after_id: Optional[int] = Query(
+        None, description="With after_position: return terms after this (position, id) pair"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=settings.terms_page_max_limit, description="Maximum number of terms to return"
+    ),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user)
 ):
-    """Get all terms for a study set"""
-    study_set = StudySetService.get_study_set_by_id(db, study_set_id, increment_views=False)
-    if not study_set:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Study set not found"
-        )
-    if not study_set.is_public and (not current_user or current_user.id != study_set.user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    terms = TermService.get_terms_by_study_set(db, study_set_id)
-    return [TermResponse.model_validate(_to_term_dict(term)) for term in terms]
+    """Get the terms of a study set, all of them or a position range.
+
+    When more terms follow the page, the X-Next-After-Position and X-Next-After-Id
+    headers hold the after_position and after_id of the next request.
+    """
+    meta = StudySetService.get_study_set_meta(db, study_set_id)
+    _check_read_access(meta, current_user)
+    headers = _cache_headers("terms", meta)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    terms, next_cursor = TermService.get_term_page(db, study_set_id, after_position, limit, after_id)
+    if next_cursor is not None:
+        headers["X-Next-After-Position"] = str(next_cursor[0])
+        headers["X-Next-After-Id"] = str(next_cursor[1])
+    return ORJSONResponse([term_to_dict(term) for term in terms], headers=headers)
+
+
+# Declared before /terms/{term_id} so "reorder" is not parsed as a term id
+@router.put("/{study_set_id}/terms/reorder", response_model=List[TermResponse])
+def reorder_terms(
+    study_set_id: int,
+    reorder_data: TermReorder,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Reorder terms by updating their positions"""
+    terms = TermService.reorder_terms(db, study_set_id, reorder_data.term_ids, current_user.id)
+    return ORJSONResponse([term_to_dict(term) for term in terms])
 
 
 @router.put("/{study_set_id}/terms/{term_id}", response_model=TermResponse)
@@ -234,7 +405,7 @@ def update_term(
     """Update a term"""
     update_data = term_data.dict(exclude_unset=True)
     term = TermService.update_term(db, study_set_id, term_id, update_data, current_user.id)
-    return TermResponse.model_validate(_to_term_dict(term))
+    return ORJSONResponse(term_to_dict(term))
 
 
 @router.delete("/{study_set_id}/terms/{term_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -259,16 +430,108 @@ def bulk_create_terms(
     terms = TermService.bulk_create_terms(
         db, study_set_id, [term.dict() for term in terms_data.terms], current_user.id
     )
-    return [TermResponse.model_validate(_to_term_dict(term)) for term in terms]
+    return ORJSONResponse([term_to_dict(term) for term in terms], status_code=status.HTTP_201_CREATED)
 
 
-@router.put("/{study_set_id}/terms/reorder", response_model=List[TermResponse])
-def reorder_terms(
+# Study modes
+@router.get("/{study_set_id}/test", response_model=StudySetQuiz)
+def generate_test(
     study_set_id: int,
-    reorder_data: TermReorder,
+    questions: int = Query(20, ge=1, le=settings.quiz_max_questions, description="Number of questions"),
+    distractors: int = Query(3, ge=1, le=5, description="Wrong options per question"),
+    answer_with: str = Query("definition", pattern="^(definition|term)$", description="Side the options come from"),
+    seed: Optional[int] = Query(None, description="Seed for a reproducible test"),
+    db: Session = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Generate a multiple-choice test.
+
+    Distractors are answers of similar cards (character trigrams and length), precomputed
+    once per content version of the set and cached until its terms change.
+    """
+    # Imported on first use: it loads numpy, which fast boots skip
+    from app.services.quiz_service import QuizService
+
+    meta = _get_readable_study_set(db, study_set_id, current_user)
+    quiz = QuizService.generate_test(
+        db, study_set_id, meta.current_version, questions, distractors, answer_with, seed
+    )
+    return ORJSONResponse(quiz)
+
+
+@router.post("/{study_set_id}/grade", response_model=StudySetGradeResponse)
+def grade_answers(
+    study_set_id: int,
+    grade_data: GradeRequest,
+    db: Session = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Grade typed ("write" mode) answers in one batch.
+
+    Case, accents (đ = d) and punctuation are ignored and small typos are accepted.
+    Reference answers are normalized once per content version of the set and cached.
+    """
+    if len(grade_data.answers) > settings.grading_max_answers:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.grading_max_answers} answers can be graded at once"
+        )
+    meta = _get_readable_study_set(db, study_set_id, current_user)
+    graded = GradingService.grade_answers(
+        db, study_set_id, meta.current_version,
+        [answer.dict() for answer in grade_data.answers], grade_data.answer_with
+    )
+    if current_user:
+        # Class leaderboards: buffered in memory, written in batches by the leaderboard flusher.
+        # A term answered more than once in the batch scores once
+        leaderboard_flusher.record(
+            current_user.id, study_set_id,
+            len({result["term_id"] for result in graded["results"] if result["correct"]}),
+            {result["term_id"] for result in graded["results"] if result["result"] == "exact"}
+        )
+    return ORJSONResponse(graded)
+
+
+# Version history endpoints
+@router.get("/{study_set_id}/versions", response_model=List[StudySetVersionResponse])
+def list_versions(
+    study_set_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """List the version history of a study set, newest first"""
+    _get_readable_study_set(db, study_set_id, current_user)
+    versions = VersionService.list_versions(db, study_set_id)
+    return ORJSONResponse([version_to_dict(version) for version in versions])
+
+
+@router.get("/{study_set_id}/versions/diff", response_model=StudySetVersionDiff)
+def diff_versions(
+    study_set_id: int,
+    from_version: int = Query(..., ge=1, description="Older version number"),
+    to_version: int = Query(..., ge=1, description="Newer version number"),
+    db: Session = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Compare the terms of two versions"""
+    _get_readable_study_set(db, study_set_id, current_user)
+    diff = VersionService.diff_versions(db, study_set_id, from_version, to_version)
+    return StudySetVersionDiff.model_validate(diff)
+
+
+@router.post("/{study_set_id}/versions/{version_number}/restore", response_model=StudySetDetailResponse)
+def restore_version(
+    study_set_id: int,
+    version_number: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Reorder terms by updating their positions"""
-    terms = TermService.reorder_terms(db, study_set_id, reorder_data.term_ids, current_user.id)
-    return [TermResponse.model_validate(_to_term_dict(term)) for term in terms] 
\ No newline at end of file
+    """Restore a study set and its terms to an earlier version"""
+    study_set = VersionService.restore_version(db, study_set_id, version_number, current_user.id)
+    terms = TermService.get_term_rows(db, study_set_id)
+    data = study_set_to_dict(study_set)
+    data["user"] = user_info_to_dict(current_user)
+    data["terms"] = [term_to_dict(term) for term in terms]
+    data["next_terms_cursor"] = None
+    data["next_terms_after_id"] = None
+    return ORJSONResponse(data)
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.api.deps import get_current_active_user
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 from app.core.security import get_password_hash
+from app.core.profiling import route_class
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=route_class)
 
 
 def _to_user_dict(user: User) -> dict:
@@ -59,7 +60,7 @@ def update_current_user(
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
+def get_user_by_id(user_id: int, db: Session = Depends(get_read_db)):
     """Get user by ID (public information only)"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+import orjson
+from app.core.config import settings
+from app.core.routing import route_template
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+# Never shed or rate limit these
+EXEMPT_PATHS = {"/", "/health", "/livez", "/readyz", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+MAX_TRACKED_CLIENTS = 100_000
+SERVICE_TIME_DECAY = 0.2
+
+# Installed middleware instances, for exporting limiter stats
+admission_registry = []
+
+
+def parse_route_limits(value: str) -> Dict[str, int]:
+    """Parse "METHOD /template=limit,..." into {"METHOD /template": limit}"""
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        route, _, limit = item.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        limits[f"{method.upper()} {path.strip()}"] = int(limit)
+    return limits
+
+
+class ConcurrencyLimiter:
+    """FIFO semaphore with a queue-wait timeout.
+
+    Waiters are futures on whatever event loop they run on, so one limiter is
+    safe to share between loops and threads. A released slot is handed
+    straight to the oldest waiter.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self.service_time = 0.0  # Moving average of seconds a request holds a slot
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        """Rough time a new request would queue before getting a slot"""
+        if self.active < self.limit:
+            return 0.0
+        return (len(self._waiters) + 1) * self.service_time / self.limit
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting at most timeout seconds. Returns False if shed."""
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True
+            if self.expected_wait() > timeout:
+                # Fail fast: the queue ahead will not drain in time
+                self.rejected += 1
+                return False
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except BaseException as exc:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    granted = False
+                else:
+                    granted = True
+                if isinstance(exc, asyncio.TimeoutError):
+                    self.rejected += 1
+            if granted:
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            if isinstance(exc, asyncio.TimeoutError):
+                return False
+            raise
+
+    def release(self, held_for: Optional[float] = None) -> None:
+        with self._lock:
+            if held_for is not None:
+                self.service_time += SERVICE_TIME_DECAY * (held_for - self.service_time)
+            if not self._waiters:
+                self.active -= 1
+                return
+            waiter = self._waiters.popleft()
+        waiter.get_loop().call_soon_threadsafe(_grant, waiter)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "waiting": len(self._waiters),
+                "rejected": self.rejected,
+                "service_time": round(self.service_time, 4),
+            }
+
+
+def _grant(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(True)
+
+
+class MemoryTokenBucket:
+    """Per-client token buckets kept in process memory (per worker)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str) -> Tuple[bool, float]:
+        """Take one token. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1.0 - tokens) / self.rate
+
+
+# KEYS[1] = bucket key; ARGV = rate, burst, now. Returns {allowed, tokens * 1000}.
+TOKEN_BUCKET_LUA = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, math.floor(tokens * 1000)}
+"""
+
+
+class RedisTokenBucket:
+    """Token buckets shared by all workers, updated atomically by a Lua script.
+
+    If Redis is unreachable requests are let through (fail open) rather than
+    turning a cache outage into an API outage.
+    """
+
+    def __init__(self, rate: float, burst: int, redis_url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis_asyncio
+
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(redis_url)
+        self._script = self._client.register_script(TOKEN_BUCKET_LUA)
+
+    async def hit(self, key: str) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = await self._script(
+                keys=[self.prefix + key], args=[self.rate, self.burst, time.time()]
+            )
+        except Exception:
+            logger.warning("Rate limiter backend unavailable, allowing request", exc_info=True)
+            return True, 0.0
+        if allowed:
+            return True, 0.0
+        return False, (1.0 - tokens / 1000) / self.rate
+
+
+def create_rate_limiter():
+    """Build the rate limiter configured in settings, or None if rate limiting is off"""
+    if settings.rate_limit_per_second <= 0:
+        return None
+    if settings.rate_limit_backend == "redis":
+        return RedisTokenBucket(settings.rate_limit_per_second, settings.rate_limit_burst, settings.redis_url)
+    return MemoryTokenBucket(settings.rate_limit_per_second, settings.rate_limit_burst)
+
+
+def client_key(scope) -> str:
+    """Identify the caller: the user id from a valid bearer token, else the client IP"""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                payload = verify_token(token)
+                if payload and payload.get("user_id") is not None:
+                    return f"user:{payload['user_id']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """Shed load before it reaches the threadpool.
+
+    Each route template can have its own concurrency limit, so expensive
+    routes (search, bulk import) queue among themselves instead of taking
+    every worker thread. A request that would wait longer than queue_timeout
+    for a slot gets 503 right away; a client over its token bucket gets 429.
+    Both carry Retry-After.
+    """
+
+    def __init__(self, app, route_limits: Optional[Dict[str, int]] = None, default_limit: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, rate_limiter=None):
+        self.app = app
+        self.route_limits = parse_route_limits(settings.admission_route_limits) if route_limits is None else route_limits
+        self.default_limit = settings.admission_default_route_limit if default_limit is None else default_limit
+        self.queue_timeout = settings.admission_queue_timeout if queue_timeout is None else queue_timeout
+        self.rate_limiter = create_rate_limiter() if rate_limiter is None else rate_limiter
+        self.limiters: Dict[str, ConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+        admission_registry.append(self)
+
+    def _limiter_for(self, scope) -> Optional[ConcurrencyLimiter]:
+        route = f"{scope['method']} {route_template(scope)}"
+        limiter = self.limiters.get(route)
+        if limiter is not None:
+            return limiter
+        limit = self.route_limits.get(route, self.default_limit)
+        if not limit:
+            return None
+        with self._lock:
+            return self.limiters.setdefault(route, ConcurrencyLimiter(limit))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        if self.rate_limiter is not None:
+            allowed, retry_after = await self.rate_limiter.hit(client_key(scope))
+            if not allowed:
+                await _reject(send, 429, "Too many requests", retry_after)
+                return
+
+        limiter = self._limiter_for(scope)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire(self.queue_timeout):
+            await _reject(send, 503, "Server is busy, try again later", max(self.queue_timeout, limiter.expected_wait()))
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
@@ -0,0 +1,43 @@
+"""
+Timing of the boot phases, from the first app import to the end of the
+startup events. Imports only the standard library so launchers can import
+it before anything else.
+"""
+
+import logging
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BootTimer:
+    """Checkpoints of the boot: each mark() closes the phase since the previous one"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+        self.ready: Optional[float] = None  # Seconds from started to the end of the startup events
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def finish(self, phase: str = "startup events") -> None:
+        """Close the last phase and log the boot report (once per process)"""
+        if self.ready is not None:
+            return
+        self.mark(phase)
+        self.ready = self._last - self.started
+        logger.info("Boot phases:\n%s", self.report())
+
+    def report(self) -> str:
+        lines = [f"  {phase:<28} {seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        total = self.ready if self.ready is not None else self._last - self.started
+        lines.append(f"  {'total':<28} {total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+boot_timer = BootTimer()
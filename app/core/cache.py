@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from app.core.metrics import registry as metrics_registry
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache bounded by total weight.
+
+    Each value weighs weigh(value) (1 by default); least recently used entries
+    are evicted once the total exceeds max_weight. Hits and misses are
+    exported through /metrics under the cache's name.
+    """
+
+    def __init__(self, name: str, max_weight: int, weigh: Optional[Callable[[Any], int]] = None):
+        self.name = name
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        metrics_registry.register_cache(name, self.stats)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        weight = self.weigh(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.weight -= old[1]
+            if weight > self.max_weight:
+                # Would evict everything else and still not fit
+                return
+            self._entries[key] = (value, weight)
+            self.weight += weight
+            while self.weight > self.max_weight:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.weight -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self):
+        """(hits, misses), as metrics.registry.register_cache expects"""
+        return self.hits, self.misses
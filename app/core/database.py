@@ -1,15 +1,56 @@
-from sqlalchemy import create_engine
+import hashlib
+import hmac
+import itertools
+import sqlite3
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, make_url, Delete, Insert, Update
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
+from .security import verify_token
+from app.utils.text import word_similarity
+
+
+def _create_engine(url: str):
+    pool_options = {}
+    if make_url(url).get_backend_name() != "sqlite":
+        # Sized per worker by the production server so all workers fit database_max_connections
+        pool_options = {"pool_size": settings.database_pool_size, "max_overflow": settings.database_max_overflow}
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=settings.debug,
+        **pool_options
+    )
+
+
+def parse_replica_urls(value: str) -> List[str]:
+    """Parse the comma-separated replica URLs setting"""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+# Create database engine (primary) and one engine per read replica
+engine = _create_engine(settings.database_url)
+replica_engines = [_create_engine(url) for url in parse_replica_urls(settings.database_replica_urls)]
+_next_replica = itertools.cycle(replica_engines).__next__ if replica_engines else None
+
+
+
+def _sqlite_word_similarity(query: Optional[str], text: Optional[str]) -> float:
+    return word_similarity(query or "", text or "")
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    """Give SQLite the pg_trgm word_similarity() the fuzzy search mode ranks by"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("word_similarity", 2, _sqlite_word_similarity, deterministic=True)
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.debug
-)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -18,10 +59,154 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class RoutingSession(Session):
+    """Session that reads from one replica and writes to the primary.
+
+    The replica is picked round-robin when the session is created, so a request
+    sees a single replica. Flushes and INSERT/UPDATE/DELETE statements (such as
+    the view counter) go to the primary.
+    """
+
+    def __init__(self, primary=None, replica=None, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = primary if primary is not None else engine
+        self.replica = replica if replica is not None else _next_replica()
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return self.primary
+        return self.replica
+
+
+ReplicaSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+
+# Read-your-writes marker: after a committed write the response carries a
+# signed "user id and deadline" that the client sends back (cookie or header),
+# so any worker can keep that user's reads on the primary until the deadline
+WRITE_MARKER_COOKIE = "last_write"
+WRITE_MARKER_HEADER = "X-Last-Write"
+
+# Id of the user whose write this request committed; the list is shared with the
+# threadpool workers running the request's sync code like metrics._request_sql
+_request_writer: ContextVar[Optional[list]] = ContextVar("request_writer", default=None)
+
+
+def _marker_signature(payload: str) -> str:
+    return hmac.new(settings.secret_key.encode(), payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def sign_write_marker(user_id: int, until: float) -> str:
+    """Marker keeping user_id's reads on the primary until the `until` timestamp"""
+    payload = f"{user_id}.{int(until)}"
+    return f"{payload}.{_marker_signature(payload)}"
+
+
+def write_marker_applies(marker: Optional[str], user_id: Optional[int]) -> bool:
+    """Whether marker is authentic, was issued to user_id and has not expired"""
+    if not marker or user_id is None:
+        return False
+    payload, _, signature = marker.rpartition(".")
+    marker_user, _, until = payload.partition(".")
+    if not hmac.compare_digest(signature, _marker_signature(payload)):
+        return False
+    try:
+        return int(marker_user) == user_id and int(until) > time.time()
+    except ValueError:
+        return False
+
+
+class WriteMarkerMiddleware:
+    """Attach a signed read-your-writes marker to responses of requests that wrote"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writer = []
+        token = _request_writer.set(writer)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writer:
+                window = settings.database_replica_lag_window
+                marker = sign_write_marker(writer[0], time.time() + window + 1)
+                cookie = f"{WRITE_MARKER_COOKIE}={marker}; Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode()),
+                    (WRITE_MARKER_HEADER.lower().encode(), marker.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writer.reset(token)
+
+
+# Remember which sessions wrote; get_current_user puts the user id in session.info
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.info.pop("wrote", False) and replica_engines:
+        user_id = session.info.get("user_id")
+        writer = _request_writer.get()
+        if user_id is not None and writer is not None:
+            writer[:] = [user_id]
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("wrote", None)
+
+
+def _request_user_id(request: Request) -> Optional[int]:
+    """User id from the bearer token, if any (not verified against the database)"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    payload = verify_token(token)
+    return payload.get("user_id") if payload else None
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Dependency to get a session for read-only handlers.
+
+    Reads from a replica when replicas are configured. Falls back to the
+    primary session when there are none or when the caller wrote within
+    database_replica_lag_window seconds (their request carries the write
+    marker), so users read their own writes whichever worker serves them.
+    The primary session is lazy and opens no connection unless used.
+    """
+    marker = request.headers.get(WRITE_MARKER_HEADER) or request.cookies.get(WRITE_MARKER_COOKIE)
+    if not replica_engines or (marker and write_marker_applies(marker, _request_user_id(request))):
+        yield db
+        return
+    replica_db = ReplicaSessionLocal()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
@@ -0,0 +1,173 @@
+"""
+Readiness checks behind /readyz.
+
+The database (reached through the pool, under a tight timeout) and pool
+saturation decide whether the instance takes traffic. Redis and the
+leaderboard flusher only degrade features, so their failures are reported
+without taking the instance out of the load balancer.
+
+Results are cached for readiness_cache_seconds and concurrent probes share
+one run of the checks, so probe storms do not add database load.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy import text
+from app.core import database
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+READY = "ready"
+DEGRADED = "degraded"  # Serving, with a non-critical dependency down
+UNAVAILABLE = "unavailable"
+
+CRITICAL_CHECKS = ("database", "pool")
+
+readiness_flight = SingleFlight("readiness")
+# Checks run here so one that hangs past its timeout holds no request thread. A check
+# still running from an earlier probe is not submitted again (it can block for the
+# whole pool or connect timeout), so each check holds at most one slot and the
+# queue never grows
+_check_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="readiness")
+_in_flight: Dict[str, Tuple[float, Future]] = {}
+_in_flight_lock = threading.Lock()
+
+
+def _engines():
+    return [("primary", database.engine)] + [
+        (f"replica-{index}", replica) for index, replica in enumerate(database.replica_engines)
+    ]
+
+
+def check_database() -> dict:
+    """SELECT 1 on a pooled connection of every engine"""
+    latencies = {}
+    for name, bound in _engines():
+        started = time.perf_counter()
+        with bound.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        latencies[name] = round((time.perf_counter() - started) * 1000, 1)
+    return {"status": "ok", "latency_ms": latencies}
+
+
+def check_pool() -> dict:
+    """Share of each pool's connections (pool_size + max_overflow) checked out"""
+    usage = {}
+    saturated = False
+    for name, bound in _engines():
+        pool = bound.pool
+        if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+            continue  # Pools without a limit (SQLite)
+        capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+        share = pool.checkedout() / capacity if capacity else 0.0
+        usage[name] = round(share, 2)
+        saturated = saturated or share >= settings.readiness_max_pool_usage
+    return {"status": "fail" if saturated else "ok", "usage": usage}
+
+
+def redis_configured() -> bool:
+    from app.services import leaderboard_service
+
+    return settings.rate_limit_backend == "redis" or settings.leaderboard_backend == "redis" or isinstance(
+        leaderboard_service._leaderboards, leaderboard_service.RedisLeaderboards
+    )
+
+
+_redis_client = None
+
+
+def check_redis() -> dict:
+    global _redis_client
+    if _redis_client is None:
+        import redis
+
+        _redis_client = redis.Redis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=settings.readiness_timeout, socket_timeout=settings.readiness_timeout
+        )
+    _redis_client.ping()
+    return {"status": "ok"}
+
+
+def check_leaderboard_flusher() -> dict:
+    from app.services.leaderboard_service import leaderboard_flusher
+
+    running = leaderboard_flusher.is_running()
+    failing = leaderboard_flusher.consecutive_failures
+    return {
+        "status": "ok" if running and not failing else "fail",
+        "running": running,
+        "pending_users": leaderboard_flusher.pending(),
+        "consecutive_failures": failing,
+    }
+
+
+def _submit(name: str, check: Callable[[], dict], now: float) -> Tuple[float, Future]:
+    """(submission time, future) of the check, reusing a run that has not finished"""
+    with _in_flight_lock:
+        running = _in_flight.get(name)
+        if running is not None and not running[1].done():
+            return running
+        _in_flight[name] = (now, _check_executor.submit(check))
+        return _in_flight[name]
+
+
+def _run_checks() -> Tuple[str, Dict[str, dict]]:
+    checks: Dict[str, Callable[[], dict]] = {
+        "database": check_database,
+        "pool": check_pool,
+        "leaderboard_flusher": check_leaderboard_flusher,
+    }
+    if redis_configured():
+        checks["redis"] = check_redis
+
+    started = time.monotonic()
+    deadline = started + settings.readiness_timeout
+    futures = {name: _submit(name, check, started) for name, check in checks.items()}
+    results = {}
+    for name, (submitted, future) in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            results[name] = {"status": "fail", "error": f"timed out after {time.monotonic() - submitted:.1f}s"}
+        except Exception as exc:
+            results[name] = {"status": "fail", "error": type(exc).__name__}
+
+    if any(results[name]["status"] != "ok" for name in CRITICAL_CHECKS):
+        status = UNAVAILABLE
+    elif any(result["status"] != "ok" for result in results.values()):
+        status = DEGRADED
+    else:
+        status = READY
+    return status, results
+
+
+_cached: Optional[Tuple[float, str, Dict[str, dict]]] = None
+_cache_lock = threading.Lock()
+
+
+def _checked() -> Tuple[str, Dict[str, dict]]:
+    global _cached
+    status, results = _run_checks()
+    with _cache_lock:
+        _cached = (time.monotonic(), status, results)
+    return status, results
+
+
+async def readiness() -> Tuple[str, Dict[str, dict]]:
+    """(status, per-check results), at most readiness_cache_seconds old"""
+    cached = _cached
+    if cached is not None and time.monotonic() - cached[0] < settings.readiness_cache_seconds:
+        return cached[1], cached[2]
+    return await readiness_flight.do_async("readyz", _checked)
+
+
+def reset_cache() -> None:
+    """Forget the cached results and any check still running"""
+    global _cached
+    with _cache_lock:
+        _cached = None
+    with _in_flight_lock:
+        _in_flight.clear()
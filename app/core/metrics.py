@@ -0,0 +1,358 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.routing import route_template
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Per-request SQL totals ([count, seconds]); the list is shared with the threadpool
+# workers running the request's sync code because they run in a copy of the context
+_request_sql: ContextVar[Optional[list]] = ContextVar("request_sql", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _ShardedMetric:
+    """Base for metrics whose writes go to a per-thread shard.
+
+    Each thread only ever writes its own dict, so recording takes no lock;
+    the scrape sums a copy of every shard. A lock is only taken the first time
+    a thread records anything.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    type_name = "counter"
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[tuple, float]:
+        totals: Dict[tuple, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Gauge(Counter):
+    """Up/down value; shards hold deltas, so inc and dec may run on different threads"""
+
+    type_name = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_ShardedMetric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # One slot per bucket, then sum and count
+            state = shard[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def values(self) -> Dict[tuple, list]:
+        totals: Dict[tuple, list] = {}
+        for shard in self._snapshots():
+            for labels, state in shard.items():
+                total = totals.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+                for i, value in enumerate(list(state)):
+                    total[i] += value
+        return totals
+
+    def collect(self) -> List[str]:
+        lines = []
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, inf)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge family read from a callback at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[tuple, float]]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        registry.register(self)
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.callback().items())
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+    def register(self, metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+        """Export hits/misses of a cache; stats returns (hits, misses)"""
+        self._caches[name] = stats
+
+    def cache_stats(self) -> Dict[str, Tuple[int, int]]:
+        return {name: stats() for name, stats in list(self._caches.items())}
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            samples = metric.collect()
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP
+http_requests = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route", "status")
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests being processed", ("method", "route"))
+http_conditional = Counter(
+    "http_conditional_requests_total", "If-None-Match requests by outcome (hit = 304)",
+    ("route", "result")
+)
+
+# SQL
+sql_queries = Histogram("db_query_duration_seconds", "SQL statement latency", ())
+sql_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per request",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+sql_time_per_request = Histogram(
+    "db_query_seconds_per_request", "Total SQL time per request", ("method", "route")
+)
+
+# Connection pool
+pool_checkouts = Counter("db_pool_checkouts_total", "Connections checked out of the pool", ())
+pool_connects = Counter("db_pool_connects_total", "New DBAPI connections opened by the pool", ())
+pool_hold_time = Histogram("db_pool_checkout_duration_seconds", "Time a connection stays checked out", ())
+
+
+# SQL and pool instrumentation
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    sql_queries.observe(elapsed)
+    totals = _request_sql.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+# Engines whose pool state is exported, by name ("primary", "replica-0", ...)
+_pool_engines: Dict[str, Engine] = {}
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """Time SQL statements and track pool checkouts for an engine"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _pool_engines[name] = engine
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        pool_connects.inc()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_checkouts.inc()
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            pool_hold_time.observe(time.perf_counter() - started)
+
+
+def _pool_state() -> Dict[tuple, float]:
+    state = {}
+    for name, engine in list(_pool_engines.items()):
+        pool = engine.pool
+        for stat in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, stat, None)
+            if method is not None:
+                state[(name, stat)] = method()
+    return state
+
+
+def _cache_ratios() -> Dict[tuple, float]:
+    ratios = {}
+    for name, (hits, misses) in registry.cache_stats().items():
+        ratios[(name, "hits")] = hits
+        ratios[(name, "misses")] = misses
+        ratios[(name, "hit_ratio")] = hits / (hits + misses) if hits + misses else 0.0
+    return ratios
+
+
+def _singleflight_stats() -> Dict[tuple, float]:
+    from app.core import singleflight
+
+    values = {}
+    for name, flight in list(singleflight.registry.items()):
+        for stat, value in flight.stats().items():
+            values[(name, stat)] = value
+    return values
+
+
+def _admission_stats() -> Dict[tuple, float]:
+    from app.core import admission
+
+    values = {}
+    for middleware in admission.admission_registry:
+        for route, limiter in list(middleware.limiters.items()):
+            for stat, value in limiter.stats().items():
+                values[(route, stat)] = value
+    return values
+
+
+def _boot_phases() -> Dict[tuple, float]:
+    from app.core.boot import boot_timer
+
+    values = {(phase,): seconds for phase, seconds in boot_timer.phases}
+    if boot_timer.ready is not None:
+        values[("total",)] = boot_timer.ready
+    return values
+
+
+CallbackGauge("db_pool_connections", "Connection pool state (QueuePool statistics)", ("engine", "state"), _pool_state)
+CallbackGauge("cache_stats", "Cache hits, misses and hit ratio", ("cache", "stat"), _cache_ratios)
+CallbackGauge("singleflight_stats", "Single-flight calls, executions and coalesced calls",
+              ("flight", "stat"), _singleflight_stats)
+CallbackGauge("admission_route_stats", "Admission control limiter state per route",
+              ("route", "stat"), _admission_stats)
+CallbackGauge("boot_phase_seconds", "Seconds spent in each boot phase of this worker", ("phase",), _boot_phases)
+
+
+class MetricsMiddleware:
+    """Record latency, in-flight requests and SQL usage per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status_holder = [500]
+        conditional = any(name == b"if-none-match" for name, _ in scope.get("headers", []))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        totals = [0, 0.0]
+        token = _request_sql.set(totals)
+        http_in_flight.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec(method, route)
+            _request_sql.reset(token)
+            status = status_holder[0]
+            http_requests.observe(elapsed, method, route, str(status))
+            sql_per_request.observe(totals[0], method, route)
+            sql_time_per_request.observe(totals[1], method, route)
+            if conditional:
+                http_conditional.inc(route, "hit" if status == 304 else "miss")
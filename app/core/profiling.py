@@ -0,0 +1,211 @@
+import cProfile
+import functools
+import hmac
+import inspect
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-token"
+MAX_STACK_DEPTH = 128
+
+_current_profile: ContextVar[Optional["ProfileSession"]] = ContextVar("current_profile", default=None)
+
+
+class _StackSampler(threading.Thread):
+    """Sample one thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and len(names) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    """Profile data of one request: cProfile stats, sampled stacks and SQL statements"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.profiler = cProfile.Profile()
+        self.stacks: Counter = Counter()
+        self.statements: List[dict] = []
+        self.started_at = datetime.now()
+        self.duration = 0.0
+
+    def run(self, fn: Callable, args, kwargs):
+        """Run a sync endpoint in the current (threadpool) thread under both profilers"""
+        sampler = _StackSampler(threading.get_ident(), settings.profiling_sample_interval)
+        sampler.start()
+        try:
+            return self.profiler.runcall(fn, *args, **kwargs)
+        finally:
+            sampler.stop()
+            self.stacks.update(sampler.stacks)
+
+    async def run_async(self, fn: Callable, args, kwargs):
+        """Run an async endpoint; other tasks on the event loop show up in its profile too"""
+        sampler = _StackSampler(threading.get_ident(), settings.profiling_sample_interval)
+        sampler.start()
+        self.profiler.enable()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self.profiler.disable()
+            sampler.stop()
+            self.stacks.update(sampler.stacks)
+
+    def write(self, root: Path) -> Path:
+        """Write profile.pstats, stacks.collapsed and sql.json to a new directory under root"""
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", self.path).strip("-") or "root"
+        directory = root / f"{self.started_at:%Y%m%d-%H%M%S}-{self.method}-{slug}-{self.id}"
+        directory.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(str(directory / "profile.pstats"))
+        with open(directory / "stacks.collapsed", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(directory / "sql.json", "w") as f:
+            json.dump({
+                "method": self.method,
+                "path": self.path,
+                "duration_ms": round(self.duration * 1000, 3),
+                "queries": len(self.statements),
+                "query_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+                "statements": self.statements,
+            }, f, indent=2)
+        return directory
+
+
+def _record_statement_start(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    session = _current_profile.get()
+    if session is None:
+        return
+    started = conn.info["profile_started"].pop()
+    session.statements.append({
+        "statement": statement,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "executemany": executemany,
+    })
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Capture the SQL of profiled requests on an engine"""
+    if event.contains(engine, "before_cursor_execute", _record_statement_start):
+        return
+    event.listen(engine, "before_cursor_execute", _record_statement_start)
+    event.listen(engine, "after_cursor_execute", _record_statement)
+
+
+def should_profile(request) -> bool:
+    """Profile when the admin token header matches or the request is sampled"""
+    token = request.headers.get(PROFILE_HEADER)
+    if token and settings.profiling_token and hmac.compare_digest(token, settings.profiling_token):
+        return True
+    return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+
+def _profiled_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so it runs under the request's ProfileSession, if any.
+
+    functools.wraps keeps the signature FastAPI reads dependencies from.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _current_profile.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            return await session.run_async(endpoint, args, kwargs)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _current_profile.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        return session.run(endpoint, args, kwargs)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that profiles selected requests.
+
+    The endpoint is wrapped so the profilers run in the thread that executes
+    it (sync endpoints run in the threadpool, out of reach of a middleware).
+    SQL from dependencies and the endpoint is captured through a ContextVar.
+    The profile directory name is returned in X-Profile-Id.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        original = super().get_route_handler()
+
+        async def handler(request):
+            if not should_profile(request):
+                return await original(request)
+
+            session = ProfileSession(request.method, self.path)
+            token = _current_profile.set(session)
+            started = time.perf_counter()
+            try:
+                response = await original(request)
+            finally:
+                session.duration = time.perf_counter() - started
+                _current_profile.reset(token)
+                try:
+                    directory = await run_in_threadpool(session.write, Path(settings.upload_dir) / "profiles")
+                    logger.info("Profile of %s %s written to %s", request.method, self.path, directory)
+                except OSError:
+                    logger.exception("Could not write profile")
+                    directory = None
+            if directory is not None:
+                response.headers["X-Profile-Id"] = directory.name
+            return response
+
+        return handler
+
+
+# Routers use this: plain APIRoute unless profiling is enabled, so there is no cost otherwise
+route_class = ProfiledRoute if settings.profiling_enabled else APIRoute
@@ -0,0 +1,25 @@
+from starlette.routing import Match
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope) -> str:
+    """Return the path template (e.g. /api/v1/study-sets/{study_set_id}) a request will hit.
+
+    Middleware runs before routing, so this repeats the router's matching. Keying
+    limits and metrics on the template keeps their number bounded by the number of
+    routes instead of growing with every id.
+    """
+    cached = scope.get("route_template")
+    if cached is not None:
+        return cached
+    template = UNMATCHED_ROUTE
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            template = getattr(route, "path", UNMATCHED_ROUTE)
+            break
+    # Several middlewares need it; match the routes once per request
+    scope["route_template"] = template
+    return template
@@ -0,0 +1,149 @@
+"""
+Production server: several worker processes serving app.main:app.
+
+Gunicorn runs the workers (UvicornWorker) with the app preloaded before
+fork, and recycles each worker after web_max_requests requests. Where
+gunicorn is not available (Windows, or not installed) uvicorn's own
+multi-process mode is used instead, without preloading or recycling.
+
+Worker count and per-worker connection pools are sized together so that
+all workers never open more than database_max_connections connections to
+one database server.
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_CONNECTIONS_PER_WORKER = 2  # An auto-sized worker gets at least this many connections
+
+
+@dataclass
+class WorkerPlan:
+    workers: int
+    pool_size: int  # Connections kept open per worker and engine
+    max_overflow: int  # Extra connections a worker may open under load
+
+    @property
+    def max_connections(self) -> int:
+        """Most connections all workers together open to one database server"""
+        return self.workers * (self.pool_size + self.max_overflow)
+
+
+def plan_workers(cpu_count: int, max_connections: int, requested_workers: int = 0,
+                 pool_size: int = 5, max_overflow: int = 10) -> WorkerPlan:
+    """Worker count and per-worker pool sizes that fit max_connections.
+
+    requested_workers 0 means one worker per CPU, fewer when the connection
+    budget cannot give each MIN_CONNECTIONS_PER_WORKER. pool_size and
+    max_overflow are per-worker ceilings, lowered to the worker's share.
+    """
+    if requested_workers:
+        workers = requested_workers
+    else:
+        workers = max(1, min(cpu_count, max_connections // MIN_CONNECTIONS_PER_WORKER))
+    share = max_connections // workers
+    if share < 1:
+        raise ValueError(
+            f"{workers} workers cannot share {max_connections} database connections; "
+            "lower the worker count or raise DATABASE_MAX_CONNECTIONS"
+        )
+    worker_pool_size = max(1, min(pool_size, share))
+    return WorkerPlan(workers, worker_pool_size, max(0, min(max_overflow, share - worker_pool_size)))
+
+
+def apply_plan(plan: WorkerPlan) -> None:
+    """Make workers create their engines with the planned pool sizes.
+
+    Set in the environment for workers that import the settings again
+    (uvicorn spawns them) and on the settings object for preloaded ones.
+    """
+    for name, value in (("DATABASE_POOL_SIZE", plan.pool_size), ("DATABASE_MAX_OVERFLOW", plan.max_overflow)):
+        os.environ[name] = str(value)
+    settings.database_pool_size = plan.pool_size
+    settings.database_max_overflow = plan.max_overflow
+
+
+def _gunicorn_available() -> bool:
+    if sys.platform == "win32":
+        return False
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _post_fork(server, worker) -> None:
+    # Preloading imported the app (and created its engines) in the master; a
+    # connection must never be shared between processes, so start with empty pools
+    from app.core.database import engine, replica_engines
+
+    for bound in (engine, *replica_engines):
+        bound.dispose(close=False)
+
+
+def _run_gunicorn(plan: WorkerPlan, host: str, port: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class QuizletApplication(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    QuizletApplication({
+        "bind": f"{host}:{port}",
+        "workers": plan.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.web_max_requests,
+        "max_requests_jitter": settings.web_max_requests_jitter,
+        "timeout": settings.web_timeout,
+        "graceful_timeout": settings.web_timeout,
+        "post_fork": _post_fork,
+        "accesslog": "-",
+    }).run()
+
+
+def _run_uvicorn(plan: WorkerPlan, host: str, port: int) -> None:
+    import uvicorn
+
+    # uvicorn does not replace workers that exit (nor restart a single server), so nothing is recycled here
+    if plan.workers == 1:
+        from app.main import app
+        uvicorn.run(app, host=host, port=port, log_level="info")
+    else:
+        uvicorn.run("app.main:app", host=host, port=port, workers=plan.workers, log_level="info")
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: Optional[int] = None) -> None:
+    """Run the production server (blocks until it stops)"""
+    plan = plan_workers(
+        os.cpu_count() or 1, settings.database_max_connections,
+        requested_workers=settings.web_workers if workers is None else workers,
+        pool_size=settings.database_pool_size, max_overflow=settings.database_max_overflow
+    )
+    apply_plan(plan)
+    runner = "gunicorn" if _gunicorn_available() else "uvicorn"
+    logger.info(
+        "Starting %d %s workers, pool %d + %d overflow each (at most %d of %d database connections)",
+        plan.workers, runner, plan.pool_size, plan.max_overflow, plan.max_connections,
+        settings.database_max_connections
+    )
+    if runner == "gunicorn":
+        _run_gunicorn(plan, host, port)
+    else:
+        _run_uvicorn(plan, host, port)
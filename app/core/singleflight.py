@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+from starlette.concurrency import run_in_threadpool
+
+# Every SingleFlight by name, for exporting counters
+registry: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for the same result, or the same
+    exception. Nothing is cached once the call finishes, so keys should
+    include whatever version makes a result current (e.g. current_version).
+
+    Works for sync handlers running in the threadpool (do) and for async
+    handlers (do_async); both kinds of callers can share one flight. Results
+    are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        registry[name] = self
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return the in-flight future for key and whether this caller leads it"""
+        with self._lock:
+            self.calls += 1
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            self.executions += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable, args, kwargs) -> None:
+        """Run the leader's call and hand its outcome to every waiter"""
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            self._finish(key)
+            future.set_exception(exc)
+        else:
+            self._finish(key)
+            future.set_result(result)
+
+    def _finish(self, key: Hashable) -> None:
+        # Later callers start a fresh flight instead of joining a finished one
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn(*args, **kwargs), or wait for an identical call already running"""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn, args, kwargs)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Async variant of do: the leader runs the blocking fn in the threadpool"""
+        future, leader = self._join(key)
+        if leader:
+            await run_in_threadpool(self._run, key, future, fn, args, kwargs)
+        return await asyncio.wrap_future(future)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
+
@@ -1,7 +1,23 @@
+import logging
+from app.core.boot import boot_timer
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import router as api_v1_router
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.core.database import engine, replica_engines, SessionLocal, WriteMarkerMiddleware, WRITE_MARKER_HEADER
+
+boot_timer.mark("import framework and config")
+
+from app.api.v1 import router as api_v1_router
+from app.api.v1.media import files_router as media_files_router
+from app.core.admission import AdmissionControlMiddleware
+from app.core import health, metrics, profiling
+from app.services.media_service import media_processor
+from app.services.leaderboard_service import leaderboard_flusher
+
+boot_timer.mark("import routers and models")
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -12,6 +28,13 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Shed load before it reaches the threadpool (added first so CORS headers wrap its 429/503s)
+if settings.admission_control_enabled:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Tell clients that just wrote to keep reading from the primary (see get_read_db)
+app.add_middleware(WriteMarkerMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -19,10 +42,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-After-Position", "X-Next-After-Id", WRITE_MARKER_HEADER],
 )
 
+# Outermost, so shed and rate-limited requests are measured too
+if settings.metrics_enabled:
+    metrics.instrument_engine(engine)
+    for index, replica in enumerate(replica_engines):
+        metrics.instrument_engine(replica, f"replica-{index}")
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Capture SQL of profiled requests (routers use profiling.route_class)
+if settings.profiling_enabled:
+    for bound in (engine, *replica_engines):
+        profiling.instrument_engine(bound)
+
 # Include API routes
 app.include_router(api_v1_router, prefix="/api/v1")
+app.include_router(media_files_router, prefix="/media")
+
+boot_timer.mark("build app")
+
+
+@app.on_event("startup")
+def start_leaderboard_flusher():
+    leaderboard_flusher.start(SessionLocal)
+
+
+@app.on_event("shutdown")
+def stop_media_processor():
+    media_processor.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_leaderboard_flusher():
+    # Writes the answers recorded since the last flush
+    leaderboard_flusher.stop(SessionLocal)
 
 
 @app.get("/")
@@ -35,6 +90,43 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/livez", include_in_schema=False)
+async def liveness_check():
+    """Liveness probe: the process serves requests. Touches no dependency."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readiness_check():
+    """Readiness probe: database, pool saturation, Redis (when used) and the leaderboard flusher.
+
+    503 when the database or the pool is failing; "degraded" (200) when only
+    Redis or the flusher is. Startup never connects to the database; this is
+    where connectivity is checked. Results are cached for a few seconds.
+    """
+    status, checks = await health.readiness()
+    if status == health.UNAVAILABLE:
+        logger.warning("Readiness check failed: %s", {name: check for name, check in checks.items()
+                                                      if check["status"] != "ok"})
+    return JSONResponse(
+        status_code=503 if status == health.UNAVAILABLE else 200,
+        content={"status": status, "checks": checks}
+    )
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def prometheus_metrics():
+        """Prometheus text exposition of request, SQL, pool and cache metrics"""
+        return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# Registered last so it runs after the other startup events
+@app.on_event("startup")
+def report_boot_time():
+    boot_timer.finish()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
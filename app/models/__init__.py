@@ -1,5 +1,8 @@
 # Database models
 from .user import User
-from .study_set import StudySet, Term, StudySetVersion
+from .study_set import StudySet, Term, StudySetVersion, TermBlob, VersionNode, StudySetFacet
+from .report import Report
+from .study_class import StudyClass, ClassMember, ClassStudySet, MasteredTerm
 
-__all__ = ["User", "StudySet", "Term", "StudySetVersion"] 
\ No newline at end of file
+__all__ = ["User", "StudySet", "Term", "StudySetVersion", "TermBlob", "VersionNode", "StudySetFacet", "Report",
+           "StudyClass", "ClassMember", "ClassStudySet", "MasteredTerm"]
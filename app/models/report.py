@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Report(Base):
+    __tablename__ = "reports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    reported_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    reported_entity_type = Column(String(50), nullable=False)  # 'term' or 'study_set'
+    reported_entity_id = Column(Integer, nullable=False)
+    reason = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending, reviewed, resolved, dismissed
+    resolved_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    reported_at = Column(DateTime(timezone=True), server_default=func.now())
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+    screening_score = Column(Float, nullable=True)
+    screening_notes = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Workers claim the oldest pending reports first
+        Index("ix_reports_status_id", "status", "id"),
+    )
@@ -0,0 +1,63 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class StudyClass(Base):
+    __tablename__ = "classes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    description = Column(Text, nullable=True)
+    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    join_code = Column(String(10), unique=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    is_active = Column(Boolean, default=True)
+
+
+class ClassMember(Base):
+    __tablename__ = "class_members"
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    role = Column(String(10), nullable=False, default="student")  # teacher or student
+    joined_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Leaderboard totals, written in batches by the leaderboard flusher
+    score = Column(Integer, nullable=False, default=0, server_default="0")  # Correct answers
+    terms_mastered = Column(Integer, nullable=False, default=0, server_default="0")  # Distinct terms answered with no typo
+
+    __table_args__ = (
+        Index("ux_class_members_class_user", "class_id", "user_id", unique=True),
+    )
+
+
+class ClassStudySet(Base):
+    """A study set assigned to a class; only answers on assigned sets count for its leaderboards"""
+    __tablename__ = "class_study_sets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    study_set_id = Column(Integer, ForeignKey("study_sets.id"), nullable=False, index=True)
+    assigned_at = Column(DateTime(timezone=True), server_default=func.now())
+    due_date = Column(DateTime(timezone=True), nullable=True)
+    is_optional = Column(Boolean, default=False)
+
+    __table_args__ = (
+        Index("ux_class_study_sets_class_set", "class_id", "study_set_id", unique=True),
+    )
+
+
+class MasteredTerm(Base):
+    """First answer with no typo of a user on a term; terms_mastered counts these rows"""
+    __tablename__ = "mastered_terms"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    study_set_id = Column(Integer, ForeignKey("study_sets.id", ondelete="CASCADE"), nullable=False)
+    term_id = Column(Integer, ForeignKey("terms.id", ondelete="CASCADE"), nullable=False)
+    mastered_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ux_mastered_terms_user_term", "user_id", "term_id", unique=True),
+    )
@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, Index, DDL, event, inspect
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.utils.text import fold
+
+
+def study_set_search_text(title: Optional[str], description: Optional[str]) -> str:
+    """Folded title and description (no case, accents or punctuation), as the fuzzy search mode matches them"""
+    return f"{fold(title or '')} {fold(description or '')}".strip()
 
 
 class StudySet(Base):
@@ -20,12 +27,42 @@ class StudySet(Base):
     views_count = Column(Integer, default=0)
     favorites_count = Column(Integer, default=0)
     average_rating = Column(Float, default=0.0)
+    current_version = Column(Integer, nullable=False, default=0, server_default="0")  # Latest version_number
+    manifest_hash = Column(String(64), nullable=True)  # Manifest root of the current term list
+    search_text = Column(Text, nullable=True)  # study_set_search_text(title, description), for fuzzy search
 
     # Relationships
     user = relationship("User", back_populates="study_sets")
     terms = relationship("Term", back_populates="study_set", cascade="all, delete-orphan")
     versions = relationship("StudySetVersion", back_populates="study_set", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Trigram index for the fuzzy search mode (PostgreSQL with pg_trgm only)
+        Index(
+            "ix_study_sets_search_text_trgm", "search_text",
+            postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+event.listen(
+    StudySet.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
+# ORM flushes keep search_text current; Core statements that change title or description set it themselves
+@event.listens_for(StudySet, "before_insert")
+def _set_search_text(mapper, connection, target):
+    target.search_text = study_set_search_text(target.title, target.description)
+
+
+@event.listens_for(StudySet, "before_update")
+def _update_search_text(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes():
+        target.search_text = study_set_search_text(target.title, target.description)
+
 
 class Term(Base):
     __tablename__ = "terms"
@@ -43,6 +80,10 @@ class Term(Base):
     # Relationships
     study_set = relationship("StudySet", back_populates="terms")
 
+    __table_args__ = (
+        Index("ix_terms_study_set_position_id", "study_set_id", "position", "id"),
+    )
+
 
 class StudySetVersion(Base):
     __tablename__ = "study_set_versions"
@@ -55,7 +96,49 @@ class StudySetVersion(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     changes_summary = Column(Text, nullable=True)
+    root_hash = Column(String(64), nullable=True)  # Root of the term manifest tree; NULL for legacy versions
+    terms_count = Column(Integer, nullable=True)
 
     # Relationships
     study_set = relationship("StudySet", back_populates="versions")
-    user = relationship("User") 
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ux_study_set_versions_set_number", "study_set_id", "version_number", unique=True),
+    )
+
+
+class TermBlob(Base):
+    """Content of a term, stored once per distinct content hash"""
+    __tablename__ = "term_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    term = Column(String(500), nullable=False)
+    definition = Column(Text, nullable=False)
+    image_url = Column(String(500), nullable=True)
+    audio_url = Column(String(500), nullable=True)
+
+
+class VersionNode(Base):
+    """Content-addressed node of a version manifest tree.
+
+    Leaf nodes (level 0) hold [term_id, blob_hash] pairs in position order,
+    inner nodes hold the hashes of their children.
+    """
+    __tablename__ = "version_nodes"
+
+    hash = Column(String(64), primary_key=True)
+    level = Column(Integer, nullable=False)
+    entries = Column(Text, nullable=False)  # JSON list 
+
+class StudySetFacet(Base):
+    """Number of public study sets per facet value, kept current by StudySetService.
+
+    facet is "language_pair" (value "<from>:<to>") or "rating" (value: the
+    whole-star band, "0" to "4"). FacetService.reconcile recounts from study_sets.
+    """
+    __tablename__ = "study_set_facets"
+
+    facet = Column(String(32), primary_key=True)
+    value = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
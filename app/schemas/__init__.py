@@ -1,14 +1,24 @@
 # Pydantic schemas for request/response models
 from .user import UserBase, UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData
 from .study_set import (
-    StudySetBase, StudySetCreate, StudySetUpdate, StudySetResponse, StudySetDetailResponse,
+    StudySetBase, StudySetCreate, StudySetUpdate, StudySetClone, StudySetResponse, StudySetDetailResponse, StudySetBatchResponse,
     StudySetListItem, StudySetListResponse, StudySetSearchParams,
-    TermBase, TermCreate, TermUpdate, TermResponse, TermBulkCreate, TermReorder
+    TermBase, TermCreate, TermUpdate, TermResponse, TermBulkCreate, TermReorder,
+    StudySetVersionResponse, TermSnapshot, TermChange, StudySetVersionDiff, StudySetSuggestion,
+    LanguagePairCount, RatingBandCount, StudySetFacets, QuizQuestion, StudySetQuiz,
+    GradeAnswer, GradeRequest, GradeResult, StudySetGradeResponse
 )
+from .report import ReportCreate, ReportResponse
+from .study_class import StudyClassCreate, StudyClassJoin, StudyClassResponse, LeaderboardEntry, LeaderboardResponse
 
 __all__ = [
     "UserBase", "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData",
-    "StudySetBase", "StudySetCreate", "StudySetUpdate", "StudySetResponse", "StudySetDetailResponse",
-    "StudySetListItem", "StudySetListResponse", "StudySetSearchParams",
-    "TermBase", "TermCreate", "TermUpdate", "TermResponse", "TermBulkCreate", "TermReorder"
+    "StudySetBase", "StudySetCreate", "StudySetUpdate", "StudySetClone", "StudySetResponse", "StudySetDetailResponse",
+    "StudySetBatchResponse",    "StudySetListItem", "StudySetListResponse", "StudySetSearchParams",
+    "TermBase", "TermCreate", "TermUpdate", "TermResponse", "TermBulkCreate", "TermReorder",
+    "StudySetVersionResponse", "TermSnapshot", "TermChange", "StudySetVersionDiff", "StudySetSuggestion",
+    "LanguagePairCount", "RatingBandCount", "StudySetFacets", "QuizQuestion", "StudySetQuiz",
+    "GradeAnswer", "GradeRequest", "GradeResult", "StudySetGradeResponse",
+    "ReportCreate", "ReportResponse",
+    "StudyClassCreate", "StudyClassJoin", "StudyClassResponse", "LeaderboardEntry", "LeaderboardResponse"
 ] 
\ No newline at end of file
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class MediaUploadResponse(BaseModel):
+    url: str  # Put this in a term's image_url or audio_url
+    hash: str  # SHA-256 of the content
+    content_type: str
+    size: int
+    deduplicated: bool  # The same content was already stored
+    thumbnail_url: Optional[str] = None  # Images, once the thumbnail is ready
+    transcoded_url: Optional[str] = None  # Non-MP3 audio, once the MP3 is ready
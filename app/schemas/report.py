@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class ReportCreate(BaseModel):
+    reported_entity_type: str = Field(..., pattern="^(term|study_set)$")
+    reported_entity_id: int = Field(..., ge=1)
+    reason: Optional[str] = Field(None, max_length=2000)
+
+
+class ReportResponse(BaseModel):
+    id: int
+    reported_by_user_id: int
+    reported_entity_type: str
+    reported_entity_id: int
+    reason: Optional[str]
+    status: str
+    reported_at: datetime
+    resolved_at: Optional[datetime] = None
+    model_config = {"from_attributes": True}
@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+class StudyClassCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+
+
+class StudyClassJoin(BaseModel):
+    join_code: str = Field(..., min_length=1, max_length=10)
+
+
+class StudyClassResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    teacher_id: int
+    join_code: str
+    created_at: datetime
+    is_active: bool
+    model_config = {"from_attributes": True}
+
+
+class ClassStudySetAssign(BaseModel):
+    study_set_id: int
+    due_date: Optional[datetime] = None
+    is_optional: bool = False
+
+
+class ClassStudySetResponse(BaseModel):
+    id: int
+    class_id: int
+    study_set_id: int
+    assigned_at: datetime
+    due_date: Optional[datetime]
+    is_optional: bool
+    model_config = {"from_attributes": True}
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int  # 1 = best
+    value: int  # Score or distinct terms mastered, depending on the leaderboard
+    user: dict  # Will be populated with user info
+
+
+class LeaderboardResponse(BaseModel):
+    class_id: int
+    by: str  # "score" (correct answers) or "terms_mastered" (distinct terms answered with no typo)
+    members: int  # Students on the leaderboard
+    entries: List[LeaderboardEntry]
+    me: Optional[LeaderboardEntry] = None  # The caller's own position, when they are a student of the class
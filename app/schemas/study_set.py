@@ -58,6 +58,11 @@ class StudySetUpdate(BaseModel):
     language_to: Optional[str] = Field(None, max_length=10)
 
 
+class StudySetClone(BaseModel):
+    title: Optional[str] = Field(None, min_length=1, max_length=255)  # Defaults to the source title
+    is_public: Optional[bool] = None  # Defaults to the source visibility
+
+
 class StudySetResponse(StudySetBase):
     id: int
     user_id: int
@@ -73,9 +78,17 @@ class StudySetResponse(StudySetBase):
 
 class StudySetDetailResponse(StudySetResponse):
     terms: List[TermResponse] = []
+    next_terms_cursor: Optional[int] = None  # Pass as after_position to the terms endpoint for the rest
+    next_terms_after_id: Optional[int] = None  # Pass as after_id along with it
     model_config = {"from_attributes": True}
 
 
+class StudySetBatchResponse(BaseModel):
+    items: List[StudySetDetailResponse]
+    missing: List[int] = []  # Requested ids that do not exist
+    forbidden: List[int] = []  # Requested ids of private sets owned by someone else
+
+
 class StudySetListItem(BaseModel):
     id: int
     title: str
@@ -104,6 +117,8 @@ class StudySetSearchParams(BaseModel):
     min_rating: Optional[float] = Field(None, ge=0, le=5)
     sort_by: str = Field("created_at", pattern="^(created_at|title|views_count|favorites_count|average_rating)$")
     sort_order: str = Field("desc", pattern="^(asc|desc)$")
+    # "contains": title or description contains search; "fuzzy": accent-insensitive, typo-tolerant, best match first
+    search_mode: str = Field("contains", pattern="^(contains|fuzzy)$")
 
 
 class StudySetListResponse(BaseModel):
@@ -111,4 +126,103 @@ class StudySetListResponse(BaseModel):
     total: int
     page: int
     size: int
-    pages: int 
\ No newline at end of file
+    pages: int 
+
+class StudySetVersionResponse(BaseModel):
+    id: int
+    study_set_id: int
+    version_number: int
+    title: str
+    description: Optional[str]
+    user_id: int
+    created_at: datetime
+    changes_summary: Optional[str]
+    terms_count: Optional[int] = None
+    model_config = {"from_attributes": True}
+
+
+class TermSnapshot(BaseModel):
+    term_id: int
+    term: str
+    definition: str
+    image_url: Optional[str] = None
+    audio_url: Optional[str] = None
+
+
+class TermChange(BaseModel):
+    term_id: int
+    before: TermSnapshot
+    after: TermSnapshot
+
+
+class StudySetVersionDiff(BaseModel):
+    study_set_id: int
+    from_version: int
+    to_version: int
+    changed_fields: List[str]
+    added: List[TermSnapshot]
+    removed: List[TermSnapshot]
+    modified: List[TermChange]
+
+
+class StudySetSuggestion(BaseModel):
+    id: int
+    title: str
+    views_count: int
+
+
+class LanguagePairCount(BaseModel):
+    language_from: Optional[str] = None
+    language_to: Optional[str] = None
+    count: int
+
+
+class RatingBandCount(BaseModel):
+    min_rating: int
+    max_rating: int
+    count: int
+
+
+class StudySetFacets(BaseModel):
+    total: int
+    language_pairs: List[LanguagePairCount]  # Most sets first
+    ratings: List[RatingBandCount]
+
+
+class QuizQuestion(BaseModel):
+    term_id: int
+    prompt: str
+    options: List[str]  # The answer and its distractors, in random order
+    answer_index: int
+
+
+class StudySetQuiz(BaseModel):
+    study_set_id: int
+    answer_with: str  # "definition": pick the definition of a term; "term": the term of a definition
+    questions: List[QuizQuestion]
+
+
+class GradeAnswer(BaseModel):
+    term_id: int
+    answer: str = Field(..., max_length=1000)
+
+
+class GradeRequest(BaseModel):
+    answers: List[GradeAnswer] = Field(..., min_length=1)
+    answer_with: str = Field("definition", pattern="^(definition|term)$")  # Side the learner typed
+
+
+class GradeResult(BaseModel):
+    term_id: int
+    result: str  # "exact" (ignoring case, accents and punctuation), "typo" or "incorrect"
+    correct: bool
+    distance: Optional[int] = None  # Edits from the closest accepted answer, when correct
+    expected: str
+
+
+class StudySetGradeResponse(BaseModel):
+    study_set_id: int
+    answer_with: str
+    total: int
+    correct: int
+    results: List[GradeResult]
@@ -1,5 +1,7 @@
 # Business logic services
 from .auth_service import AuthService
 from .study_set_service import StudySetService, TermService
+from .report_service import ReportService
+from .moderation_service import ModerationService, ModerationStats
 
-__all__ = ["AuthService", "StudySetService", "TermService"] 
\ No newline at end of file
+__all__ = ["AuthService", "StudySetService", "TermService", "ReportService", "ModerationService", "ModerationStats"]
@@ -0,0 +1,138 @@
+import secrets
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException, status
+from app.models.study_class import StudyClass, ClassMember, ClassStudySet
+from app.models.study_set import StudySet
+from app.schemas.study_class import StudyClassCreate, ClassStudySetAssign
+from app.services.leaderboard_service import LeaderboardService
+
+JOIN_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # No 0/O or 1/I look-alikes
+JOIN_CODE_LENGTH = 8
+
+
+class ClassService:
+    @staticmethod
+    def create_class(db: Session, class_data: StudyClassCreate, teacher_id: int) -> StudyClass:
+        """Create a class with a fresh join code; its creator joins it as the teacher"""
+        for _ in range(5):
+            study_class = StudyClass(
+                name=class_data.name,
+                description=class_data.description,
+                teacher_id=teacher_id,
+                join_code="".join(secrets.choice(JOIN_CODE_ALPHABET) for _ in range(JOIN_CODE_LENGTH))
+            )
+            db.add(study_class)
+            try:
+                db.flush()
+            except IntegrityError:
+                # Join code already taken
+                db.rollback()
+                continue
+            db.add(ClassMember(class_id=study_class.id, user_id=teacher_id, role="teacher"))
+            db.commit()
+            db.refresh(study_class)
+            return study_class
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not generate a join code, please try again"
+        )
+
+    @staticmethod
+    def join_class(db: Session, join_code: str, user_id: int) -> StudyClass:
+        """Join a class as a student"""
+        study_class = db.query(StudyClass).filter(
+            StudyClass.join_code == join_code.strip().upper(),
+            StudyClass.is_active == True
+        ).first()
+        if not study_class:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Class not found"
+            )
+
+        existing = db.query(ClassMember.id).filter(
+            ClassMember.class_id == study_class.id,
+            ClassMember.user_id == user_id
+        ).first()
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You are already a member of this class"
+            )
+
+        db.add(ClassMember(class_id=study_class.id, user_id=user_id, role="student"))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You are already a member of this class"
+            )
+        LeaderboardService.member_joined(study_class.id)
+        return study_class
+
+    @staticmethod
+    def get_class_for_member(db: Session, class_id: int, user_id: int) -> StudyClass:
+        """Class the user is a member (student or teacher) of"""
+        study_class = db.query(StudyClass).filter(StudyClass.id == class_id).first()
+        if not study_class:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Class not found"
+            )
+
+        member = db.query(ClassMember.id).filter(
+            ClassMember.class_id == class_id,
+            ClassMember.user_id == user_id
+        ).first()
+        if not member:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only class members can view this class"
+            )
+        return study_class
+
+    @staticmethod
+    def assign_study_set(db: Session, class_id: int, assign_data: ClassStudySetAssign, user_id: int) -> ClassStudySet:
+        """Assign a study set to a class; answers on it then count for the class's leaderboards"""
+        study_class = db.query(StudyClass).filter(StudyClass.id == class_id).first()
+        if not study_class:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Class not found"
+            )
+        if study_class.teacher_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the class's teacher can assign study sets"
+            )
+
+        study_set = db.query(StudySet.id).filter(
+            StudySet.id == assign_data.study_set_id,
+            (StudySet.is_public == True) | (StudySet.user_id == user_id)
+        ).first()
+        if not study_set:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Study set not found"
+            )
+
+        assignment = ClassStudySet(
+            class_id=class_id,
+            study_set_id=assign_data.study_set_id,
+            due_date=assign_data.due_date,
+            is_optional=assign_data.is_optional
+        )
+        db.add(assignment)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The study set is already assigned to this class"
+            )
+        db.refresh(assignment)
+        return assignment
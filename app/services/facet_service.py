@@ -0,0 +1,142 @@
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from sqlalchemy import case, delete, func, insert, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session
+from app.models.study_set import StudySet, StudySetFacet
+
+LANGUAGE_PAIR = "language_pair"
+RATING = "rating"
+RATING_BANDS = 5  # Whole-star bands: [0, 1), [1, 2), ... [4, 5]
+# Columns whose change can move a study set between facet values
+FACET_FIELDS = {"is_public", "language_from", "language_to", "average_rating"}
+
+FacetKey = Tuple[str, str]
+
+
+def rating_band(average_rating: Optional[float]) -> int:
+    return min(RATING_BANDS - 1, max(0, int(average_rating or 0)))
+
+
+def _rating_band_column():
+    # Same bands as rating_band(), without floor() (not built into every SQLite)
+    return case(
+        *((StudySet.average_rating >= band, band) for band in range(RATING_BANDS - 1, 0, -1)),
+        else_=0
+    )
+
+
+def _add_count(db: Session, facet: str, value: str, delta: int) -> None:
+    table = StudySetFacet.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(table).values(
+            facet=facet, value=value, count=delta
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.facet, table.c.value], set_={"count": table.c.count + delta}
+        ))
+        return
+    where = (table.c.facet == facet) & (table.c.value == value)
+    if not db.execute(update(table).where(where).values(count=table.c.count + delta)).rowcount:
+        db.execute(insert(table).values(facet=facet, value=value, count=delta))
+
+
+class FacetService:
+    @staticmethod
+    def facet_state(study_set) -> Optional[Tuple[str, str]]:
+        """(language pair, rating band) values a study set is counted under; None when it is not public"""
+        if not study_set.is_public:
+            return None
+        return (
+            f"{study_set.language_from or ''}:{study_set.language_to or ''}",
+            str(rating_band(study_set.average_rating)),
+        )
+
+    @staticmethod
+    def apply_change(db: Session, before: Optional[tuple], after: Optional[tuple]) -> None:
+        """Move a study set's count from its `before` facet state to `after`. The caller commits."""
+        if before == after:
+            return
+        deltas = Counter()
+        for state, sign in ((before, -1), (after, 1)):
+            if state is not None:
+                deltas[(LANGUAGE_PAIR, state[0])] += sign
+                deltas[(RATING, state[1])] += sign
+        for (facet, value), delta in sorted(deltas.items()):
+            if delta:
+                _add_count(db, facet, value, delta)
+
+    @staticmethod
+    def get_stored_counts(db: Session) -> Dict[FacetKey, int]:
+        """Counts of all public study sets, from the maintained aggregate table"""
+        return {
+            (row.facet, row.value): row.count
+            for row in db.query(StudySetFacet.facet, StudySetFacet.value, StudySetFacet.count)
+        }
+
+    @staticmethod
+    def count_query(query: Query) -> Dict[FacetKey, int]:
+        """Counts of the study sets a (filtered) StudySet query returns, with GROUP BY"""
+        query = query.order_by(None)
+        counts = {}
+        for language_from, language_to, count in query.with_entities(
+            StudySet.language_from, StudySet.language_to, func.count(StudySet.id)
+        ).group_by(StudySet.language_from, StudySet.language_to):
+            key = (LANGUAGE_PAIR, f"{language_from or ''}:{language_to or ''}")
+            counts[key] = counts.get(key, 0) + count
+        band = _rating_band_column()
+        for value, count in query.with_entities(band, func.count(StudySet.id)).group_by(band):
+            counts[(RATING, str(value))] = count
+        return counts
+
+    @staticmethod
+    def reconcile(db: Session) -> int:
+        """Recount every facet from study_sets and fix the stored counts; returns the number of rows fixed.
+
+        On PostgreSQL the facet table is locked while counting, so changes that
+        commit meanwhile are applied after the recount instead of being lost.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("LOCK TABLE study_set_facets IN EXCLUSIVE MODE"))
+        actual = FacetService.count_query(db.query(StudySet).filter(StudySet.is_public == True))
+        stored = FacetService.get_stored_counts(db)
+        table = StudySetFacet.__table__
+        fixed = 0
+        for facet, value in sorted(set(actual) | set(stored)):
+            count = actual.get((facet, value), 0)
+            if stored.get((facet, value)) == count:
+                continue
+            where = (table.c.facet == facet) & (table.c.value == value)
+            if not count:
+                db.execute(delete(table).where(where))
+            elif (facet, value) in stored:
+                db.execute(update(table).where(where).values(count=count))
+            else:
+                db.execute(insert(table).values(facet=facet, value=value, count=count))
+            fixed += 1
+        db.commit()
+        return fixed
+
+    @staticmethod
+    def format_counts(counts: Dict[FacetKey, int]) -> dict:
+        language_pairs = []
+        ratings = [0] * RATING_BANDS
+        for (facet, value), count in counts.items():
+            if count <= 0:
+                continue
+            if facet == LANGUAGE_PAIR:
+                language_from, _, language_to = value.partition(":")
+                language_pairs.append({
+                    "language_from": language_from or None, "language_to": language_to or None, "count": count
+                })
+            elif facet == RATING:
+                ratings[int(value)] = count
+        language_pairs.sort(key=lambda pair: (-pair["count"], pair["language_from"] or "", pair["language_to"] or ""))
+        return {
+            "total": sum(ratings),
+            "language_pairs": language_pairs,
+            "ratings": [
+                {"min_rating": band, "max_rating": band + 1, "count": count} for band, count in enumerate(ratings)
+            ],
+        }
@@ -0,0 +1,100 @@
+import re
+from typing import Dict, List, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services.study_set_service import TermService
+from app.utils.text import fold, bounded_edit_distance
+
+# A card's answer may list alternatives ("cat; kitty", "car / automobile"); any one is accepted
+_ALTERNATIVE_SEPARATORS = re.compile(r"[;/,]")
+_PARENTHESES = re.compile(r"\([^)]*\)")
+
+# (answer as shown, folded forms it is graded against)
+Reference = Tuple[str, Tuple[str, ...]]
+
+
+def _reference(text: str) -> Reference:
+    forms = {fold(text)}
+    # Parenthesized notes are optional: "to run (fast)" accepts "to run" as well
+    forms.add(fold(_PARENTHESES.sub(" ", text)))
+    parts = _ALTERNATIVE_SEPARATORS.split(text)
+    if len(parts) > 1:
+        forms.update(fold(_PARENTHESES.sub(" ", part)) for part in parts)
+    forms.discard("")
+    return text, tuple(sorted(forms, key=len))
+
+
+def allowed_typos(length: int) -> int:
+    """Edits tolerated in an answer of this length; short answers must be exact"""
+    return min(settings.grading_max_typos, length // settings.grading_chars_per_typo)
+
+
+# References per (study set, content version); a term edit bumps current_version, so stale entries are never hit
+references_cache = LRUCache("grading_references", settings.grading_cache_max_terms,
+                            weigh=lambda references: max(1, len(references)))
+references_flight = SingleFlight("grading_references")
+
+
+class GradingService:
+    @staticmethod
+    def get_references(db: Session, study_set_id: int, content_version: int) -> Dict[int, Dict[str, Reference]]:
+        """Folded answer forms of every term of the study set at content_version, built once and cached"""
+        key = (study_set_id, content_version)
+        references = references_cache.get(key)
+        if references is None:
+            references = references_flight.do(key, GradingService._build_references, db, study_set_id, key)
+        return references
+
+    @staticmethod
+    def _build_references(db: Session, study_set_id: int, key: tuple) -> Dict[int, Dict[str, Reference]]:
+        references = {
+            row.id: {"term": _reference(row.term), "definition": _reference(row.definition)}
+            for row in TermService.get_term_rows(db, study_set_id)
+        }
+        references_cache.put(key, references)
+        return references
+
+    @staticmethod
+    def grade(answer: str, reference: Reference) -> dict:
+        """Grade one answer: "exact" (ignoring case, accents and punctuation), "typo" or "incorrect" """
+        expected, forms = reference
+        folded = fold(answer)
+        best = None
+        if folded:
+            for form in forms:
+                limit = allowed_typos(len(form))
+                distance = bounded_edit_distance(folded, form, limit)
+                if distance <= limit and (best is None or distance < best):
+                    best = distance
+                    if distance == 0:
+                        break
+        if best is None:
+            result = "incorrect"
+        else:
+            result = "exact" if best == 0 else "typo"
+        return {"result": result, "correct": best is not None, "distance": best, "expected": expected}
+
+    @staticmethod
+    def grade_answers(db: Session, study_set_id: int, content_version: int,
+                      answers: List[dict], answer_with: str = "definition") -> dict:
+        """Grade a batch of {term_id, answer} against the study set's terms"""
+        references = GradingService.get_references(db, study_set_id, content_version)
+        unknown = sorted({item["term_id"] for item in answers if item["term_id"] not in references})
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Terms not in this study set: {', '.join(map(str, unknown))}"
+            )
+
+        results = []
+        correct = 0
+        for item in answers:
+            graded = GradingService.grade(item["answer"], references[item["term_id"]][answer_with])
+            graded["term_id"] = item["term_id"]
+            correct += graded["correct"]
+            results.append(graded)
+        return {"study_set_id": study_set_id, "answer_with": answer_with,
+                "total": len(results), "correct": correct, "results": results}
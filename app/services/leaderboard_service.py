@@ -0,0 +1,496 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, desc, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.study_class import StudyClass, ClassMember, ClassStudySet, MasteredTerm
+from app.models.study_set import Term
+from app.models.user import User
+from app.utils.serialization import user_info_to_dict
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_FIELDS = ("score", "terms_mastered")
+
+# board key -> {user_id: delta}
+BoardUpdates = Dict[str, Dict[int, int]]
+# (user_id, study_set_id) -> (correct answers, ids of the terms answered with no typo)
+PendingResults = Dict[Tuple[int, int], Tuple[int, Set[int]]]
+
+
+def board_key(class_id: int, by: str) -> str:
+    return f"{class_id}:{by}"
+
+
+class SortedScores:
+    """Member scores kept in descending order: O(log n) rank lookups and top-K slices.
+
+    The order is one sorted list of (-score, member) searched with bisect; a
+    score update moves a single entry.
+    """
+
+    def __init__(self, scores: Dict[int, int]):
+        self.scores = dict(scores)
+        self._order = sorted((-score, member) for member, score in self.scores.items())
+
+    def increment(self, member: int, delta: int) -> None:
+        old = self.scores.get(member)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, member))]
+        new = (old or 0) + delta
+        self.scores[member] = new
+        insort(self._order, (-new, member))
+
+    def top(self, limit: int) -> List[Tuple[int, int]]:
+        return [(member, -score) for score, member in self._order[:limit]]
+
+    def rank(self, member: int) -> Optional[Tuple[int, int]]:
+        """(0-based rank, score) of member, None if it is not on the board"""
+        score = self.scores.get(member)
+        if score is None:
+            return None
+        return bisect_left(self._order, (-score, member)), score
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+class MemoryLeaderboards:
+    """Leaderboards held in this worker's memory.
+
+    A board is loaded from class_members on first use and reloaded after ttl
+    seconds, which picks up totals flushed by other workers.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._boards: Dict[str, Tuple[float, SortedScores]] = {}  # key -> (loaded at, board)
+        self._lock = threading.Lock()
+
+    def clock(self) -> float:
+        """Time the load times of boards are compared with"""
+        return time.monotonic()
+
+    def is_loaded(self, key: str) -> bool:
+        entry = self._boards.get(key)
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def load(self, key: str, scores: Dict[int, int]) -> None:
+        board = SortedScores(scores)
+        with self._lock:
+            self._boards[key] = (time.monotonic(), board)
+
+    def drop(self, key: str) -> None:
+        with self._lock:
+            self._boards.pop(key, None)
+
+    def increment(self, updates: BoardUpdates, committed_after: float) -> None:
+        """Apply deltas committed after clock() read `committed_after`.
+
+        Only boards loaded before that hold totals without the deltas; a board
+        loaded since may already include them, so it is dropped and loads
+        current totals when read, like boards that are not loaded.
+        """
+        with self._lock:
+            for key, deltas in updates.items():
+                entry = self._boards.get(key)
+                if entry is None:
+                    continue
+                if entry[0] >= committed_after:
+                    del self._boards[key]
+                    continue
+                for member, delta in deltas.items():
+                    entry[1].increment(member, delta)
+
+    def top(self, key: str, limit: int) -> List[Tuple[int, int]]:
+        with self._lock:
+            return self._boards[key][1].top(limit)
+
+    def rank(self, key: str, member: int) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            return self._boards[key][1].rank(member)
+
+    def size(self, key: str) -> int:
+        with self._lock:
+            return len(self._boards[key][1])
+
+
+# KEYS[1] = board, KEYS[2] = its load time; ARGV = commit start, member, delta, member, delta, ...
+# Boards that are not loaded are left alone: they are loaded with current totals when read.
+# Boards loaded after the commit started may already include the deltas and are dropped.
+INCREMENT_IF_LOADED_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local loaded = tonumber(redis.call('GET', KEYS[2]))
+    if loaded == nil or loaded >= tonumber(ARGV[1]) then
+        redis.call('DEL', KEYS[1], KEYS[2])
+        return 0
+    end
+    for i = 2, #ARGV, 2 do
+        redis.call('ZINCRBY', KEYS[1], ARGV[i + 1], ARGV[i])
+    end
+end
+return 0
+"""
+
+
+class RedisLeaderboards:
+    """Leaderboards in Redis sorted sets, shared by all workers.
+
+    ZINCRBY updates and ZREVRANGE / ZREVRANK reads are O(log n). Boards expire
+    after ttl seconds and are then loaded again from class_members.
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = "leaderboard:"):
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._increment = client.register_script(INCREMENT_IF_LOADED_LUA)
+
+    def clock(self) -> float:
+        """Time the load times of boards are compared with (wall clock, shared by the workers)"""
+        return time.time()
+
+    def is_loaded(self, key: str) -> bool:
+        return bool(self.client.exists(self.prefix + key))
+
+    def load(self, key: str, scores: Dict[int, int]) -> None:
+        if not scores:
+            return
+        pipeline = self.client.pipeline()
+        pipeline.delete(self.prefix + key)
+        pipeline.zadd(self.prefix + key, scores)
+        pipeline.expire(self.prefix + key, self.ttl)
+        pipeline.set(self.prefix + key + ":loaded", repr(self.clock()), ex=self.ttl)
+        pipeline.execute()
+
+    def drop(self, key: str) -> None:
+        self.client.delete(self.prefix + key, self.prefix + key + ":loaded")
+
+    def increment(self, updates: BoardUpdates, committed_after: float) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for key, deltas in updates.items():
+            args = [repr(committed_after)] + [value for member, delta in deltas.items() for value in (member, delta)]
+            self._increment(keys=[self.prefix + key, self.prefix + key + ":loaded"], args=args, client=pipeline)
+        pipeline.execute()
+
+    def top(self, key: str, limit: int) -> List[Tuple[int, int]]:
+        return [
+            (int(member), int(score))
+            for member, score in self.client.zrevrange(self.prefix + key, 0, limit - 1, withscores=True)
+        ]
+
+    def rank(self, key: str, member: int) -> Optional[Tuple[int, int]]:
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zrevrank(self.prefix + key, member)
+        pipeline.zscore(self.prefix + key, member)
+        rank, score = pipeline.execute()
+        return None if rank is None else (rank, int(score))
+
+    def size(self, key: str) -> int:
+        return self.client.zcard(self.prefix + key)
+
+
+def create_leaderboards():
+    """Backend for leaderboard_backend.
+
+    "redis" always uses Redis (reads fall back to the database while it is
+    down); "auto" uses it when redis_url answers now, memory otherwise.
+    """
+    if settings.leaderboard_backend != "memory":
+        try:
+            import redis
+
+            client = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=0.5, socket_timeout=1.0)
+            if settings.leaderboard_backend != "redis":
+                client.ping()
+            return RedisLeaderboards(client, settings.leaderboard_ttl)
+        except Exception as exc:
+            if settings.leaderboard_backend == "redis":
+                raise
+            logger.warning("Redis unavailable for leaderboards (%r), keeping them in memory", exc)
+    return MemoryLeaderboards(settings.leaderboard_ttl)
+
+
+_leaderboards = None
+_leaderboards_lock = threading.Lock()
+
+
+def get_leaderboards():
+    """The leaderboard backend, chosen on first use"""
+    global _leaderboards
+    if _leaderboards is None:
+        with _leaderboards_lock:
+            if _leaderboards is None:
+                _leaderboards = create_leaderboards()
+    return _leaderboards
+
+
+class LeaderboardFlusher:
+    """Collects answer results from the answer path and writes them in batches.
+
+    record() only adds to per-user and study set totals in memory. Every
+    interval seconds flush() turns them into one insert of newly mastered
+    terms, one membership query, one batched UPDATE of class_members and one
+    round of leaderboard increments.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: PendingResults = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.failures = 0
+        self.consecutive_failures = 0  # Reset by the next successful flush; reported by /readyz
+        self.last_flush: Optional[float] = None
+
+    def record(self, user_id: int, study_set_id: int, score: int, mastered_term_ids: Iterable[int]) -> None:
+        """Add graded answers: `score` correct ones and the terms answered with no typo"""
+        mastered_term_ids = set(mastered_term_ids)
+        if not score and not mastered_term_ids:
+            return
+        with self._lock:
+            self._add(self._pending, (user_id, study_set_id), score, mastered_term_ids)
+
+    @staticmethod
+    def _add(pending: PendingResults, key: Tuple[int, int], score: int, mastered_term_ids: Set[int]) -> None:
+        totals = pending.setdefault(key, (0, set()))
+        totals[1].update(mastered_term_ids)
+        pending[key] = (totals[0] + score, totals[1])
+
+    def pending(self) -> int:
+        """Users with results waiting for the next flush"""
+        with self._lock:
+            return len({user_id for user_id, _ in self._pending})
+
+    def flush(self, db: Session) -> int:
+        """Write the pending totals; returns the number of class memberships updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            updated = LeaderboardService.apply_results(db, pending)
+        except Exception:
+            db.rollback()
+            self.failures += 1
+            self.consecutive_failures += 1
+            # Keep the totals for the next flush
+            with self._lock:
+                for key, (score, mastered_term_ids) in pending.items():
+                    self._add(self._pending, key, score, mastered_term_ids)
+            raise
+        self.flushes += 1
+        self.consecutive_failures = 0
+        self.last_flush = time.monotonic()
+        return updated
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory,), name="leaderboard-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, session_factory: Optional[Callable[[], Session]] = None) -> None:
+        """Stop the background thread and write what is still pending"""
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(self.interval + 5)
+        if session_factory is not None:
+            self._flush_with(session_factory)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, session_factory: Callable[[], Session]) -> None:
+        while not self._stop.wait(self.interval):
+            self._flush_with(session_factory)
+
+    def _flush_with(self, session_factory: Callable[[], Session]) -> None:
+        db = session_factory()
+        try:
+            self.flush(db)
+        except Exception:
+            logger.exception("Leaderboard flush failed; retrying with the next batch")
+        finally:
+            db.close()
+
+
+leaderboard_flusher = LeaderboardFlusher(settings.leaderboard_flush_interval)
+
+
+class LeaderboardService:
+    @staticmethod
+    def _insert_mastered(db: Session, user_id: int, study_set_id: int, term_ids: Set[int]) -> int:
+        """Store the user's mastered terms that are not stored yet; returns how many were new.
+
+        The rows are selected from terms, so terms deleted since they were
+        graded are skipped instead of failing the flush on the foreign key.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(MasteredTerm)
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(MasteredTerm)
+        else:
+            stmt = insert(MasteredTerm)
+        stmt = stmt.from_select(
+            ["user_id", "study_set_id", "term_id"],
+            select(literal(user_id), literal(study_set_id), Term.id).where(
+                Term.id.in_(sorted(term_ids)), Term.study_set_id == study_set_id
+            )
+        )
+        if dialect in ("postgresql", "sqlite"):
+            stmt = stmt.on_conflict_do_nothing()
+        return len(db.execute(stmt.returning(MasteredTerm.term_id)).all())
+
+    @staticmethod
+    def apply_results(db: Session, pending: PendingResults) -> int:
+        """Add pending (score, mastered terms) to the active classes the study set is assigned to.
+
+        Only the students of those classes are credited, and a term counts
+        toward terms_mastered the first time the user answers it exactly.
+        """
+        new_mastered = {
+            (user_id, study_set_id): LeaderboardService._insert_mastered(db, user_id, study_set_id, term_ids)
+            for (user_id, study_set_id), (_, term_ids) in pending.items() if term_ids
+        }
+
+        assignments = db.query(ClassMember.class_id, ClassMember.user_id, ClassStudySet.study_set_id).join(
+            StudyClass, StudyClass.id == ClassMember.class_id
+        ).join(
+            ClassStudySet, ClassStudySet.class_id == ClassMember.class_id
+        ).filter(
+            ClassMember.user_id.in_({user_id for user_id, _ in pending}),
+            ClassStudySet.study_set_id.in_({study_set_id for _, study_set_id in pending}),
+            ClassMember.role == "student",
+            StudyClass.is_active == True
+        ).all()
+
+        # (class_id, user_id) -> [score, terms_mastered] deltas
+        deltas: Dict[Tuple[int, int], List[int]] = {}
+        for class_id, user_id, study_set_id in assignments:
+            key = (user_id, study_set_id)
+            if key not in pending:
+                continue
+            score, mastered = pending[key][0], new_mastered.get(key, 0)
+            if score or mastered:
+                totals = deltas.setdefault((class_id, user_id), [0, 0])
+                totals[0] += score
+                totals[1] += mastered
+        if not deltas:
+            db.commit()  # Store the mastered terms even when no class is credited
+            return 0
+
+        members = ClassMember.__table__
+        db.execute(
+            update(members).where(
+                members.c.class_id == bindparam("member_class_id"), members.c.user_id == bindparam("member_user_id")
+            ).values(
+                score=members.c.score + bindparam("score_delta"),
+                terms_mastered=members.c.terms_mastered + bindparam("terms_mastered_delta")
+            ),
+            [
+                {"member_class_id": class_id, "member_user_id": user_id,
+                 "score_delta": score, "terms_mastered_delta": mastered}
+                for (class_id, user_id), (score, mastered) in deltas.items()
+            ]
+        )
+        try:
+            boards = get_leaderboards()
+        except Exception:
+            logger.warning("Leaderboard backend unavailable; boards catch up when reloaded", exc_info=True)
+            boards = None
+        committed_after = boards.clock() if boards is not None else None
+        db.commit()
+
+        # The database is the source of truth; boards that miss this update reload it later
+        updates: BoardUpdates = {}
+        for (class_id, user_id), values in deltas.items():
+            for index, by in enumerate(LEADERBOARD_FIELDS):
+                if values[index]:
+                    updates.setdefault(board_key(class_id, by), {})[user_id] = values[index]
+        if boards is None:
+            return len(deltas)
+        try:
+            boards.increment(updates, committed_after)
+        except Exception:
+            logger.warning("Leaderboard increment failed; boards catch up when reloaded", exc_info=True)
+        return len(deltas)
+
+    @staticmethod
+    def _load_board(db: Session, class_id: int, by: str) -> Dict[int, int]:
+        column = getattr(ClassMember, by)
+        return dict(db.query(ClassMember.user_id, column).filter(
+            ClassMember.class_id == class_id, ClassMember.role == "student"
+        ).all())
+
+    @staticmethod
+    def _board_from_database(db: Session, class_id: int, by: str, limit: int,
+                             user_id: int) -> Tuple[List[Tuple[int, int]], Optional[Tuple[int, int]], int]:
+        """Same answer as the backends, straight from class_members (used if the backend fails)"""
+        column = getattr(ClassMember, by)
+        students = db.query(ClassMember.user_id, column).filter(
+            ClassMember.class_id == class_id, ClassMember.role == "student"
+        )
+        top = [tuple(row) for row in students.order_by(desc(column), ClassMember.user_id).limit(limit)]
+        mine = students.filter(ClassMember.user_id == user_id).first()
+        rank = None
+        if mine is not None:
+            rank = (students.filter(
+                (column > mine[1]) | ((column == mine[1]) & (ClassMember.user_id < user_id))
+            ).count(), mine[1])
+        return top, rank, students.count()
+
+    @staticmethod
+    def get_leaderboard(db: Session, class_id: int, by: str, limit: int, user_id: int) -> dict:
+        """Top students of a class by score or terms_mastered, and the caller's own rank"""
+        key = board_key(class_id, by)
+        try:
+            boards = get_leaderboards()
+            if not boards.is_loaded(key):
+                boards.load(key, LeaderboardService._load_board(db, class_id, by))
+            if boards.is_loaded(key):
+                top, rank, members = boards.top(key, limit), boards.rank(key, user_id), boards.size(key)
+            else:
+                # Nothing to rank (Redis keeps no empty sorted sets)
+                top, rank, members = [], None, 0
+        except Exception:
+            logger.warning("Leaderboard backend failed, ranking from the database", exc_info=True)
+            top, rank, members = LeaderboardService._board_from_database(db, class_id, by, limit, user_id)
+
+        user_ids = {member for member, _ in top}
+        if rank is not None:
+            user_ids.add(user_id)
+        users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids))} if user_ids else {}
+
+        def entry(position: int, member: int, value: int) -> dict:
+            user = users.get(member)
+            return {"rank": position + 1, "value": value, "user": user_info_to_dict(user) if user else {"id": member}}
+
+        return {
+            "class_id": class_id,
+            "by": by,
+            "members": members,
+            "entries": [entry(position, member, value) for position, (member, value) in enumerate(top)],
+            "me": entry(rank[0], user_id, rank[1]) if rank is not None else None,
+        }
+
+    @staticmethod
+    def member_joined(class_id: int) -> None:
+        """Reload the class's boards on the next read so the new student appears"""
+        try:
+            boards = get_leaderboards()
+            for by in LEADERBOARD_FIELDS:
+                boards.drop(board_key(class_id, by))
+        except Exception:
+            logger.warning("Could not reset leaderboards of class %s", class_id, exc_info=True)
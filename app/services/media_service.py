@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.utils import media
+
+logger = logging.getLogger(__name__)
+
+# Accepted upload types and the extension they are stored with
+MEDIA_TYPES = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "audio/mpeg": ".mp3",
+    "audio/ogg": ".ogg",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/mp4": ".m4a",
+    "audio/webm": ".weba",
+}
+MEDIA_URL_PREFIX = "/media"
+THUMBNAIL_SUFFIX = "_thumb.jpg"
+TRANSCODED_SUFFIX = "_audio.mp3"
+# <sha256><.ext | variant suffix>; anything else is never served
+MEDIA_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}(?:_thumb\.jpg|_audio\.mp3|\.[a-z0-9]{2,4})$")
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def media_root() -> Path:
+    return Path(settings.upload_dir) / "media"
+
+
+def media_path(name: str) -> Path:
+    """Files are sharded by the first two hex digits of their hash"""
+    return media_root() / name[:2] / name
+
+
+def media_url(name: str) -> str:
+    return f"{MEDIA_URL_PREFIX}/{name[:2]}/{name}"
+
+
+class MediaProcessor:
+    """Bounded process pool for thumbnails and transcodes, off the request path.
+
+    At most max_pending jobs are queued or running; further jobs are skipped
+    (the original file is still served). The pool is started on first use.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def submit(self, fn: Callable, *args) -> bool:
+        """Queue fn(*args) in a worker process; False if processing is off or the queue is full"""
+        if self.workers <= 0:
+            return False
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.skipped += 1
+                return False
+            if self._executor is None:
+                # spawn: forking a process that runs threads (the threadpool) is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            self.pending += 1
+            self.submitted += 1
+            executor = self._executor
+        executor.submit(fn, *args).add_done_callback(self._done)
+        return True
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+        if not future.cancelled() and future.exception() is not None:
+            with self._lock:
+                self.failed += 1
+            logger.warning("Media processing failed: %r", future.exception())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self.pending, "submitted": self.submitted,
+                    "skipped": self.skipped, "failed": self.failed}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+media_processor = MediaProcessor(settings.media_workers, settings.media_max_pending_jobs)
+
+
+def _write_chunk(file, digest, data: bytes) -> None:
+    # hashlib releases the GIL on large buffers, so hashing runs in parallel too
+    digest.update(data)
+    file.write(data)
+
+
+def _publish(partial: str, path: Path) -> bool:
+    """Move a finished upload into place; False (and drop it) if the content is already stored"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        os.remove(partial)
+        return False
+    os.replace(partial, path)
+    return True
+
+
+def _discard(partial: str) -> None:
+    try:
+        os.remove(partial)
+    except FileNotFoundError:
+        pass
+
+
+class MediaService:
+    @staticmethod
+    def _too_large() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {settings.max_file_size} bytes"
+        )
+
+    @staticmethod
+    async def store_upload(chunks: AsyncIterator[bytes], content_type: str,
+                           content_length: Optional[int] = None) -> dict:
+        """Stream an upload to disk while hashing it and store it under its content hash.
+
+        The body is never held in memory as a whole: chunks are written to a
+        temporary file (in the threadpool, about WRITE_BUFFER_SIZE at a time)
+        and the SHA-256 is updated as they arrive. Identical content is stored
+        once, whoever uploads it.
+        """
+        content_type = content_type.split(";", 1)[0].strip().lower()
+        extension = MEDIA_TYPES.get(content_type)
+        if extension is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported media type; accepted: {', '.join(sorted(MEDIA_TYPES))}"
+            )
+        if content_length is not None and content_length > settings.max_file_size:
+            raise MediaService._too_large()
+
+        partial_dir = media_root() / "partial"
+        await run_in_threadpool(partial_dir.mkdir, parents=True, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=partial_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as file:
+                buffer = bytearray()
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > settings.max_file_size:
+                        raise MediaService._too_large()
+                    buffer += chunk
+                    if len(buffer) >= WRITE_BUFFER_SIZE:
+                        await run_in_threadpool(_write_chunk, file, digest, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await run_in_threadpool(_write_chunk, file, digest, bytes(buffer))
+            if size == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Empty upload"
+                )
+            content_hash = digest.hexdigest()
+            name = content_hash + extension
+            created = await run_in_threadpool(_publish, partial, media_path(name))
+        except BaseException:
+            await run_in_threadpool(_discard, partial)
+            raise
+
+        result = {
+            "url": media_url(name),
+            "hash": content_hash,
+            "content_type": content_type,
+            "size": size,
+            "deduplicated": not created,
+            "thumbnail_url": None,
+            "transcoded_url": None,
+        }
+        if content_type.startswith("image/") and media.thumbnails_available():
+            result["thumbnail_url"] = await MediaService._schedule(
+                name, content_hash + THUMBNAIL_SUFFIX, media.make_thumbnail, settings.media_thumbnail_size
+            )
+        elif content_type.startswith("audio/") and content_type != "audio/mpeg" and media.transcoding_available():
+            result["transcoded_url"] = await MediaService._schedule(
+                name, content_hash + TRANSCODED_SUFFIX, media.transcode_audio
+            )
+        return result
+
+    @staticmethod
+    async def _schedule(source_name: str, variant_name: str, fn: Callable, *args) -> Optional[str]:
+        """Make a variant of a stored file in the process pool unless it exists; returns its URL"""
+        variant = media_path(variant_name)
+        if await run_in_threadpool(variant.exists):
+            return media_url(variant_name)
+        if media_processor.submit(fn, str(media_path(source_name)), str(variant), *args):
+            return media_url(variant_name)
+        return None
+
+    @staticmethod
+    def get_media_file(name: str) -> Path:
+        """Path of a stored file or variant; 404 for unknown or malformed names"""
+        path = media_path(name) if MEDIA_NAME_PATTERN.match(name) else None
+        if path is None or not path.is_file():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Media not found"
+            )
+        return path
@@ -0,0 +1,229 @@
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import update, and_, bindparam
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.report import Report
+from app.models.study_set import StudySet, Term
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r"https?://|www\.", re.IGNORECASE)
+REPEATED_CHAR_PATTERN = re.compile(r"(.)\1{9,}")
+MAX_LINKS = 2
+FLAG_THRESHOLD = 0.5
+
+
+@dataclass
+class ModerationStats:
+    """Throughput counters for one moderation worker"""
+    batches: int = 0
+    processed: int = 0
+    flagged: int = 0
+    dismissed: int = 0
+    busy_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def reports_per_second(self) -> float:
+        """Overall throughput, including time spent polling an empty queue"""
+        elapsed = self.elapsed_seconds
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def busy_reports_per_second(self) -> float:
+        """Throughput while actually processing batches"""
+        return self.processed / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "batches": self.batches,
+            "processed": self.processed,
+            "flagged": self.flagged,
+            "dismissed": self.dismissed,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "busy_seconds": round(self.busy_seconds, 3),
+            "reports_per_second": round(self.reports_per_second, 1),
+            "busy_reports_per_second": round(self.busy_reports_per_second, 1),
+        }
+
+
+class ModerationService:
+    @staticmethod
+    def blocklist() -> List[str]:
+        """Words configured in settings that flag reported content"""
+        return [w.strip().lower() for w in settings.moderation_blocklist.split(",") if w.strip()]
+
+    @staticmethod
+    def screen_text(text: str, blocklist: List[str]) -> Tuple[float, List[str]]:
+        """Score reported text between 0 and 1 and explain which signals fired"""
+        score = 0.0
+        notes = []
+        lowered = text.lower()
+
+        links = len(URL_PATTERN.findall(text))
+        if links > MAX_LINKS:
+            score += 0.5
+            notes.append(f"{links} links")
+
+        if REPEATED_CHAR_PATTERN.search(text):
+            score += 0.3
+            notes.append("repeated characters")
+
+        hits = [word for word in blocklist if word in lowered]
+        if hits:
+            score += 0.6
+            notes.append("blocklisted: " + ", ".join(sorted(hits)))
+
+        return min(score, 1.0), notes
+
+    @staticmethod
+    def claim_batch(db: Session, batch_size: int) -> List[Tuple[int, str, int]]:
+        """Claim the oldest pending reports for this worker.
+
+        On PostgreSQL the rows stay locked with FOR UPDATE SKIP LOCKED until the
+        transaction commits, so concurrent workers claim disjoint batches. Other
+        dialects (SQLite in tests) have no row locks; there the conditional write
+        in process_batch keeps a report from being written twice.
+        """
+        query = db.query(
+            Report.id, Report.reported_entity_type, Report.reported_entity_id
+        ).filter(Report.status == "pending").order_by(Report.id).limit(batch_size)
+
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+
+        return [tuple(row) for row in query.all()]
+
+    @staticmethod
+    def _load_entity_texts(db: Session, claimed: List[Tuple[int, str, int]]) -> Dict[Tuple[str, int], str]:
+        """Load the reported content with one query per entity type"""
+        term_ids = {entity_id for _, entity_type, entity_id in claimed if entity_type == "term"}
+        study_set_ids = {entity_id for _, entity_type, entity_id in claimed if entity_type == "study_set"}
+        texts = {}
+
+        if term_ids:
+            rows = db.query(Term.id, Term.term, Term.definition).filter(Term.id.in_(term_ids)).all()
+            for term_id, term, definition in rows:
+                texts[("term", term_id)] = f"{term}\n{definition}"
+
+        if study_set_ids:
+            rows = db.query(StudySet.id, StudySet.title, StudySet.description).filter(
+                StudySet.id.in_(study_set_ids)
+            ).all()
+            for study_set_id, title, description in rows:
+                texts[("study_set", study_set_id)] = f"{title}\n{description or ''}"
+
+        return texts
+
+    @staticmethod
+    def process_batch(db: Session, batch_size: int, stats: Optional[ModerationStats] = None) -> int:
+        """Claim, screen and write back one batch. Returns the number of reports handled."""
+        started = time.perf_counter()
+        claimed = ModerationService.claim_batch(db, batch_size)
+        if not claimed:
+            db.rollback()
+            return 0
+
+        texts = ModerationService._load_entity_texts(db, claimed)
+        blocklist = ModerationService.blocklist()
+        now = datetime.now(timezone.utc)
+        # Written in three groups, so each count comes from the rows actually updated
+        dismissed_rows, flagged_rows, reviewed_rows = [], [], []
+
+        for report_id, entity_type, entity_id in claimed:
+            text = texts.get((entity_type, entity_id))
+            if text is None:
+                dismissed_rows.append({
+                    "b_id": report_id, "b_status": "dismissed", "b_score": 0.0,
+                    "b_notes": "Reported content no longer exists", "b_resolved_at": now
+                })
+                continue
+
+            score, notes = ModerationService.screen_text(text, blocklist)
+            (flagged_rows if score >= FLAG_THRESHOLD else reviewed_rows).append({
+                "b_id": report_id, "b_status": "reviewed", "b_score": score,
+                "b_notes": "; ".join(notes) or "No automated signals", "b_resolved_at": None
+            })
+
+        # One executemany per group; skip rows another worker already wrote
+        table = Report.__table__
+        stmt = update(table).where(
+            and_(table.c.id == bindparam("b_id"), table.c.status == "pending")
+        ).values(
+            status=bindparam("b_status"),
+            screening_score=bindparam("b_score"),
+            screening_notes=bindparam("b_notes"),
+            resolved_at=bindparam("b_resolved_at")
+        )
+        sane_rowcount = db.get_bind().dialect.supports_sane_multi_rowcount
+
+        def write(rows: List[dict]) -> int:
+            if not rows:
+                return 0
+            result = db.execute(stmt, rows)
+            # Without a reliable executemany rowcount (psycopg2) the claimed rows are
+            # still locked by claim_batch (FOR UPDATE SKIP LOCKED): no other worker wrote them
+            return result.rowcount if sane_rowcount else len(rows)
+
+        dismissed = write(dismissed_rows)
+        flagged = write(flagged_rows)
+        written = dismissed + flagged + write(reviewed_rows)
+        db.commit()
+
+        if stats is not None:
+            stats.batches += 1
+            stats.processed += written
+            stats.flagged += flagged
+            stats.dismissed += dismissed
+            stats.busy_seconds += time.perf_counter() - started
+        return written
+
+    @staticmethod
+    def run_worker(
+        session_factory: Callable[[], Session],
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        max_batches: Optional[int] = None,
+        stop_when_empty: bool = False,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> ModerationStats:
+        """Process the moderation queue until stopped and return throughput stats"""
+        batch_size = batch_size or settings.moderation_batch_size
+        poll_interval = settings.moderation_poll_interval if poll_interval is None else poll_interval
+        stats = ModerationStats()
+
+        while not (should_stop and should_stop()):
+            if max_batches is not None and stats.batches >= max_batches:
+                break
+
+            db = session_factory()
+            try:
+                handled = ModerationService.process_batch(db, batch_size, stats)
+            except Exception:
+                db.rollback()
+                logger.exception("Moderation batch failed")
+                handled = 0
+            finally:
+                db.close()
+
+            if handled:
+                logger.info(
+                    "Moderation batch of %d reports done (%.0f reports/s busy, %d total)",
+                    handled, stats.busy_reports_per_second, stats.processed
+                )
+                continue
+
+            if stop_when_empty:
+                break
+            time.sleep(poll_interval)
+
+        return stats
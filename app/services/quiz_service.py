@@ -0,0 +1,136 @@
+import threading
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services.study_set_service import TermService
+from app.utils.text import fold
+
+FEATURE_DIMENSIONS = 128  # Hashed character trigram buckets
+NGRAM = 3
+CANDIDATE_POOL = 10  # Most similar answers kept per card; distractors are drawn from them
+LENGTH_BUCKET_BONUS = 0.15  # Similarity bonus for answers of similar length
+ANSWER_SIDES = ("definition", "term")
+
+
+def _ngram_vectors(texts: List[str]) -> np.ndarray:
+    """L2-normalized hashed character trigram counts, one row per text"""
+    rows = []
+    columns = []
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        for start in range(len(padded) - NGRAM + 1):
+            rows.append(row)
+            columns.append(zlib.crc32(padded[start:start + NGRAM].encode()) % FEATURE_DIMENSIONS)
+    vectors = np.zeros((len(texts), FEATURE_DIMENSIONS), dtype=np.float32)
+    np.add.at(vectors, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), 1.0)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class _AnswerSide:
+    """Similarity features of one answer side (all definitions, or all terms) of a deck"""
+
+    def __init__(self, texts: List[str]):
+        normalized = [fold(text) for text in texts]
+        self.texts = texts
+        self.vectors = _ngram_vectors(normalized)
+        lengths = np.fromiter((len(text) for text in normalized), dtype=np.int64, count=len(normalized))
+        self.length_buckets = np.log2(lengths + 1).astype(np.int64)
+        # Cards with the same answer text share a key and are never offered as each other's distractor
+        self.answer_keys = np.unique(np.asarray(normalized, dtype=object), return_inverse=True)[1] \
+            if normalized else np.zeros(0, dtype=np.int64)
+        # Candidate pools are filled row by row, the first time a card is asked
+        self.pools = np.full((len(texts), CANDIDATE_POOL), -1, dtype=np.int64)
+        self.pooled = np.zeros(len(texts), dtype=bool)
+        self._lock = threading.Lock()
+
+    def candidate_pools(self, rows: np.ndarray) -> np.ndarray:
+        """Indexes of the most similar other answers for each row (-1 pads small decks)"""
+        missing = rows[~self.pooled[rows]]
+        if missing.size:
+            # One (len(missing), n) matrix product for every missing row at once
+            scores = self.vectors[missing] @ self.vectors.T
+            scores += LENGTH_BUCKET_BONUS * (self.length_buckets[missing][:, None] == self.length_buckets[None, :])
+            scores[self.answer_keys[missing][:, None] == self.answer_keys[None, :]] = -np.inf
+            width = min(CANDIDATE_POOL, scores.shape[1])
+            if width < scores.shape[1]:
+                top = np.argpartition(-scores, width - 1, axis=1)[:, :width]
+            else:
+                top = np.broadcast_to(np.arange(width), (missing.size, width)).copy()
+            top[np.take_along_axis(scores, top, axis=1) == -np.inf] = -1
+            with self._lock:
+                self.pools[missing, :width] = top
+                self.pooled[missing] = True
+        return self.pools[rows]
+
+
+class DeckFeatures:
+    """Test-generation features of one content version of a study set"""
+
+    def __init__(self, rows: list):
+        self.term_ids = [row.id for row in rows]
+        self.sides: Dict[str, _AnswerSide] = {
+            "definition": _AnswerSide([row.definition for row in rows]),
+            "term": _AnswerSide([row.term for row in rows]),
+        }
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+
+# Features per (study set, content version); a term edit bumps current_version, so stale entries are never hit
+deck_features_cache = LRUCache("quiz_features", settings.quiz_cache_max_terms, weigh=lambda deck: max(1, len(deck)))
+deck_features_flight = SingleFlight("quiz_features")
+
+
+class QuizService:
+    @staticmethod
+    def get_deck_features(db: Session, study_set_id: int, content_version: int) -> DeckFeatures:
+        """Features of the study set at content_version, built once and cached"""
+        key = (study_set_id, content_version)
+        features = deck_features_cache.get(key)
+        if features is None:
+            features = deck_features_flight.do(key, QuizService._build_deck_features, db, study_set_id, key)
+        return features
+
+    @staticmethod
+    def _build_deck_features(db: Session, study_set_id: int, key: tuple) -> DeckFeatures:
+        features = DeckFeatures(TermService.get_term_rows(db, study_set_id))
+        deck_features_cache.put(key, features)
+        return features
+
+    @staticmethod
+    def generate_test(db: Session, study_set_id: int, content_version: int, questions: int,
+                      distractors: int = 3, answer_with: str = "definition", seed: Optional[int] = None) -> dict:
+        """Build a multiple-choice test: sampled cards, each with distractors drawn from its similar answers"""
+        features = QuizService.get_deck_features(db, study_set_id, content_version)
+        prompts = features.sides["term" if answer_with == "definition" else "definition"]
+        answers = features.sides[answer_with]
+        rng = np.random.default_rng(seed)
+
+        count = min(questions, len(features))
+        rows = rng.choice(len(features), size=count, replace=False) if count else np.zeros(0, dtype=np.int64)
+        pools = answers.candidate_pools(rows)
+        # Random pick among each pool's valid candidates: shuffle keys, invalid ones sort last
+        keys = rng.random(pools.shape)
+        keys[pools < 0] = np.inf
+        picks = np.take_along_axis(pools, np.argsort(keys, axis=1)[:, :distractors], axis=1)
+        answer_slots = rng.integers(0, distractors + 1, size=count)
+
+        items = []
+        for row, picked, slot in zip(rows.tolist(), picks.tolist(), answer_slots.tolist()):
+            options = [answers.texts[index] for index in picked if index >= 0]
+            slot = min(slot, len(options))
+            options.insert(slot, answers.texts[row])
+            items.append({
+                "term_id": features.term_ids[row],
+                "prompt": prompts.texts[row],
+                "options": options,
+                "answer_index": slot,
+            })
+        return {"study_set_id": study_set_id, "answer_with": answer_with, "questions": items}
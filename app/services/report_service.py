@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from app.models.report import Report
+from app.models.study_set import StudySet, Term
+from app.schemas.report import ReportCreate
+from fastapi import HTTPException, status
+
+
+class ReportService:
+    @staticmethod
+    def create_report(db: Session, report_data: ReportCreate, user_id: int) -> Report:
+        """Queue a report about a term or study set for moderation"""
+        model = Term if report_data.reported_entity_type == "term" else StudySet
+        exists = db.query(model.id).filter(model.id == report_data.reported_entity_id).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Reported content not found"
+            )
+
+        # One open report per user and entity is enough
+        duplicate = db.query(Report.id).filter(
+            and_(
+                Report.reported_by_user_id == user_id,
+                Report.reported_entity_type == report_data.reported_entity_type,
+                Report.reported_entity_id == report_data.reported_entity_id,
+                Report.status == "pending"
+            )
+        ).first()
+        if duplicate:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already reported this content"
+            )
+
+        report = Report(
+            reported_by_user_id=user_id,
+            reported_entity_type=report_data.reported_entity_type,
+            reported_entity_id=report_data.reported_entity_id,
+            reason=report_data.reason,
+            status="pending"
+        )
+        db.add(report)
+        db.commit()
+        db.refresh(report)
+        return report
@@ -1,11 +1,21 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
-from typing import List, Optional, Tuple
-from app.models.study_set import StudySet, Term, StudySetVersion
+from sqlalchemy import and_, or_, func, desc, asc, insert, literal, select, text, tuple_, update
+from typing import Dict, List, Optional, Tuple
+from app.models.study_set import StudySet, Term, study_set_search_text
 from app.models.user import User
 from app.schemas.study_set import StudySetCreate, StudySetUpdate, StudySetSearchParams
+from app.services.version_service import VersionService, EMPTY_ROOT_HASH
+from app.services.suggest_service import SuggestService
+from app.services.facet_service import FacetService, FACET_FIELDS
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.utils.text import fold
+from app.utils.serialization import dump_json, study_set_to_dict, term_to_dict, user_info_to_dict
 from fastapi import HTTPException, status
 
+# Concurrent reads of the same study set detail share one load and render
+study_set_detail_flight = SingleFlight("study_set_detail")
+
 
 class StudySetService:
     @staticmethod
@@ -13,11 +23,15 @@ class StudySetService:
         """Create a new study set and update user's total_study_sets_created"""
         study_set = StudySet(
             **study_set_data.dict(),
-            user_id=user_id
+            user_id=user_id,
+            manifest_hash=EMPTY_ROOT_HASH
         )
         db.add(study_set)
+        db.flush()
+        FacetService.apply_change(db, None, FacetService.facet_state(study_set))
         db.commit()
         db.refresh(study_set)
+        SuggestService.study_set_changed(study_set)
         
         # Update user's total_study_sets_created
         user = db.query(User).filter(User.id == user_id).first()
@@ -30,63 +44,118 @@ class StudySetService:
     @staticmethod
     def get_study_set_by_id(db: Session, study_set_id: int, increment_views: bool = True) -> Optional[StudySet]:
         """Get study set by ID and optionally increment views count"""
-        study_set = db.query(StudySet).filter(StudySet.id == study_set_id).first()
+        if increment_views:
+            StudySetService.increment_views(db, study_set_id)
         
+        return db.query(StudySet).filter(StudySet.id == study_set_id).first()
+
+    @staticmethod
+    def increment_views(db: Session, study_set_id: int) -> None:
+        """Count a view with one atomic UPDATE"""
+        db.query(StudySet).filter(StudySet.id == study_set_id).update(
+            {
+                StudySet.views_count: StudySet.views_count + 1,
+                # A view is not an edit: keep updated_at (and the ETag) unchanged
+                StudySet.updated_at: StudySet.updated_at
+            },
+            synchronize_session=False
+        )
+        db.commit()
+
+    @staticmethod
+    def get_study_set_detail_json(db: Session, study_set_id: int, terms_limit: Optional[int] = None,
+                                  version: Optional[tuple] = None) -> Optional[bytes]:
+        """Get the rendered detail response of a study set, or None if it does not exist.
+
+        Identical concurrent calls are coalesced: one of them loads and renders the
+        set, the others wait for its bytes. version (e.g. current_version and
+        updated_at) is part of the key so a read never joins a load of older data.
+        """
+        key = (study_set_id, terms_limit, version)
+        return study_set_detail_flight.do(
+            key, StudySetService._render_study_set_detail, db, study_set_id, terms_limit
+        )
+
+    @staticmethod
+    def _render_study_set_detail(db: Session, study_set_id: int, terms_limit: Optional[int]) -> Optional[bytes]:
+        study_set = db.query(StudySet).filter(StudySet.id == study_set_id).first()
         if not study_set:
             return None
-            
-        if increment_views:
-            study_set.views_count += 1
-            db.commit()
-            db.refresh(study_set)
-            
-        return study_set
+        terms, next_cursor = TermService.get_term_page(db, study_set_id, limit=terms_limit)
+        user = db.query(User).filter(User.id == study_set.user_id).first()
+        data = study_set_to_dict(study_set)
+        data["user"] = user_info_to_dict(user) if user else {}
+        data["terms"] = [term_to_dict(term) for term in terms]
+        data["next_terms_cursor"], data["next_terms_after_id"] = next_cursor or (None, None)
+        return dump_json(data)
 
     @staticmethod
-    def update_study_set(db: Session, study_set_id: int, study_set_data: StudySetUpdate, user_id: int) -> StudySet:
-        """Update study set and create version history"""
-        study_set = db.query(StudySet).filter(
-            and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+    def get_study_set_meta(db: Session, study_set_id: int):
+        """Single-row lookup of the columns needed for access checks and ETags"""
+        return db.query(
+            StudySet.id, StudySet.user_id, StudySet.is_public,
+            StudySet.updated_at, StudySet.current_version
+        ).filter(StudySet.id == study_set_id).first()
+
+    @staticmethod
+    def get_study_sets_by_ids(db: Session, study_set_ids: List[int]) -> List[StudySet]:
+        """Load several study sets with one query, without counting views"""
+        if not study_set_ids:
+            return []
+        return db.query(StudySet).filter(StudySet.id.in_(study_set_ids)).all()
+
+    @staticmethod
+    def update_study_set(db: Session, study_set_id: int, study_set_data: StudySetUpdate, user_id: int,
+                         expected_version: Optional[int] = None) -> StudySet:
+        """Update study set and create version history.
+
+        With expected_version the update only applies if nobody changed the set since.
+        """
+        values = study_set_data.dict(exclude_unset=True)
+        # Facet counts follow visibility, language and rating changes. The row stays locked
+        # until commit, so concurrent changes apply their deltas one after the other
+        facets_before = None
+        if FACET_FIELDS & values.keys():
+            facets_before = db.query(
+                StudySet.is_public, StudySet.language_from, StudySet.language_to, StudySet.average_rating
+            ).filter(StudySet.id == study_set_id, StudySet.user_id == user_id).with_for_update().first()
+
+        # One statement bumps current_version, updates the set and versions its previous state
+        study_set = VersionService.record_version(
+            db, study_set_id, user_id, "Updated study set",
+            values=values, owner_id=user_id,
+            expected_version=expected_version
+        )
         
+        if not study_set and expected_version is not None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Study set was modified by another request"
+            )
         if not study_set:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Study set not found or you don't have permission to edit it"
             )
         
-        # Create version history before updating
-        current_version = db.query(StudySetVersion).filter(
-            StudySetVersion.study_set_id == study_set_id
-        ).order_by(desc(StudySetVersion.version_number)).first()
-        
-        version_number = (current_version.version_number + 1) if current_version else 1
-        
-        version = StudySetVersion(
-            study_set_id=study_set_id,
-            version_number=version_number,
-            title=study_set.title,
-            description=study_set.description,
-            user_id=user_id,
-            changes_summary="Updated study set"
-        )
-        db.add(version)
-        
-        # Update study set
-        update_data = study_set_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(study_set, field, value)
-        
+        if facets_before is not None:
+            FacetService.apply_change(
+                db, FacetService.facet_state(facets_before), FacetService.facet_state(study_set)
+            )
+
+        # RETURNING already loaded the row; keep it instead of re-reading it after commit
+        db.expunge(study_set)
         db.commit()
-        db.refresh(study_set)
+        SuggestService.study_set_changed(study_set)
         return study_set
 
     @staticmethod
     def delete_study_set(db: Session, study_set_id: int, user_id: int) -> bool:
         """Delete study set (soft delete by setting is_public to False)"""
+        # Locked so the facet counts are moved from the state this delete replaces
         study_set = db.query(StudySet).filter(
             and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if not study_set:
             raise HTTPException(
@@ -95,8 +164,10 @@ class StudySetService:
             )
         
         # Soft delete by setting is_public to False
+        FacetService.apply_change(db, FacetService.facet_state(study_set), None)
         study_set.is_public = False
         db.commit()
+        SuggestService.study_set_changed(study_set)
         
         # Update user's total_study_sets_created
         user = db.query(User).filter(User.id == user_id).first()
@@ -106,13 +177,103 @@ class StudySetService:
         
         return True
 
+    @staticmethod
+    def clone_study_set(db: Session, study_set_id: int, user_id: int, title: Optional[str] = None,
+                        is_public: Optional[bool] = None) -> StudySet:
+        """Copy a study set and all its terms for user_id in one transaction.
+
+        Both copies are INSERT ... SELECT statements, so terms never leave the
+        database. Positions and media URLs are kept; view, favorite and rating
+        counters start at zero. The copy has no versions yet and its manifest
+        is stored on its first term edit.
+        """
+        source = StudySetService.get_study_set_meta(db, study_set_id)
+        if not source:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Study set not found"
+            )
+        if not source.is_public and source.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+
+        sets = StudySet.__table__
+        terms = Term.__table__
+        search_text = sets.c.search_text
+        if title is not None:
+            description = db.execute(select(sets.c.description).where(sets.c.id == study_set_id)).scalar()
+            search_text = literal(study_set_search_text(title, description))
+        new_id = db.execute(
+            insert(sets).from_select(
+                ["title", "description", "search_text", "user_id", "is_public", "language_from", "language_to",
+                 "terms_count", "views_count", "favorites_count", "average_rating", "current_version"],
+                select(
+                    literal(title) if title is not None else sets.c.title,
+                    sets.c.description,
+                    search_text,
+                    literal(user_id),
+                    literal(is_public) if is_public is not None else sets.c.is_public,
+                    sets.c.language_from,
+                    sets.c.language_to,
+                    literal(0), literal(0), literal(0), literal(0.0), literal(0)
+                ).where(sets.c.id == study_set_id)
+            ).returning(sets.c.id)
+        ).scalar_one()
+
+        # Ordered so the new ids follow the display order
+        copied = db.execute(insert(terms).from_select(
+            ["study_set_id", "term", "definition", "image_url", "audio_url", "position"],
+            select(
+                literal(new_id), terms.c.term, terms.c.definition,
+                terms.c.image_url, terms.c.audio_url, terms.c.position
+            ).where(terms.c.study_set_id == study_set_id).order_by(terms.c.position, terms.c.id)
+        )).rowcount
+
+        db.execute(update(sets).where(sets.c.id == new_id).values(terms_count=copied))
+        db.execute(update(User.__table__).where(User.__table__.c.id == user_id).values(
+            total_study_sets_created=func.coalesce(User.__table__.c.total_study_sets_created, 0) + 1
+        ))
+        clone = db.get(StudySet, new_id)
+        FacetService.apply_change(db, None, FacetService.facet_state(clone))
+        db.commit()
+        SuggestService.study_set_changed(clone)
+        return clone
+
     @staticmethod
     def search_study_sets(db: Session, params: StudySetSearchParams) -> Tuple[List[StudySet], int]:
         """Search and filter study sets with pagination"""
+        query, similarity = StudySetService._filtered_query(db, params)
+        
+        # Apply sorting (best fuzzy matches first)
+        if similarity is not None:
+            query = query.order_by(desc(similarity))
+        sort_column = getattr(StudySet, params.sort_by)
+        if params.sort_order == "desc":
+            query = query.order_by(desc(sort_column))
+        else:
+            query = query.order_by(asc(sort_column))
+        
+        # Get total count
+        total = query.count()
+        
+        # Apply pagination
+        offset = (params.page - 1) * params.size
+        study_sets = query.offset(offset).limit(params.size).all()
+        
+        return study_sets, total
+
+    @staticmethod
+    def _filtered_query(db: Session, params: StudySetSearchParams):
+        """Public study sets matching the search filters, and the fuzzy similarity to rank by (or None)"""
         query = db.query(StudySet).filter(StudySet.is_public == True)
         
         # Apply search filter
-        if params.search:
+        similarity = None
+        if params.search and params.search_mode == "fuzzy":
+            query, similarity = StudySetService._filter_fuzzy(db, query, params.search)
+        elif params.search:
             search_term = f"%{params.search}%"
             query = query.filter(
                 or_(
@@ -135,21 +296,41 @@ class StudySetService:
         if params.min_rating is not None:
             query = query.filter(StudySet.average_rating >= params.min_rating)
         
-        # Apply sorting
-        sort_column = getattr(StudySet, params.sort_by)
-        if params.sort_order == "desc":
-            query = query.order_by(desc(sort_column))
+        return query, similarity
+
+    @staticmethod
+    def get_facets(db: Session, params: StudySetSearchParams) -> dict:
+        """Public study set counts per language pair and rating band.
+
+        Without filters the counts come from the maintained study_set_facets
+        table; with search filters they are counted over the matching sets.
+        """
+        if params.search or params.language_from or params.language_to or params.user_id \
+                or params.min_rating is not None:
+            counts = FacetService.count_query(StudySetService._filtered_query(db, params)[0])
         else:
-            query = query.order_by(asc(sort_column))
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        offset = (params.page - 1) * params.size
-        study_sets = query.offset(offset).limit(params.size).all()
-        
-        return study_sets, total
+            counts = FacetService.get_stored_counts(db)
+        return FacetService.format_counts(counts)
+
+    @staticmethod
+    def _filter_fuzzy(db: Session, query, search: str):
+        """Keep sets whose folded title/description contains words similar to search.
+
+        On PostgreSQL the `<%` (word similarity) operator uses the pg_trgm GIN index
+        on search_text; SQLite calls the word_similarity() function registered on
+        its connections. Returns the filtered query and the similarity to rank by.
+        """
+        folded = fold(search)
+        if not folded:
+            return query, None
+        similarity = func.word_similarity(folded, StudySet.search_text)
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                {"threshold": str(settings.search_similarity_threshold)}
+            )
+            return query.filter(literal(folded).op("<%")(StudySet.search_text)), similarity
+        return query.filter(similarity >= settings.search_similarity_threshold), similarity
 
     @staticmethod
     def get_user_study_sets(db: Session, user_id: int, include_private: bool = True) -> List[StudySet]:
@@ -166,10 +347,11 @@ class TermService:
     @staticmethod
     def create_term(db: Session, study_set_id: int, term_data: dict, user_id: int) -> Term:
         """Create a new term and update study set's terms_count"""
-        # Verify study set exists and user has permission
+        # Verify study set exists and user has permission. Term edits lock the
+        # row so each one builds its manifest on the previous edit's
         study_set = db.query(StudySet).filter(
             and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if not study_set:
             raise HTTPException(
@@ -177,6 +359,8 @@ class TermService:
                 detail="Study set not found or you don't have permission to add terms"
             )
         
+        snapshot = VersionService.current_snapshot(db, study_set)
+        
         # Get the next position
         max_position = db.query(func.max(Term.position)).filter(
             Term.study_set_id == study_set_id
@@ -192,6 +376,8 @@ class TermService:
         # Update study set's terms_count
         study_set.terms_count += 1
         
+        db.flush()
+        VersionService.record_term_change(db, study_set_id, user_id, "Added term", snapshot)
         db.commit()
         db.refresh(term)
         return term
@@ -203,13 +389,85 @@ class TermService:
             Term.study_set_id == study_set_id
         ).order_by(Term.position).all()
 
+    @staticmethod
+    def get_term_rows(
+        db: Session, study_set_id: int, after_position: Optional[int] = None, limit: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> list:
+        """Get the response columns of terms, ordered by (position, id), without loading ORM objects.
+
+        after_position/after_id/limit select a range served by the (study_set_id, position) index.
+        Positions are not unique (partial reorders, default 0), so a page continues after the
+        (position, id) pair of its last term; after_position alone skips the whole position.
+        """
+        query = db.query(
+            Term.id, Term.term, Term.definition, Term.image_url, Term.audio_url,
+            Term.study_set_id, Term.position, Term.created_at, Term.updated_at
+        ).filter(Term.study_set_id == study_set_id)
+        if after_position is not None and after_id is not None:
+            query = query.filter(tuple_(Term.position, Term.id) > tuple_(after_position, after_id))
+        elif after_position is not None:
+            query = query.filter(Term.position > after_position)
+        query = query.order_by(Term.position, Term.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def get_term_page(
+        db: Session, study_set_id: int, after_position: Optional[int] = None, limit: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> Tuple[list, Optional[Tuple[int, int]]]:
+        """Get a range of terms and the (after_position, after_id) that continues it (None on the last page)"""
+        if limit is None:
+            return TermService.get_term_rows(db, study_set_id, after_position, after_id=after_id), None
+        rows = TermService.get_term_rows(db, study_set_id, after_position, limit + 1, after_id)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1].position, rows[-1].id)
+
+    @staticmethod
+    def get_first_terms(db: Session, study_set_ids: List[int], limit: int) -> Dict[int, Tuple[list, Optional[int]]]:
+        """Get the first terms of several study sets with one query.
+
+        Returns {study_set_id: (rows, (next_after_position, next_after_id))} like get_term_page.
+        """
+        pages = {study_set_id: ([], None) for study_set_id in study_set_ids}
+        if not study_set_ids or limit < 1:
+            return pages
+
+        rank = func.row_number().over(
+            partition_by=Term.study_set_id, order_by=(Term.position, Term.id)
+        ).label("rank")
+        ranked = db.query(
+            Term.id, Term.term, Term.definition, Term.image_url, Term.audio_url,
+            Term.study_set_id, Term.position, Term.created_at, Term.updated_at, rank
+        ).filter(Term.study_set_id.in_(study_set_ids)).subquery()
+
+        # One extra row per set tells whether the page continues
+        rows = db.query(ranked).filter(ranked.c.rank <= limit + 1).order_by(
+            ranked.c.study_set_id, ranked.c.rank
+        ).all()
+
+        grouped = {study_set_id: [] for study_set_id in study_set_ids}
+        for row in rows:
+            grouped[row.study_set_id].append(row)
+        for study_set_id, set_rows in grouped.items():
+            if len(set_rows) > limit:
+                set_rows = set_rows[:limit]
+                pages[study_set_id] = (set_rows, (set_rows[-1].position, set_rows[-1].id))
+            else:
+                pages[study_set_id] = (set_rows, None)
+        return pages
+
     @staticmethod
     def update_term(db: Session, study_set_id: int, term_id: int, term_data: dict, user_id: int) -> Term:
         """Update a term"""
         # Verify study set exists and user has permission
         study_set = db.query(StudySet).filter(
             and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if not study_set:
             raise HTTPException(
@@ -227,11 +485,15 @@ class TermService:
                 detail="Term not found"
             )
         
+        snapshot = VersionService.current_snapshot(db, study_set)
+        
         # Update term
         for field, value in term_data.items():
             if value is not None:
                 setattr(term, field, value)
         
+        db.flush()
+        VersionService.record_term_change(db, study_set_id, user_id, "Updated term", snapshot, [term.id])
         db.commit()
         db.refresh(term)
         return term
@@ -242,7 +504,7 @@ class TermService:
         # Verify study set exists and user has permission
         study_set = db.query(StudySet).filter(
             and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if not study_set:
             raise HTTPException(
@@ -260,11 +522,15 @@ class TermService:
                 detail="Term not found"
             )
         
+        snapshot = VersionService.current_snapshot(db, study_set)
+        
         # Update study set's terms_count
         if study_set.terms_count > 0:
             study_set.terms_count -= 1
         
         db.delete(term)
+        db.flush()
+        VersionService.record_term_change(db, study_set_id, user_id, "Deleted term", snapshot)
         db.commit()
         return True
 
@@ -274,7 +540,7 @@ class TermService:
         # Verify study set exists and user has permission
         study_set = db.query(StudySet).filter(
             and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if not study_set:
             raise HTTPException(
@@ -282,6 +548,8 @@ class TermService:
                 detail="Study set not found or you don't have permission to add terms"
             )
         
+        snapshot = VersionService.current_snapshot(db, study_set)
+        
         # Get the next position
         max_position = db.query(func.max(Term.position)).filter(
             Term.study_set_id == study_set_id
@@ -300,6 +568,8 @@ class TermService:
         # Update study set's terms_count
         study_set.terms_count += len(terms)
         
+        db.flush()
+        VersionService.record_term_change(db, study_set_id, user_id, f"Added {len(terms)} terms", snapshot)
         db.commit()
         
         # Refresh all terms to get their IDs
@@ -314,7 +584,7 @@ class TermService:
         # Verify study set exists and user has permission
         study_set = db.query(StudySet).filter(
             and_(StudySet.id == study_set_id, StudySet.user_id == user_id)
-        ).first()
+        ).with_for_update().first()
         
         if not study_set:
             raise HTTPException(
@@ -333,11 +603,15 @@ class TermService:
                 detail="Some terms do not belong to this study set"
             )
         
+        snapshot = VersionService.current_snapshot(db, study_set)
+        
         # Update positions
         for i, term_id in enumerate(term_ids):
             term = next(t for t in terms if t.id == term_id)
             term.position = i + 1
         
+        db.flush()
+        VersionService.record_term_change(db, study_set_id, user_id, "Reordered terms", snapshot)
         db.commit()
         
         # Return terms in new order
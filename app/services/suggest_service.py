@@ -0,0 +1,207 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.study_set import StudySet
+from app.utils.text import fold
+
+MAX_KEYS_PER_TITLE = 8  # A title is found by the start of any of its first words
+
+
+class TitleIndex:
+    """In-memory prefix index over public study set titles, ranked by views.
+
+    Every word start of a folded title is a key in one sorted list, so a
+    prefix is a bisect range. The first lookup of a prefix ranks its range;
+    the best max_per_prefix ids are then kept for the max_prefixes most
+    recently used prefixes and updated in place on upsert/remove. At most
+    max_titles titles are held.
+    """
+
+    def __init__(self, max_per_prefix: int, max_prefixes: int, max_titles: int):
+        self.max_per_prefix = max_per_prefix
+        self.max_prefixes = max_prefixes
+        self.max_titles = max_titles
+        self.loaded_at: Optional[float] = None
+        self._keys: List[Tuple[str, int]] = []  # (folded title from a word start, id), sorted
+        self._entries: Dict[int, Tuple[str, Tuple[str, ...], int]] = {}  # id -> (title, keys, views)
+        self._top: "OrderedDict[str, List[int]]" = OrderedDict()  # prefix -> best ids, best first
+        self._journal: Optional[list] = None  # Changes made while a rebuild is loading
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _title_keys(title: str) -> Tuple[str, ...]:
+        folded = fold(title)
+        keys = []
+        start = 0
+        while start < len(folded) and len(keys) < MAX_KEYS_PER_TITLE:
+            keys.append(folded[start:])
+            space = folded.find(" ", start)
+            if space < 0:
+                break
+            start = space + 1
+        return tuple(dict.fromkeys(keys))
+
+    def _rank(self, study_set_id: int) -> tuple:
+        return -self._entries[study_set_id][2], study_set_id
+
+    def _cached_prefixes(self, keys: Tuple[str, ...]) -> set:
+        return {key[:length] for key in keys for length in range(1, len(key) + 1) if key[:length] in self._top}
+
+    def _scan(self, prefix: str) -> List[int]:
+        low = bisect_left(self._keys, (prefix,))
+        high = bisect_left(self._keys, (prefix + "\U0010ffff",), low)
+        ids = {study_set_id for _, study_set_id in self._keys[low:high]}
+        return heapq.nsmallest(self.max_per_prefix, ids, key=self._rank)
+
+    def _remove(self, study_set_id: int) -> None:
+        entry = self._entries.get(study_set_id)
+        if entry is None:
+            return
+        for key in entry[1]:
+            del self._keys[bisect_left(self._keys, (key, study_set_id))]
+        for prefix in self._cached_prefixes(entry[1]):
+            top = self._top[prefix]
+            if study_set_id in top:
+                if len(top) < self.max_per_prefix:
+                    top.remove(study_set_id)
+                else:
+                    # The next best id is unknown; recomputed on the next lookup
+                    del self._top[prefix]
+        del self._entries[study_set_id]
+
+    def _upsert(self, study_set_id: int, title: str, views: int) -> None:
+        self._remove(study_set_id)
+        if len(self._entries) >= self.max_titles:
+            return
+        keys = self._title_keys(title)
+        if not keys:
+            return
+        self._entries[study_set_id] = (title, keys, views)
+        for key in keys:
+            insort(self._keys, (key, study_set_id))
+        rank = self._rank(study_set_id)
+        for prefix in self._cached_prefixes(keys):
+            top = self._top[prefix]
+            if len(top) < self.max_per_prefix or rank < self._rank(top[-1]):
+                insort(top, study_set_id, key=self._rank)
+                del top[self.max_per_prefix:]
+
+    def upsert(self, study_set_id: int, title: str, views: int = 0) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((study_set_id, title, views))
+            if self.loaded_at is not None:
+                self._upsert(study_set_id, title, views)
+
+    def remove(self, study_set_id: int) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((study_set_id, None, 0))
+            if self.loaded_at is not None:
+                self._remove(study_set_id)
+
+    def rebuild(self, load: Callable[[], Iterable[tuple]]) -> None:
+        """Replace the contents with load()'s (id, title, views) rows, best first.
+
+        The index keeps answering from the old contents while rows load;
+        changes recorded meanwhile are replayed on the new contents.
+        """
+        with self._lock:
+            self._journal = []
+        try:
+            rows = list(load())
+            entries = {}
+            keys = []
+            for study_set_id, title, views in rows[:self.max_titles]:
+                title_keys = self._title_keys(title)
+                if title_keys:
+                    entries[study_set_id] = (title, title_keys, views or 0)
+                    keys.extend((key, study_set_id) for key in title_keys)
+            keys.sort()
+            with self._lock:
+                self._entries, self._keys, self._top = entries, keys, OrderedDict()
+                for study_set_id, title, views in self._journal:
+                    if title is None:
+                        self._remove(study_set_id)
+                    else:
+                        self._upsert(study_set_id, title, views)
+                self.loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        prefix = fold(query)
+        if not prefix:
+            return []
+        with self._lock:
+            ids = self._top.get(prefix)
+            if ids is None:
+                ids = self._top[prefix] = self._scan(prefix)
+                if len(self._top) > self.max_prefixes:
+                    self._top.popitem(last=False)
+            else:
+                self._top.move_to_end(prefix)
+            return [
+                {"id": study_set_id, "title": self._entries[study_set_id][0],
+                 "views_count": self._entries[study_set_id][2]}
+                for study_set_id in ids[:limit]
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+title_index = TitleIndex(settings.suggest_max_per_prefix, settings.suggest_cached_prefixes,
+                         settings.suggest_max_titles)
+_rebuild_lock = threading.Lock()
+
+
+class SuggestService:
+    @staticmethod
+    def suggest(db: Session, query: str, limit: int) -> List[dict]:
+        """Public study set titles starting with query (at any word), most viewed first"""
+        SuggestService._ensure_fresh(db)
+        return title_index.search(query, limit)
+
+    @staticmethod
+    def _ensure_fresh(db: Session) -> None:
+        """Load the index on first use and reload it every suggest_refresh_seconds.
+
+        Edits are applied as they happen; the reload picks up view counts and
+        edits made by other worker processes. Only one request reloads; the
+        others keep answering from the current contents.
+        """
+        loaded_at = title_index.loaded_at
+        if loaded_at is None:
+            with _rebuild_lock:
+                if title_index.loaded_at is None:
+                    SuggestService._rebuild(db)
+        elif time.monotonic() - loaded_at > settings.suggest_refresh_seconds and _rebuild_lock.acquire(blocking=False):
+            try:
+                SuggestService._rebuild(db)
+            finally:
+                _rebuild_lock.release()
+
+    @staticmethod
+    def _rebuild(db: Session) -> None:
+        title_index.rebuild(lambda: db.execute(
+            select(StudySet.id, StudySet.title, StudySet.views_count)
+            .where(StudySet.is_public == True)
+            .order_by(StudySet.views_count.desc(), StudySet.id)
+            .limit(settings.suggest_max_titles)
+        ).all())
+
+    @staticmethod
+    def study_set_changed(study_set: StudySet) -> None:
+        """Apply a committed create, update or delete of study_set to the index"""
+        if study_set.is_public:
+            title_index.upsert(study_set.id, study_set.title, study_set.views_count or 0)
+        else:
+            title_index.remove(study_set.id)
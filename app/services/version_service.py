@@ -0,0 +1,483 @@
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import desc, insert, select, update, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.study_set import StudySet, Term, StudySetVersion, TermBlob, VersionNode, study_set_search_text
+from app.services.suggest_service import SuggestService
+from fastapi import HTTPException, status
+
+# Nodes close after an entry whose hash ends a chunk (1 in CHUNK_FANOUT on average),
+# so an edit only rewrites the chunks around it, whatever its position in the deck
+CHUNK_FANOUT = 16
+MAX_CHUNK_SIZE = 64
+IN_BATCH_SIZE = 500
+
+
+def _sha256(payload) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def _term_hash(term: str, definition: str, image_url: Optional[str], audio_url: Optional[str]) -> str:
+    return _sha256([term, definition, image_url, audio_url])
+
+
+def _is_boundary(entry_hash: str) -> bool:
+    return int(entry_hash[:8], 16) % CHUNK_FANOUT == 0
+
+
+def _chunk(entries: list, key_of) -> List[list]:
+    chunks, current = [], []
+    for entry in entries:
+        current.append(entry)
+        if _is_boundary(key_of(entry)) or len(current) >= MAX_CHUNK_SIZE:
+            chunks.append(current)
+            current = []
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+
+EMPTY_ROOT_HASH = _sha256([0, []])
+
+
+def _batched(values: Iterable) -> Iterable[list]:
+    values = list(values)
+    for i in range(0, len(values), IN_BATCH_SIZE):
+        yield values[i:i + IN_BATCH_SIZE]
+
+
+def _insert_ignoring_duplicates(db: Session, model, rows: List[dict]) -> None:
+    """Insert content-addressed rows; a concurrent writer may store the same hash first"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(model).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(model).on_conflict_do_nothing()
+    else:
+        stmt = insert(model)
+    db.execute(stmt, rows)
+
+
+class VersionService:
+    @staticmethod
+    def build_tree(leaf_entries: List[list]) -> Tuple[str, Dict[str, Tuple[int, list]]]:
+        """Build the manifest tree for [term_id, blob_hash] entries.
+
+        Returns the root hash and every node keyed by its hash.
+        """
+        nodes = {}
+        level = 0
+        chunks = _chunk(leaf_entries, lambda entry: entry[1])
+        while True:
+            hashes = []
+            for entries in chunks:
+                node_hash = _sha256([level, entries])
+                nodes[node_hash] = (level, entries)
+                hashes.append(node_hash)
+            if len(hashes) == 1:
+                return hashes[0], nodes
+            level += 1
+            chunks = _chunk(hashes, lambda entry: entry)
+
+    @staticmethod
+    def _existing(db: Session, column, hashes: Iterable[str]) -> Set[str]:
+        found = set()
+        for batch in _batched(hashes):
+            found.update(row[0] for row in db.query(column).filter(column.in_(batch)).all())
+        return found
+
+    @staticmethod
+    def _store_tree(db: Session, leaf_entries: List[list], blobs: Dict[str, tuple],
+                    stored: Set[str] = frozenset()) -> str:
+        """Store the manifest tree of leaf_entries and return its root hash.
+
+        `blobs` holds (term, definition, image_url, audio_url) by hash for the
+        blobs that may not be stored yet; `stored` are node hashes known to be
+        stored, which are not looked up again.
+        """
+        root_hash, nodes = VersionService.build_tree(leaf_entries)
+        nodes.pop(EMPTY_ROOT_HASH, None)
+        candidates = [h for h in nodes if h not in stored]
+        stored_nodes = VersionService._existing(db, VersionNode.hash, candidates)
+        new_nodes = {h: nodes[h] for h in candidates if h not in stored_nodes}
+
+        if new_nodes:
+            # Unchanged chunks are already stored together with their blobs
+            referenced = {
+                blob_hash
+                for level, entries in new_nodes.values() if level == 0
+                for _, blob_hash in entries
+            }
+            stored_blobs = VersionService._existing(db, TermBlob.hash, referenced & blobs.keys())
+            new_blobs = [
+                {"hash": h, "term": blobs[h][0], "definition": blobs[h][1],
+                 "image_url": blobs[h][2], "audio_url": blobs[h][3]}
+                for h in (referenced & blobs.keys()) - stored_blobs
+            ]
+            if new_blobs:
+                _insert_ignoring_duplicates(db, TermBlob, new_blobs)
+            _insert_ignoring_duplicates(db, VersionNode, [
+                {"hash": h, "level": level, "entries": json.dumps(entries, separators=(",", ":"))}
+                for h, (level, entries) in new_nodes.items()
+            ])
+
+        return root_hash
+
+    @staticmethod
+    def _hash_terms(db: Session, study_set_id: int, term_ids: Optional[Iterable[int]] = None
+                    ) -> Tuple[Dict[int, str], Dict[str, tuple]]:
+        """Blob hash by term id, and blob content by hash, of the given terms (all when None)"""
+        query = db.query(
+            Term.id, Term.term, Term.definition, Term.image_url, Term.audio_url
+        ).filter(Term.study_set_id == study_set_id)
+        if term_ids is None:
+            batches = [query.all()]
+        else:
+            batches = (query.filter(Term.id.in_(batch)).all() for batch in _batched(term_ids))
+        hash_of, blobs = {}, {}
+        for rows in batches:
+            for term_id, term, definition, image_url, audio_url in rows:
+                blob_hash = _term_hash(term, definition, image_url, audio_url)
+                blobs[blob_hash] = (term, definition, image_url, audio_url)
+                hash_of[term_id] = blob_hash
+        return hash_of, blobs
+
+    @staticmethod
+    def store_manifest(db: Session, study_set_id: int, base: Optional[str] = None,
+                       changed_term_ids: Iterable[int] = ()) -> Tuple[str, int]:
+        """Store the manifest of the study set's current term list.
+
+        Only term blobs and manifest nodes that are not stored yet get inserted,
+        so storage grows with the size of the edit. With a `base` manifest (the
+        term list before the edit) only the terms in `changed_term_ids` and
+        those missing from the base are read and hashed, and the base's nodes
+        are not looked up again. Returns the root hash and the number of terms.
+        """
+        term_ids = [
+            row[0] for row in db.query(Term.id).filter(
+                Term.study_set_id == study_set_id
+            ).order_by(Term.position, Term.id).all()
+        ]
+        if base is None:
+            hash_of, blobs = VersionService._hash_terms(db, study_set_id)
+            stored = frozenset()
+        else:
+            base_entries, stored = VersionService._load_tree(db, base)
+            hash_of = dict(base_entries)
+            changed = set(changed_term_ids)
+            stale = [term_id for term_id in term_ids if term_id in changed or term_id not in hash_of]
+            changed_hashes, blobs = VersionService._hash_terms(db, study_set_id, stale)
+            hash_of.update(changed_hashes)
+
+        leaf_entries = [[term_id, hash_of[term_id]] for term_id in term_ids]
+        return VersionService._store_tree(db, leaf_entries, blobs, stored), len(leaf_entries)
+
+    @staticmethod
+    def current_snapshot(db: Session, study_set: StudySet) -> Tuple[str, int]:
+        """Manifest of the study set as loaded, before the caller edits its terms"""
+        if study_set.manifest_hash:
+            return study_set.manifest_hash, study_set.terms_count
+        # Sets created before term snapshots existed
+        return VersionService.store_manifest(db, study_set.id)
+
+    @staticmethod
+    def record_version(
+        db: Session,
+        study_set_id: int,
+        user_id: int,
+        changes_summary: str,
+        values: Optional[dict] = None,
+        owner_id: Optional[int] = None,
+        expected_version: Optional[int] = None,
+        snapshot: Optional[Tuple[str, int]] = None
+    ) -> Optional[StudySet]:
+        """Apply `values` to a study set, bump its current_version and insert the version row.
+
+        The version row holds the state before the update: title and description
+        from the row being updated, and the term manifest given in `snapshot`
+        (by default the set's own manifest_hash and terms_count). On PostgreSQL
+        the set update and the version insert are one statement. Returns the
+        updated study set, or None when no row matched `owner_id` /
+        `expected_version`. The caller commits.
+        """
+        table = StudySet.__table__
+        versions = StudySetVersion.__table__
+        conditions = [table.c.id == study_set_id]
+        if owner_id is not None:
+            conditions.append(table.c.user_id == owner_id)
+        if expected_version is not None:
+            conditions.append(table.c.current_version == expected_version)
+        values = dict(values or {})
+        if "title" in values and "description" in values:
+            values["search_text"] = study_set_search_text(values["title"], values["description"])
+        version_columns = [
+            "study_set_id", "version_number", "title", "description",
+            "user_id", "changes_summary", "root_hash", "terms_count"
+        ]
+
+        if db.get_bind().dialect.name == "postgresql":
+            old = select(
+                table.c.id, table.c.title, table.c.description, table.c.current_version,
+                table.c.manifest_hash, table.c.terms_count
+            ).where(*conditions).with_for_update().cte("old")
+            root_hash, terms_count = (
+                (literal(snapshot[0]), literal(snapshot[1])) if snapshot
+                else (old.c.manifest_hash, old.c.terms_count)
+            )
+            new_version = insert(versions).from_select(version_columns, select(
+                old.c.id, old.c.current_version + 1, old.c.title, old.c.description,
+                literal(user_id), literal(changes_summary), root_hash, terms_count
+            )).cte("new_version")
+            stmt = update(table).where(table.c.id == old.c.id).values(
+                current_version=old.c.current_version + 1, **values
+            ).returning(*table.c).add_cte(old).add_cte(new_version)
+            study_set = db.execute(
+                select(StudySet).from_statement(stmt).execution_options(populate_existing=True)
+            ).scalar_one_or_none()
+            if study_set is not None:
+                VersionService._sync_search_text(db, study_set)
+            return study_set
+
+        # Other dialects (SQLite in tests): read the old row, then a guarded
+        # UPDATE ... RETURNING and the insert, inside the same transaction
+        old = db.execute(select(
+            table.c.title, table.c.description, table.c.current_version,
+            table.c.manifest_hash, table.c.terms_count
+        ).where(*conditions)).first()
+        if old is None:
+            return None
+        new_version_number = old.current_version + 1
+        stmt = update(table).where(
+            table.c.id == study_set_id, table.c.current_version == old.current_version
+        ).values(current_version=new_version_number, **values).returning(*table.c)
+        study_set = db.execute(
+            select(StudySet).from_statement(stmt).execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if study_set is None:
+            return None
+        root_hash, terms_count = snapshot or (old.manifest_hash, old.terms_count)
+        db.execute(insert(versions).values(
+            study_set_id=study_set_id,
+            version_number=new_version_number,
+            title=old.title,
+            description=old.description,
+            user_id=user_id,
+            changes_summary=changes_summary,
+            root_hash=root_hash,
+            terms_count=terms_count
+        ))
+        VersionService._sync_search_text(db, study_set)
+        return study_set
+
+    @staticmethod
+    def _sync_search_text(db: Session, study_set: StudySet) -> None:
+        """Store search_text when only one of title and description was updated"""
+        search_text = study_set_search_text(study_set.title, study_set.description)
+        if search_text != study_set.search_text:
+            db.execute(update(StudySet.__table__).where(StudySet.__table__.c.id == study_set.id).values(
+                search_text=search_text
+            ))
+            set_committed_value(study_set, "search_text", search_text)
+
+    @staticmethod
+    def record_term_change(db: Session, study_set_id: int, user_id: int, changes_summary: str,
+                           snapshot: Tuple[str, int], changed_term_ids: Iterable[int] = ()) -> None:
+        """Version a term edit: `snapshot` is the manifest from before the edit, which must be flushed.
+
+        The new manifest is derived from the snapshot, rehashing only
+        `changed_term_ids` (terms whose content was updated) and new terms.
+        The caller holds the study set row lock (SELECT ... FOR UPDATE) since
+        reading the snapshot, so no concurrent edit is missing from it.
+        """
+        root_hash, _ = VersionService.store_manifest(
+            db, study_set_id, base=snapshot[0], changed_term_ids=changed_term_ids
+        )
+        VersionService.record_version(
+            db, study_set_id, user_id, changes_summary,
+            values={"manifest_hash": root_hash}, snapshot=snapshot
+        )
+
+    @staticmethod
+    def _load_nodes(db: Session, hashes: Iterable[str]) -> Dict[str, Tuple[int, list]]:
+        nodes = {}
+        hashes = set(hashes)
+        if EMPTY_ROOT_HASH in hashes:
+            # The empty manifest is never stored
+            hashes.discard(EMPTY_ROOT_HASH)
+            nodes[EMPTY_ROOT_HASH] = (0, [])
+        for batch in _batched(hashes):
+            for node in db.query(VersionNode).filter(VersionNode.hash.in_(batch)).all():
+                nodes[node.hash] = (node.level, json.loads(node.entries))
+        return nodes
+
+    @staticmethod
+    def _load_blobs(db: Session, hashes: Iterable[str]) -> Dict[str, TermBlob]:
+        blobs = {}
+        for batch in _batched(hashes):
+            for blob in db.query(TermBlob).filter(TermBlob.hash.in_(batch)).all():
+                blobs[blob.hash] = blob
+        return blobs
+
+    @staticmethod
+    def _load_tree(db: Session, root_hash: str) -> Tuple[List[list], Set[str]]:
+        """The [term_id, blob_hash] entries of a manifest and the hashes of its nodes"""
+        frontier = [root_hash]
+        hashes = set()
+        while True:
+            nodes = VersionService._load_nodes(db, set(frontier))
+            hashes.update(frontier)
+            if nodes[frontier[0]][0] == 0:
+                return [entry for h in frontier for entry in nodes[h][1]], hashes
+            frontier = [child for h in frontier for child in nodes[h][1]]
+
+    @staticmethod
+    def load_manifest(db: Session, root_hash: str) -> List[list]:
+        """Return the [term_id, blob_hash] entries of a version in position order (one query per tree level)"""
+        return VersionService._load_tree(db, root_hash)[0]
+
+    @staticmethod
+    def get_version(db: Session, study_set_id: int, version_number: int) -> StudySetVersion:
+        version = db.query(StudySetVersion).filter(
+            StudySetVersion.study_set_id == study_set_id,
+            StudySetVersion.version_number == version_number
+        ).first()
+        if not version:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Version {version_number} not found"
+            )
+        if not version.root_hash:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Version {version_number} has no term snapshot"
+            )
+        return version
+
+    @staticmethod
+    def list_versions(db: Session, study_set_id: int) -> List[StudySetVersion]:
+        return db.query(StudySetVersion).filter(
+            StudySetVersion.study_set_id == study_set_id
+        ).order_by(desc(StudySetVersion.version_number)).all()
+
+    @staticmethod
+    def diff_versions(db: Session, study_set_id: int, from_version: int, to_version: int) -> dict:
+        """Compare two versions, loading only the manifest nodes they do not share"""
+        version_a = VersionService.get_version(db, study_set_id, from_version)
+        version_b = VersionService.get_version(db, study_set_id, to_version)
+
+        side_a, side_b = {version_a.root_hash}, {version_b.root_hash}
+        nodes = {}
+        while True:
+            # Identical hashes mean identical subtrees: drop them from both sides
+            common = side_a & side_b
+            side_a, side_b = side_a - common, side_b - common
+            missing = (side_a | side_b) - nodes.keys()
+            if missing:
+                nodes.update(VersionService._load_nodes(db, missing))
+            inner = [h for h in side_a | side_b if nodes[h][0] > 0]
+            if not inner:
+                break
+            top = max(nodes[h][0] for h in inner)
+            side_a = {c for h in side_a for c in (nodes[h][1] if nodes[h][0] == top else [h])}
+            side_b = {c for h in side_b for c in (nodes[h][1] if nodes[h][0] == top else [h])}
+
+        # Term ids are unique within a version, so entries outside shared chunks are the whole diff
+        entries_a = {term_id: blob_hash for h in side_a for term_id, blob_hash in nodes[h][1]}
+        entries_b = {term_id: blob_hash for h in side_b for term_id, blob_hash in nodes[h][1]}
+        added = [term_id for term_id in entries_b if term_id not in entries_a]
+        removed = [term_id for term_id in entries_a if term_id not in entries_b]
+        modified = [
+            term_id for term_id in entries_a
+            if term_id in entries_b and entries_a[term_id] != entries_b[term_id]
+        ]
+        blobs = VersionService._load_blobs(db, set(entries_a.values()) | set(entries_b.values()))
+
+        def snapshot_of(term_id: int, blob_hash: str) -> dict:
+            blob = blobs[blob_hash]
+            return {
+                "term_id": term_id,
+                "term": blob.term,
+                "definition": blob.definition,
+                "image_url": blob.image_url,
+                "audio_url": blob.audio_url
+            }
+
+        changed_fields = [
+            field for field in ("title", "description")
+            if getattr(version_a, field) != getattr(version_b, field)
+        ]
+        return {
+            "study_set_id": study_set_id,
+            "from_version": from_version,
+            "to_version": to_version,
+            "changed_fields": changed_fields,
+            "added": [snapshot_of(t, entries_b[t]) for t in sorted(added)],
+            "removed": [snapshot_of(t, entries_a[t]) for t in sorted(removed)],
+            "modified": [
+                {"term_id": t, "before": snapshot_of(t, entries_a[t]), "after": snapshot_of(t, entries_b[t])}
+                for t in sorted(modified)
+            ]
+        }
+
+    @staticmethod
+    def restore_version(db: Session, study_set_id: int, version_number: int, user_id: int) -> StudySet:
+        """Restore title, description and terms of a version; the current state is versioned first"""
+        study_set = db.query(StudySet).filter(
+            StudySet.id == study_set_id, StudySet.user_id == user_id
+        ).with_for_update().first()
+        if not study_set:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Study set not found or you don't have permission to edit it"
+            )
+
+        version = VersionService.get_version(db, study_set_id, version_number)
+        entries = VersionService.load_manifest(db, version.root_hash)
+        blobs = VersionService._load_blobs(db, {blob_hash for _, blob_hash in entries})
+        snapshot = VersionService.current_snapshot(db, study_set)
+
+        existing = {
+            term.id: term
+            for term in db.query(Term).filter(Term.study_set_id == study_set_id).all()
+        }
+        restored = []
+        for position, (term_id, blob_hash) in enumerate(entries, start=1):
+            blob = blobs[blob_hash]
+            term = existing.pop(term_id, None)
+            if term is None:
+                # Terms deleted since the version come back with new ids
+                term = Term(study_set_id=study_set_id)
+                db.add(term)
+            term.term = blob.term
+            term.definition = blob.definition
+            term.image_url = blob.image_url
+            term.audio_url = blob.audio_url
+            term.position = position
+            restored.append((term, blob_hash))
+
+        for term in existing.values():
+            db.delete(term)
+        db.flush()
+
+        # The restored terms' blobs are the version's, so nothing is rehashed;
+        # the current state is versioned first, so a restore can be undone
+        root_hash = VersionService._store_tree(db, [[term.id, blob_hash] for term, blob_hash in restored], {})
+        terms_count = len(restored)
+        study_set = VersionService.record_version(
+            db, study_set_id, user_id, f"Restored version {version_number}",
+            values={
+                "title": version.title,
+                "description": version.description,
+                "terms_count": terms_count,
+                "manifest_hash": root_hash
+            },
+            snapshot=snapshot
+        )
+        db.commit()
+        SuggestService.study_set_changed(study_set)
+        return study_set
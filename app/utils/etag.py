@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+
+
+def make_etag(kind: str, study_set_id: int, current_version: int, updated_at: Optional[datetime]) -> str:
+    """Build a weak ETag from a study set's content version and update time.
+
+    views_count is deliberately not part of it: viewing a set is not an edit.
+    The body does include views_count, so the tag is weak (W/): equal tags
+    mean the same content, not byte-identical bodies.
+    """
+    stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f'W/"{kind}-{study_set_id}-{current_version or 0}-{stamp}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header_value: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match or If-Match header with weak comparison.
+
+    If-Match normally compares strongly, which never matches a weak tag. Here
+    the tag changes with every edit of the title, description or terms (only
+    views_count is left out), so weak comparison still catches every
+    concurrent edit If-Match guards against.
+    """
+    if not header_value:
+        return False
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or _opaque(candidate) == _opaque(etag):
+            return True
+    return False
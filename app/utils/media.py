@@ -0,0 +1,50 @@
+"""
+Media processing that runs in the worker processes of the media pool.
+
+Imports nothing from the app so spawned workers start quickly. Pillow and
+ffmpeg are optional: without them no thumbnails or transcodes are made and
+the original files are served as uploaded.
+"""
+
+import os
+import shutil
+import subprocess
+from importlib.util import find_spec
+
+# Pillow is optional, and imported only where a thumbnail is made
+PILLOW_AVAILABLE = find_spec("PIL") is not None
+FFMPEG = shutil.which("ffmpeg")
+TRANSCODE_TIMEOUT = 120
+
+
+def thumbnails_available() -> bool:
+    return PILLOW_AVAILABLE
+
+
+def transcoding_available() -> bool:
+    return FFMPEG is not None
+
+
+def make_thumbnail(source: str, target: str, size: int) -> str:
+    """Write a JPEG thumbnail whose longest side is at most `size` pixels"""
+    from PIL import Image
+
+    partial = target + ".part"
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(partial, "JPEG", quality=85, optimize=True)
+    os.replace(partial, target)
+    return target
+
+
+def transcode_audio(source: str, target: str) -> str:
+    """Transcode audio to a compact mono MP3 with ffmpeg"""
+    partial = target + ".part.mp3"
+    subprocess.run(
+        [FFMPEG, "-nostdin", "-loglevel", "error", "-y", "-i", source, "-vn", "-ac", "1", "-b:a", "96k", partial],
+        check=True, timeout=TRANSCODE_TIMEOUT
+    )
+    os.replace(partial, target)
+    return target
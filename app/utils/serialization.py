@@ -0,0 +1,84 @@
+import orjson
+from fastapi.responses import JSONResponse
+from app.models.user import User
+
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dump_json(content) -> bytes:
+    """Render trusted content to JSON bytes the same way ORJSONResponse does"""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Handlers return it with content built straight from ORM rows, so the
+    payload is not validated again against the route's response_model; the
+    response_model is kept for the OpenAPI schema. Aware datetimes are written
+    with a "Z" suffix like Pydantic does.
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+def user_info_to_dict(user: User) -> dict:
+    """Convert user to dict for response"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "full_name": user.full_name,
+        "avatar_url": user.avatar_url
+    }
+
+
+def study_set_to_dict(study_set) -> dict:
+    """Convert SQLAlchemy study_set to dict with only required fields (in StudySetResponse field order)"""
+    return {
+        "title": study_set.title,
+        "description": study_set.description,
+        "is_public": study_set.is_public,
+        "language_from": study_set.language_from,
+        "language_to": study_set.language_to,
+        "id": study_set.id,
+        "user_id": study_set.user_id,
+        "created_at": study_set.created_at,
+        "updated_at": study_set.updated_at,
+        "terms_count": study_set.terms_count,
+        "views_count": study_set.views_count,
+        "favorites_count": study_set.favorites_count,
+        "average_rating": study_set.average_rating
+    }
+
+
+def term_to_dict(term) -> dict:
+    """Convert SQLAlchemy term (or a row from TermService.get_term_rows) to dict with only required fields
+    (in TermResponse field order)"""
+    return {
+        "term": term.term,
+        "definition": term.definition,
+        "image_url": term.image_url,
+        "audio_url": term.audio_url,
+        "id": term.id,
+        "study_set_id": term.study_set_id,
+        "position": term.position,
+        "created_at": term.created_at,
+        "updated_at": term.updated_at
+    }
+
+
+def version_to_dict(version) -> dict:
+    """Convert SQLAlchemy study set version to dict with only required fields"""
+    return {
+        "id": version.id,
+        "study_set_id": version.study_set_id,
+        "version_number": version.version_number,
+        "title": version.title,
+        "description": version.description,
+        "user_id": version.user_id,
+        "created_at": version.created_at,
+        "changes_summary": version.changes_summary,
+        "terms_count": version.terms_count
+    }
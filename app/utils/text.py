@@ -0,0 +1,100 @@
+import re
+import unicodedata
+
+# Letters NFKD does not decompose into a base letter plus a combining mark
+_LETTER_FOLDS = str.maketrans({
+    "đ": "d", "Đ": "d", "ð": "d", "ø": "o", "Ø": "o", "ł": "l", "Ł": "l",
+    "ß": "ss", "æ": "ae", "Æ": "ae", "œ": "oe", "Œ": "oe",
+})
+# Only the Latin combining diacritics (Vietnamese tones included) are dropped;
+# marks such as the Japanese dakuten are kept so kana keep their meaning
+_LATIN_DIACRITICS = re.compile("[\u0300-\u036f]")
+_NON_WORD = re.compile(r"[^\w\s]|_")
+
+
+def fold(text: str) -> str:
+    """Normalize text for comparison: case, accents (đ -> d), punctuation and spacing are ignored.
+
+    "Cảm ơn!" and "cam  on" both fold to "cam on".
+    """
+    if text.isascii():
+        return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+    text = unicodedata.normalize("NFKD", text.casefold().translate(_LETTER_FOLDS))
+    text = unicodedata.normalize("NFC", _LATIN_DIACRITICS.sub("", text))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Edit distance of a and b, or max_distance + 1 as soon as it is known to be larger.
+
+    Optimal string alignment distance: insertions, deletions, substitutions
+    and swaps of adjacent characters cost 1. Only the diagonal band of width
+    2 * max_distance + 1 is computed and the scan stops when a whole row
+    exceeds the bound, so the cost is O(max_distance * len) instead of
+    O(len(a) * len(b)).
+    """
+    if a == b:
+        return 0
+    over = max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > max_distance:
+        return over
+
+    # Common prefix and suffix do not change the distance
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a = a[start:end_a]
+    b = b[start:end_b]
+    len_a, len_b = len(a), len(b)
+    if len_a == 0:
+        return len_b if len_b <= max_distance else over
+
+    before_previous = None
+    previous = [j if j <= max_distance else over for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        char_a = a[i - 1]
+        low = max(1, i - max_distance)
+        high = min(len_b, i + max_distance)
+        current = [over] * (len_b + 1)
+        if low == 1:
+            current[0] = i if i <= max_distance else over
+        row_min = current[0]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (before_previous is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]
+                    and before_previous[j - 2] + 1 < value):
+                value = before_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        before_previous, previous = previous, current
+    return previous[len_b] if previous[len_b] <= max_distance else over
+
+
+def trigrams(text: str) -> set:
+    """pg_trgm style trigrams of folded text: each word padded with two spaces before and one after"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[start:start + 3] for start in range(len(padded) - 2))
+    return grams
+
+
+def word_similarity(query: str, text: str) -> float:
+    """Share of the query's trigrams found in text, 0 to 1 (close to pg_trgm's word_similarity)"""
+    wanted = trigrams(query)
+    if not wanted:
+        return 0.0
+    return len(wanted & trigrams(text)) / len(wanted)
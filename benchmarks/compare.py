@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark baselines written by benchmarks/run.py.
+
+Usage:
+    python benchmarks/compare.py old.json new.json
+    python benchmarks/compare.py old.json new.json --threshold 10 --fail-on-regression
+"""
+
+import argparse
+import json
+import sys
+
+# Lower is better for these; throughput is higher-is-better
+METRICS = [
+    ("p50 ms", lambda s: s["latency_ms"]["p50"], False),
+    ("p95 ms", lambda s: s["latency_ms"]["p95"], False),
+    ("p99 ms", lambda s: s["latency_ms"]["p99"], False),
+    ("req/s", lambda s: s["throughput_rps"], True),
+    ("queries", lambda s: s.get("queries_per_request"), False),
+    ("errors", lambda s: s["errors"], False),
+]
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old: dict, new: dict, threshold: float):
+    """Return table rows and the list of regressions beyond threshold percent"""
+    rows = []
+    regressions = []
+    for scenario in sorted(set(old["scenarios"]) | set(new["scenarios"])):
+        before = old["scenarios"].get(scenario)
+        after = new["scenarios"].get(scenario)
+        if before is None or after is None:
+            rows.append((scenario, "(missing in one run)", "", "", ""))
+            continue
+        for label, get, higher_is_better in METRICS:
+            old_value, new_value = get(before), get(after)
+            pct = change(old_value, new_value)
+            worse = pct is not None and (-pct if higher_is_better else pct) > threshold
+            if label in ("queries", "errors") and old_value is not None and new_value is not None:
+                worse = new_value > old_value
+            if worse:
+                regressions.append(f"{scenario} {label}")
+            rows.append((
+                scenario, label,
+                "-" if old_value is None else f"{old_value:g}",
+                "-" if new_value is None else f"{new_value:g}",
+                ("" if pct is None else f"{pct:+.1f}%") + (" ⚠️" if worse else "")
+            ))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark baselines")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"📊 {old['meta'].get('commit')} → {new['meta'].get('commit')}")
+    for key in ("database", "mode", "workers", "scale", "concurrency", "requests"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"   ⚠️  {key} differs: {old['meta'].get(key)} vs {new['meta'].get(key)}")
+
+    rows, regressions = compare(old, new, args.threshold)
+    print(f"{'scenario':<12} {'metric':<10} {'old':>10} {'new':>10} {'change':>10}")
+    for scenario, label, old_value, new_value, pct in rows:
+        print(f"{scenario:<12} {label:<10} {old_value:>10} {new_value:>10} {pct:>10}")
+
+    if regressions:
+        print(f"\n⚠️  Regressions beyond {args.threshold:g}%: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
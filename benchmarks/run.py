@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Load-test the core endpoints and write a JSON baseline.
+
+Drives the real FastAPI app, either in-process through ASGI or over HTTP
+against multi-worker uvicorn, through login, search, detail, bulk insert and
+reorder. Reports p50/p95/p99 latency, throughput and SQL queries per request
+(from the app's /metrics histograms) per scenario.
+
+Usage:
+    python benchmarks/run.py --scale small --output benchmarks/results/baseline.json
+    python benchmarks/run.py --mode uvicorn --workers 4 --database-url postgresql://... --output new.json
+    python benchmarks/compare.py benchmarks/results/baseline.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+from sqlalchemy import create_engine, text
+
+# benchmarks.seed and the app are imported in main(), once DATABASE_URL is set for the app's settings
+API = "/api/v1"
+SCENARIOS = ["login", "search", "detail", "bulk_insert", "reorder"]
+# Route template and method each scenario hits, to read its SQL counts from /metrics
+SCENARIO_ROUTES = {
+    "login": ("POST", "/api/v1/auth/login"),
+    "search": ("GET", "/api/v1/study-sets/"),
+    "detail": ("GET", "/api/v1/study-sets/{study_set_id}"),
+    "bulk_insert": ("POST", "/api/v1/study-sets/{study_set_id}/terms/bulk"),
+    "reorder": ("PUT", "/api/v1/study-sets/{study_set_id}/terms/reorder"),
+}
+SEARCH_WORDS = ["water", "school", "history", "verb", "coffee", "music", "train", "vocabulary"]
+REORDER_MAX_TERMS = 200
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+    }
+
+
+def parse_sql_per_request(metrics_text: str) -> Dict[str, Optional[float]]:
+    """Average SQL statements per request of each scenario, from /metrics"""
+    sums, counts = {}, {}
+    for line in metrics_text.splitlines():
+        for prefix, target in (("db_queries_per_request_sum{", sums), ("db_queries_per_request_count{", counts)):
+            if line.startswith(prefix):
+                labels, value = line[len(prefix):].rsplit("} ", 1)
+                target[labels] = float(value)
+    result = {}
+    for scenario, (method, route) in SCENARIO_ROUTES.items():
+        labels = f'method="{method}",route="{route}"'
+        count = counts.get(labels)
+        result[scenario] = round(sums[labels] / count, 2) if count else None
+    return result
+
+
+class Workload:
+    """Deterministic request generators built from the seeded data"""
+
+    def __init__(self, database_url: str, seed: int, users: int, password: str):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.password = password
+        engine = create_engine(database_url)
+        with engine.connect() as connection:
+            rows = connection.execute(text(
+                "SELECT id, user_id, terms_count, is_public FROM study_sets ORDER BY id"
+            )).all()
+        engine.dispose()
+        self.public_ids = [row.id for row in rows if row.is_public]
+        self.owner_sets: Dict[int, List[int]] = {}
+        self.small_sets: Dict[int, List[int]] = {}
+        for row in rows:
+            self.owner_sets.setdefault(row.user_id, []).append(row.id)
+            if row.terms_count <= REORDER_MAX_TERMS:
+                self.small_sets.setdefault(row.user_id, []).append(row.id)
+        # A few active users do the writes
+        self.writers = [user_id for user_id in sorted(self.small_sets)][:max(1, min(10, users))]
+        self.tokens: Dict[int, str] = {}
+
+    def popular_set(self) -> int:
+        """Pick a public set with a Zipf-like skew towards a few popular ones"""
+        index = min(int(self.rng.paretovariate(1.1)) - 1, len(self.public_ids) - 1)
+        return self.public_ids[index]
+
+    def username(self) -> str:
+        return f"user{self.rng.randint(1, self.users)}"
+
+
+async def timed(client: httpx.AsyncClient, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return time.perf_counter() - started, response
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, workload: Workload,
+                       requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    term_ids_cache: Dict[int, List[int]] = {}
+
+    async def prepare_reorder(study_set_id: int, headers: dict) -> List[int]:
+        if study_set_id not in term_ids_cache:
+            response = await client.get(f"{API}/study-sets/{study_set_id}/terms/", headers=headers)
+            term_ids_cache[study_set_id] = [term["id"] for term in response.json()]
+        return term_ids_cache[study_set_id]
+
+    def auth(user_id: int) -> dict:
+        return {"Authorization": f"Bearer {workload.tokens[user_id]}"}
+
+    async def one(i: int) -> None:
+        if name == "login":
+            latency, response = await timed(client, "POST", f"{API}/auth/login",
+                                            json={"username": workload.username(), "password": workload.password})
+        elif name == "search":
+            word = workload.rng.choice(SEARCH_WORDS)
+            latency, response = await timed(client, "GET", f"{API}/study-sets/",
+                                            params={"search": word, "size": 20},
+                                            headers=auth(workload.writers[0]))
+        elif name == "detail":
+            user_id = workload.writers[i % len(workload.writers)]
+            latency, response = await timed(client, "GET", f"{API}/study-sets/{workload.popular_set()}",
+                                            headers=auth(user_id))
+        elif name == "bulk_insert":
+            user_id = workload.writers[i % len(workload.writers)]
+            study_set_id = workload.rng.choice(workload.owner_sets[user_id])
+            terms = [{"term": f"bench term {i}-{n}", "definition": f"bench definition {n}"} for n in range(50)]
+            latency, response = await timed(client, "POST", f"{API}/study-sets/{study_set_id}/terms/bulk",
+                                            json={"terms": terms}, headers=auth(user_id))
+        else:
+            user_id = workload.writers[i % len(workload.writers)]
+            study_set_id = workload.small_sets[user_id][i % len(workload.small_sets[user_id])]
+            term_ids = list(await prepare_reorder(study_set_id, auth(user_id)))
+            workload.rng.shuffle(term_ids)
+            latency, response = await timed(client, "PUT", f"{API}/study-sets/{study_set_id}/terms/reorder",
+                                            json={"term_ids": term_ids}, headers=auth(user_id))
+        latencies.append(latency)
+        statuses[response.status_code] += 1
+
+    queue = iter(range(requests))
+
+    async def worker() -> None:
+        for i in queue:
+            await one(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, scenarios: List[str],
+                requests: int, concurrency: int, warmup: int) -> dict:
+    for user_id in workload.writers:
+        response = await client.post(f"{API}/auth/login",
+                                     json={"username": f"user{user_id}", "password": workload.password})
+        response.raise_for_status()
+        workload.tokens[user_id] = response.json()["access_token"]
+
+    results = {}
+    for name in scenarios:
+        if warmup:
+            await run_scenario(name, client, workload, warmup, 1)
+        results[name] = await run_scenario(name, client, workload, requests, concurrency)
+        print(f"   {name:<12} p50={results[name]['latency_ms']['p50']:>8.2f}ms "
+              f"p99={results[name]['latency_ms']['p99']:>8.2f}ms "
+              f"{results[name]['throughput_rps']:>8.1f} req/s  errors={results[name]['errors']}")
+
+    metrics = await client.get("/metrics")
+    if metrics.status_code == 200:
+        # Absolute counts since start-up, warmup included; each scenario has its own route
+        for name, value in parse_sql_per_request(metrics.text).items():
+            if name in results:
+                results[name]["queries_per_request"] = value
+    return results
+
+
+def run_asgi(args, workload: Workload) -> dict:
+    from app.main import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await drive(client, workload, args.scenarios, args.requests, args.concurrency, args.warmup)
+
+    return asyncio.run(main())
+
+
+def run_uvicorn(args, workload: Workload) -> dict:
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    server = subprocess.Popen(command, cwd=str(Path(__file__).parent.parent), env=os.environ.copy())
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.time() > deadline or server.poll() is not None:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.2)
+
+        async def main():
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+                return await drive(client, workload, args.scenarios, args.requests, args.concurrency, args.warmup)
+
+        # With several workers /metrics answers for one of them; its per-route ratio is still representative
+        return asyncio.run(main())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(Path(__file__).parent.parent), text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the core API endpoints")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--scale", default="small", help="tiny, small, medium or large")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--output", default=None, help="Write the JSON baseline here")
+    args = parser.parse_args()
+
+    # Settings are read when the app is imported (in this process or by uvicorn)
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("DEBUG", "False")
+    os.environ.setdefault("METRICS_ENABLED", "True")
+    os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+    from benchmarks.seed import BENCH_PASSWORD, SCALES, seed_database
+
+    if args.scale not in SCALES:
+        parser.error(f"--scale must be one of {', '.join(sorted(SCALES))}")
+    if not args.skip_seed:
+        print(f"🌱 Seeding {args.scale} dataset...")
+        counts = seed_database(args.database_url, SCALES[args.scale], args.seed)
+    else:
+        counts = None
+    workload = Workload(args.database_url, args.seed, SCALES[args.scale].users, BENCH_PASSWORD)
+
+    print(f"🚀 Running {', '.join(args.scenarios)} ({args.mode}, concurrency {args.concurrency})...")
+    results = run_asgi(args, workload) if args.mode == "asgi" else run_uvicorn(args, workload)
+
+    baseline = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": args.database_url.split(":", 1)[0],
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "scale": args.scale,
+            "seed": args.seed,
+            "rows": counts,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(baseline, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n")
+        print(f"✅ Baseline written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark study set detail serialization.
+
+Compares the old path (model_validate per term and for the detail, then
+FastAPI re-validating and re-serializing through response_model) with the
+orjson fast path the router uses now, for a study set with many terms.
+
+Usage:
+    python benchmarks/serialization_bench.py
+    python benchmarks/serialization_bench.py --terms 5000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.schemas.study_set import StudySetDetailResponse, TermResponse
+from app.utils.serialization import ORJSONResponse, study_set_to_dict, term_to_dict
+
+
+def make_fixture(terms_count):
+    """Build a study set and term rows shaped like the ORM results"""
+    now = datetime.now(timezone.utc)
+    study_set = SimpleNamespace(
+        id=1, title="Benchmark set", description="Serialization benchmark", user_id=1,
+        is_public=True, created_at=now, updated_at=now, terms_count=terms_count,
+        language_from="en", language_to="vi", views_count=0, favorites_count=0, average_rating=0.0
+    )
+    terms = [
+        SimpleNamespace(
+            id=i, term=f"term {i}", definition=f"definition of term {i} " * 3,
+            image_url=None, audio_url=None, study_set_id=1, position=i,
+            created_at=now, updated_at=now
+        )
+        for i in range(1, terms_count + 1)
+    ]
+    user = {"id": 1, "username": "bench", "full_name": "Bench User", "avatar_url": None}
+    return study_set, terms, user
+
+
+def render_validated(study_set, terms, user, field):
+    """Old path: validate every term, the detail, then let FastAPI serialize it"""
+    data = study_set_to_dict(study_set)
+    data["user"] = user
+    data["terms"] = [TermResponse.model_validate(term_to_dict(term)) for term in terms]
+    resp = StudySetDetailResponse.model_validate(data)
+    content = asyncio.run(serialize_response(field=field, response_content=resp, is_coroutine=False))
+    return JSONResponse(content).body
+
+
+def render_fast(study_set, terms, user):
+    """New path: plain dicts straight from the rows, rendered by orjson"""
+    data = study_set_to_dict(study_set)
+    data["user"] = user
+    data["terms"] = [term_to_dict(term) for term in terms]
+    data["next_terms_cursor"], data["next_terms_after_id"] = None, None  # Every term is inlined
+    return ORJSONResponse(data).body
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark study set detail serialization")
+    parser.add_argument("--terms", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    study_set, terms, user = make_fixture(args.terms)
+    field = create_response_field(name="Response_get_study_set", type_=StudySetDetailResponse)
+
+    validated = render_validated(study_set, terms, user, field)
+    fast = render_fast(study_set, terms, user)
+    assert fast == validated, "the orjson path must render the same bytes as the validated path"
+    print(f"📦 {args.terms} terms: {len(fast)} bytes, identical on both paths")
+
+    before = measure(lambda: render_validated(study_set, terms, user, field), args.repeat)
+    after = measure(lambda: render_fast(study_set, terms, user), args.repeat)
+
+    print(f"🐢 Validated path: {before * 1000:8.1f} ms  ({before / args.terms * 1e6:6.2f} µs/term)")
+    print(f"🚀 orjson path:    {after * 1000:8.1f} ms  ({after / args.terms * 1e6:6.2f} µs/term)")
+    print(f"✅ {before / after:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
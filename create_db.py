@@ -86,9 +86,15 @@ CREATE TABLE study_sets (
     language_to VARCHAR(10),
     views_count INT DEFAULT 0,
     favorites_count INT DEFAULT 0,
-    average_rating DECIMAL(3,2)
+    average_rating DECIMAL(3,2),
+    current_version INT NOT NULL DEFAULT 0,
+    manifest_hash VARCHAR(64),
+    search_text TEXT
 );
 
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX ix_study_sets_search_text_trgm ON study_sets USING gin (search_text gin_trgm_ops);
+
 -- Bảng terms
 CREATE TABLE terms (
     id SERIAL PRIMARY KEY,
@@ -101,6 +107,15 @@ CREATE TABLE terms (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     position INT
 );
+CREATE INDEX ix_terms_study_set_position_id ON terms (study_set_id, position, id);
+
+-- study_set_facets (public study sets per language pair / rating band, see scripts/reconcile_facets.py)
+CREATE TABLE study_set_facets (
+    facet VARCHAR(32),
+    value VARCHAR(32),
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (facet, value)
+);
 
 -- Bảng folders
 CREATE TABLE folders (
@@ -179,6 +194,8 @@ CREATE TABLE class_members (
     user_id INT REFERENCES users(id),
     role VARCHAR(10) CHECK (role IN ('teacher', 'student')),
     joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    score INT NOT NULL DEFAULT 0,
+    terms_mastered INT NOT NULL DEFAULT 0,
     UNIQUE(class_id, user_id)
 );
 
@@ -189,7 +206,19 @@ CREATE TABLE class_study_sets (
     study_set_id INT REFERENCES study_sets(id),
     assigned_at TIMESTAMP,
     due_date TIMESTAMP,
-    is_optional BOOLEAN DEFAULT FALSE
+    is_optional BOOLEAN DEFAULT FALSE,
+    UNIQUE(class_id, study_set_id)
+);
+CREATE INDEX ix_class_study_sets_study_set_id ON class_study_sets (study_set_id);
+
+-- mastered_terms (first exact answer of a user on a term, for class leaderboards)
+CREATE TABLE mastered_terms (
+    id SERIAL PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id),
+    study_set_id INT NOT NULL REFERENCES study_sets(id) ON DELETE CASCADE,
+    term_id INT NOT NULL REFERENCES terms(id) ON DELETE CASCADE,
+    mastered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, term_id)
 );
 
 -- ratings
@@ -226,8 +255,11 @@ CREATE TABLE reports (
     status VARCHAR(20) CHECK (status IN ('pending', 'reviewed', 'resolved', 'dismissed')) DEFAULT 'pending',
     resolved_by_user_id INT REFERENCES users(id),
     reported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    resolved_at TIMESTAMP
+    resolved_at TIMESTAMP,
+    screening_score FLOAT,
+    screening_notes TEXT
 );
+CREATE INDEX ix_reports_status_id ON reports (status, id);
 
 -- study_set_versions
 CREATE TABLE study_set_versions (
@@ -238,7 +270,26 @@ CREATE TABLE study_set_versions (
     description TEXT,
     user_id INT REFERENCES users(id),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    changes_summary TEXT
+    changes_summary TEXT,
+    root_hash VARCHAR(64),
+    terms_count INT
+);
+CREATE UNIQUE INDEX ux_study_set_versions_set_number ON study_set_versions (study_set_id, version_number);
+
+-- term_blobs (content of a term, once per content hash)
+CREATE TABLE term_blobs (
+    hash VARCHAR(64) PRIMARY KEY,
+    term VARCHAR(500) NOT NULL,
+    definition TEXT NOT NULL,
+    image_url VARCHAR(500),
+    audio_url VARCHAR(500)
+);
+
+-- version_nodes (content-addressed nodes of the version manifest trees)
+CREATE TABLE version_nodes (
+    hash VARCHAR(64) PRIMARY KEY,
+    level INT NOT NULL,
+    entries TEXT NOT NULL
 );
 """
 
@@ -1,17 +1,34 @@
 #!/usr/bin/env python3
 """
 Quizlet Backend API Server
+
+    python run.py               # auto-reload when DEBUG is on
+    python run.py --production  # multi-worker production server (app/core/server.py)
 """
 
+import argparse
 import uvicorn
-from app.main import app
 from app.core.config import settings
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.debug,
-        log_level="info"
-    ) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Quizlet backend")
+    parser.add_argument("--production", action="store_true",
+                        help="multi-worker server without auto-reload, logs boot phase timings")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: WEB_WORKERS)")
+    args = parser.parse_args()
+
+    if args.production:
+        import logging
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        from app.core.boot import boot_timer  # First, so the boot phases are timed from here
+        from app.core.server import serve
+        serve(host="0.0.0.0", port=8000, workers=args.workers)
+    else:
+        # The reloader imports the app in its own worker process
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=settings.debug,
+            log_level="info"
+        )
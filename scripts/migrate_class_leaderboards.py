@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Add the score and terms_mastered leaderboard columns to class_members in an
+existing database (classes created from create_db.py), the mastered_terms
+table and the class_study_sets indexes. Safe to run more than once.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, text
+from app.core.database import engine, Base
+from app.models import MasteredTerm
+
+COLUMNS = {
+    "score": "ALTER TABLE class_members ADD COLUMN score INTEGER NOT NULL DEFAULT 0",
+    "terms_mastered": "ALTER TABLE class_members ADD COLUMN terms_mastered INTEGER NOT NULL DEFAULT 0",
+}
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_class_study_sets_class_set ON class_study_sets (class_id, study_set_id)",
+    "CREATE INDEX IF NOT EXISTS ix_class_study_sets_study_set_id ON class_study_sets (study_set_id)",
+]
+
+
+def migrate():
+    """Add the class leaderboard columns"""
+    print("Adding class leaderboard columns...")
+    with engine.begin() as connection:
+        existing = {column["name"] for column in inspect(connection).get_columns("class_members")}
+        for name, statement in COLUMNS.items():
+            if name not in existing:
+                connection.execute(text(statement))
+        for statement in INDEXES:
+            connection.execute(text(statement))
+    Base.metadata.create_all(bind=engine, tables=[MasteredTerm.__table__])
+    print("✅ Class leaderboard columns added successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Add the automated screening columns and the (status, id) queue index used by
+the moderation workers to the reports table of an existing database (built
+from create_db.py). Safe to run more than once.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, text
+from app.core.database import engine
+
+COLUMNS = {
+    "screening_score": "ALTER TABLE reports ADD COLUMN screening_score FLOAT",
+    "screening_notes": "ALTER TABLE reports ADD COLUMN screening_notes TEXT",
+}
+INDEX_SQL = "CREATE INDEX IF NOT EXISTS ix_reports_status_id ON reports (status, id)"
+
+
+def migrate():
+    """Add the report screening columns and queue index"""
+    print("Migrating reports for automated screening...")
+    with engine.begin() as connection:
+        existing = {column["name"] for column in inspect(connection).get_columns("reports")}
+        for name, statement in COLUMNS.items():
+            if name not in existing:
+                connection.execute(text(statement))
+        connection.execute(text(INDEX_SQL))
+    print("✅ Reports migrated successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
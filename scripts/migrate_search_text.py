@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Add the search_text column used by the fuzzy search mode to an existing
+database, fill it for existing study sets and, on PostgreSQL, create the
+pg_trgm extension and its trigram GIN index. Safe to run more than once.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import bindparam, inspect, select, text, update
+from app.core.database import engine
+from app.models.study_set import StudySet, study_set_search_text
+
+BATCH_SIZE = 5000
+POSTGRES_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_study_sets_search_text_trgm ON study_sets USING gin (search_text gin_trgm_ops)",
+]
+
+
+def migrate():
+    """Add, backfill and index study_sets.search_text"""
+    print("Migrating study set search text...")
+    table = StudySet.__table__
+    with engine.begin() as connection:
+        if "search_text" not in {column["name"] for column in inspect(connection).get_columns("study_sets")}:
+            connection.execute(text("ALTER TABLE study_sets ADD COLUMN search_text TEXT"))
+
+    # Normalization happens in Python (app.utils.text.fold), in batches of BATCH_SIZE rows
+    filled = 0
+    last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.title, table.c.description)
+                .where(table.c.id > last_id, table.c.search_text.is_(None))
+                .order_by(table.c.id).limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            # Not an edit: keep updated_at (and ETags) unchanged
+            connection.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(
+                    search_text=bindparam("folded"), updated_at=table.c.updated_at
+                ),
+                [{"row_id": row.id, "folded": study_set_search_text(row.title, row.description)} for row in rows]
+            )
+        filled += len(rows)
+        last_id = rows[-1].id
+        print(f"   {filled} study sets filled")
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            for statement in POSTGRES_SQL:
+                connection.execute(text(statement))
+    print("✅ Study set search text migrated successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Upgrade an existing PostgreSQL database for term-level version history.
+
+Adds the version columns, creates the term_blobs / version_nodes tables,
+backfills study_sets.current_version from existing versions and creates the
+unique (study_set_id, version_number) index. Safe to run more than once.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from app.core.database import engine, Base
+from app.models import TermBlob, VersionNode
+
+MIGRATION_SQL = [
+    "ALTER TABLE study_sets ADD COLUMN IF NOT EXISTS current_version INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE study_sets ADD COLUMN IF NOT EXISTS manifest_hash VARCHAR(64)",
+    "ALTER TABLE study_set_versions ADD COLUMN IF NOT EXISTS root_hash VARCHAR(64)",
+    "ALTER TABLE study_set_versions ADD COLUMN IF NOT EXISTS terms_count INTEGER",
+    """
+    UPDATE study_sets s SET current_version = v.max_version
+    FROM (
+        SELECT study_set_id, MAX(version_number) AS max_version
+        FROM study_set_versions GROUP BY study_set_id
+    ) v
+    WHERE s.id = v.study_set_id AND s.current_version < v.max_version
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_study_set_versions_set_number
+    ON study_set_versions (study_set_id, version_number)
+    """,
+]
+
+
+def migrate():
+    """Apply the version history migration"""
+    print("Migrating study set versions...")
+    Base.metadata.create_all(bind=engine, tables=[TermBlob.__table__, VersionNode.__table__])
+    with engine.begin() as connection:
+        for statement in MIGRATION_SQL:
+            connection.execute(text(statement))
+    print("✅ Study set versions migrated successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Add the (study_set_id, position, id) index used for term pagination to an
+existing database, replacing the older (study_set_id, position) one. Safe to
+run more than once.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+MIGRATION_SQL = [
+    "CREATE INDEX IF NOT EXISTS ix_terms_study_set_position_id ON terms (study_set_id, position, id)",
+    # Pages are ordered by (position, id); the new index covers everything the old one did
+    "DROP INDEX IF EXISTS ix_terms_study_set_position",
+]
+
+
+def migrate():
+    """Create the term position index"""
+    print("Creating term position index...")
+    with engine.begin() as connection:
+        for statement in MIGRATION_SQL:
+            connection.execute(text(statement))
+    print("✅ Term position index created successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
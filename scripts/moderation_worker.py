@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Moderation worker: pre-screens pending reports in parallel processes.
+
+Usage:
+    python scripts/moderation_worker.py --workers 4
+    python scripts/moderation_worker.py --workers 4 --drain   # exit once the queue is empty
+"""
+
+import argparse
+import logging
+import multiprocessing
+import queue
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def worker_main(worker_id, batch_size, drain, stop_event, results):
+    """Entry point of one worker process"""
+    # Imported here so every spawned process builds its own engine and pool
+    from app.core.database import SessionLocal
+    from app.services.moderation_service import ModerationService
+
+    logging.basicConfig(level=logging.INFO, format=f"[worker {worker_id}] %(message)s")
+    stats = ModerationService.run_worker(
+        SessionLocal,
+        batch_size=batch_size,
+        stop_when_empty=drain,
+        should_stop=stop_event.is_set
+    )
+    results.put(stats.as_dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run moderation queue workers")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--drain", action="store_true", help="Exit when no pending reports are left")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    stop_event = ctx.Event()
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker_main, args=(i, args.batch_size, args.drain, stop_event, results))
+        for i in range(args.workers)
+    ]
+
+    print(f"🚀 Starting {args.workers} moderation workers...")
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping workers...")
+        stop_event.set()
+        for process in processes:
+            process.join()
+
+    elapsed = time.perf_counter() - started
+    processed = flagged = dismissed = 0
+    for _ in processes:
+        try:
+            stats = results.get(timeout=1)
+        except queue.Empty:
+            break
+        processed += stats["processed"]
+        flagged += stats["flagged"]
+        dismissed += stats["dismissed"]
+
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Processed {processed} reports in {elapsed:.1f}s ({rate:.0f} reports/s)")
+    print(f"   Flagged: {flagged}, dismissed: {dismissed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Recount the study set facet counts (language pairs, rating bands) from the
+study_sets table and fix any drift in study_set_facets.
+
+Usage:
+    python scripts/reconcile_facets.py --once
+    python scripts/reconcile_facets.py --interval 3600   # every hour (FACETS_RECONCILE_INTERVAL) until stopped
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.facet_service import FacetService
+
+
+def reconcile_once():
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        fixed = FacetService.reconcile(db)
+    finally:
+        db.close()
+    print(f"✅ Facet counts reconciled in {time.perf_counter() - started:.2f}s ({fixed} rows fixed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile study set facet counts")
+    parser.add_argument("--interval", type=int, default=settings.facets_reconcile_interval,
+                        help="Seconds between runs")
+    parser.add_argument("--once", action="store_true", help="Reconcile once and exit")
+    args = parser.parse_args()
+
+    if args.once:
+        reconcile_once()
+        return
+    print(f"🚀 Reconciling facet counts every {args.interval}s...")
+    try:
+        while True:
+            reconcile_once()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 """
 Start script for Quizlet Backend with automatic setup
+
+    python start.py               # check .env, dependencies and database, then start with --reload
+    python start.py --production  # fast boot, multi-worker: no checks, no reload; database checked by /readyz
 """
 
 import os
 import sys
+import argparse
 import subprocess
 from pathlib import Path
 
@@ -63,8 +67,37 @@ def start_server():
     except Exception as e:
         print(f"❌ Error starting server: {e}")
 
+def start_production(host: str, port: int, workers: int = None):
+    """Start the multi-worker production server, skipping the setup checks.
+
+    Nothing connects to the database while booting; load balancers and
+    orchestrators should wait for /readyz. Boot phase timings are logged.
+    """
+    import logging
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from app.core.boot import boot_timer  # First, so the boot phases are timed from here
+    from app.core.server import serve
+
+    print(f"🚀 Starting Quizlet Backend Server (production) on {host}:{port}")
+    serve(host, port, workers)
+
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Set up and start the Quizlet backend")
+    parser.add_argument("--production", action="store_true",
+                        help="fast boot: skip the setup checks and auto-reload")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="production worker processes (default: WEB_WORKERS, 0 = auto)")
+    args = parser.parse_args()
+
+    if args.production:
+        start_production(args.host, args.port, args.workers)
+        return
+
     print("🎯 Quizlet Backend Setup & Start")
     print("=" * 40)
     
@@ -0,0 +1,102 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.admission import AdmissionControlMiddleware, ConcurrencyLimiter, MemoryTokenBucket, parse_route_limits
+from app.core.routing import route_template
+from app.core.security import create_access_token
+
+
+def make_app(**options):
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(AdmissionControlMiddleware, **options)
+    return app, release
+
+
+class TestAdmissionControl:
+    def test_parse_route_limits(self):
+        """Test the settings format for per-route limits"""
+        limits = parse_route_limits("GET /api/v1/study-sets/=8, post /a/{id}/bulk=2")
+
+        assert limits == {"GET /api/v1/study-sets/": 8, "POST /a/{id}/bulk": 2}
+
+    def test_route_template(self):
+        """Test requests resolve to their route template"""
+        app, _ = make_app(route_limits={}, rate_limiter=None)
+
+        assert route_template({"type": "http", "method": "GET", "path": "/items/42", "app": app}) == "/items/{item_id}"
+        assert route_template({"type": "http", "method": "GET", "path": "/nowhere", "app": app}) == "unmatched"
+
+    def test_rate_limit_per_client(self):
+        """Test a client over its token bucket gets 429 while others are served"""
+        app, _ = make_app(route_limits={}, default_limit=0, rate_limiter=MemoryTokenBucket(rate=0.001, burst=2))
+        client = TestClient(app)
+        token = create_access_token({"sub": "alice", "user_id": 1})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert client.get("/items/1", headers=headers).status_code == 200
+        assert client.get("/items/1", headers=headers).status_code == 200
+        response = client.get("/items/1", headers=headers)
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+        # Other users have their own bucket and health checks are exempt
+        other = {"Authorization": f"Bearer {create_access_token({'sub': 'bob', 'user_id': 2})}"}
+        assert client.get("/items/1", headers=other).status_code == 200
+        assert client.get("/health", headers=headers).status_code == 200
+
+    def test_route_concurrency_limit_sheds_load(self):
+        """Test requests queueing past the timeout on a saturated route get 503"""
+        app, release = make_app(route_limits={"GET /slow": 1}, queue_timeout=0.05, rate_limiter=None)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first = asyncio.ensure_future(client.get("/slow"))
+                await asyncio.sleep(0.05)
+                shed = await client.get("/slow")
+                # Other routes are not affected by the saturated one
+                cheap = await client.get("/items/7")
+                release.set()
+                return (await first).status_code, shed, cheap.status_code
+
+        first, shed, cheap = asyncio.run(run())
+
+        assert first == 200
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "1"
+        assert cheap == 200
+
+    def test_limiter_hands_slot_to_waiter(self):
+        """Test a waiter gets the slot released by the holder"""
+        limiter = ConcurrencyLimiter(1)
+
+        async def run():
+            assert await limiter.acquire(1.0)
+            waiter = asyncio.ensure_future(limiter.acquire(1.0))
+            await asyncio.sleep(0.01)
+            assert limiter.waiting == 1
+            limiter.release(0.01)
+            assert await waiter
+            limiter.release(0.01)
+
+        asyncio.run(run())
+
+        assert limiter.stats()["active"] == 0
+        assert limiter.stats()["rejected"] == 0
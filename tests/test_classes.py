@@ -0,0 +1,259 @@
+import random
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.user import User
+from app.models.study_set import StudySet, Term
+from app.models.study_class import ClassMember
+from app.core.security import get_password_hash
+from app.services import leaderboard_service
+from app.services.leaderboard_service import SortedScores, MemoryLeaderboards, leaderboard_flusher
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+@pytest.fixture
+def test_db():
+    Base.metadata.create_all(bind=engine)
+    # Boards from earlier tests would be keyed by the same class ids
+    leaderboard_service._leaderboards = MemoryLeaderboards(300)
+    leaderboard_flusher.flush(TestingSessionLocal())
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def users(test_db):
+    """A teacher and three students, with their authentication headers"""
+    db = TestingSessionLocal()
+    for name in ("teacher", "alice", "bob", "carol"):
+        db.add(User(
+            username=name,
+            email=f"{name}@example.com",
+            password_hash=get_password_hash("testpassword"),
+            full_name=name.title()
+        ))
+    db.commit()
+    db.close()
+    headers = {}
+    for name in ("teacher", "alice", "bob", "carol"):
+        response = client.post("/api/v1/auth/login", json={"username": name, "password": "testpassword"})
+        headers[name] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return headers
+
+
+@pytest.fixture
+def study_class(users):
+    """A class the three students joined"""
+    response = client.post("/api/v1/classes/", json={"name": "Tiếng Anh 10A"}, headers=users["teacher"])
+    assert response.status_code == 201
+    data = response.json()
+    for name in ("alice", "bob", "carol"):
+        joined = client.post("/api/v1/classes/join", json={"join_code": data["join_code"].lower()},
+                             headers=users[name])
+        assert joined.status_code == 200
+    return data
+
+
+@pytest.fixture
+def study_set_terms(users):
+    """A public study set with three terms"""
+    db = TestingSessionLocal()
+    owner = db.query(User).filter(User.username == "teacher").first()
+    study_set = StudySet(title="Animals", user_id=owner.id, is_public=True, terms_count=3)
+    db.add(study_set)
+    db.commit()
+    terms = [Term(term=term, definition=definition, study_set_id=study_set.id, position=position)
+             for position, (term, definition) in enumerate([("dog", "con chó"), ("cat", "con mèo"),
+                                                            ("elephant", "con voi")], 1)]
+    db.add_all(terms)
+    db.commit()
+    ids = (study_set.id, [term.id for term in terms])
+    db.close()
+    return ids
+
+
+@pytest.fixture
+def assigned(users, study_class, study_set_terms):
+    """The study set assigned to the class"""
+    response = client.post(f"/api/v1/classes/{study_class['id']}/study-sets",
+                           json={"study_set_id": study_set_terms[0]}, headers=users["teacher"])
+    assert response.status_code == 201
+    return response.json()
+
+
+def _member(username):
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == username).first()
+    member = db.query(ClassMember).filter(ClassMember.user_id == user.id).first()
+    totals = (member.score, member.terms_mastered)
+    db.close()
+    return totals
+
+
+def _grade(headers, study_set_terms, answers):
+    study_set_id, term_ids = study_set_terms
+    response = client.post(f"/api/v1/study-sets/{study_set_id}/grade", json={"answers": [
+        {"term_id": term_id, "answer": answer} for term_id, answer in zip(term_ids, answers)
+    ]}, headers=headers)
+    assert response.status_code == 200
+
+
+class TestClasses:
+    def test_create_and_join(self, users, study_class):
+        assert study_class["name"] == "Tiếng Anh 10A"
+        assert len(study_class["join_code"]) == 8
+
+        again = client.post("/api/v1/classes/join", json={"join_code": study_class["join_code"]},
+                            headers=users["alice"])
+        assert again.status_code == 400
+        unknown = client.post("/api/v1/classes/join", json={"join_code": "NOPE"}, headers=users["alice"])
+        assert unknown.status_code == 404
+
+    def test_leaderboard_members_only(self, users, study_class):
+        client.post("/api/v1/auth/register", json={
+            "username": "outsider", "email": "outsider@example.com", "password": "testpassword"
+        })
+        token = client.post("/api/v1/auth/login", json={
+            "username": "outsider", "password": "testpassword"
+        }).json()["access_token"]
+        response = client.get(f"/api/v1/classes/{study_class['id']}/leaderboard",
+                              headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 403
+
+    def test_assign_study_set(self, users, study_class, study_set_terms, assigned):
+        assert assigned["class_id"] == study_class["id"]
+        assert assigned["study_set_id"] == study_set_terms[0]
+        url = f"/api/v1/classes/{study_class['id']}/study-sets"
+        again = client.post(url, json={"study_set_id": study_set_terms[0]}, headers=users["teacher"])
+        assert again.status_code == 400
+        student = client.post(url, json={"study_set_id": study_set_terms[0]}, headers=users["alice"])
+        assert student.status_code == 403
+        missing = client.post(url, json={"study_set_id": 999}, headers=users["teacher"])
+        assert missing.status_code == 404
+
+
+class TestLeaderboard:
+    def test_graded_answers_rank_students(self, users, study_class, study_set_terms, assigned):
+        url = f"/api/v1/classes/{study_class['id']}/leaderboard"
+        empty = client.get(url, headers=users["alice"]).json()
+        assert empty["members"] == 3
+        assert all(entry["value"] == 0 for entry in empty["entries"])
+
+        _grade(users["alice"], study_set_terms, ["con cho", "con meo", "wrong"])
+        _grade(users["bob"], study_set_terms, ["con chó", "con mèo", "con voi"])
+        _grade(users["carol"], study_set_terms, ["con chóo", "x", "y"])
+        # Nothing is written until the flusher runs
+        assert client.get(url, headers=users["alice"]).json()["entries"][0]["value"] == 0
+        assert leaderboard_flusher.flush(TestingSessionLocal()) == 3
+
+        data = client.get(url, headers=users["alice"]).json()
+        assert [(entry["user"]["username"], entry["value"]) for entry in data["entries"]] == [
+            ("bob", 3), ("alice", 2), ("carol", 1)
+        ]
+        assert data["me"]["rank"] == 2
+
+        mastered = client.get(url, params={"by": "terms_mastered", "limit": 1}, headers=users["teacher"]).json()
+        assert [(entry["user"]["username"], entry["value"]) for entry in mastered["entries"]] == [("bob", 3)]
+        assert mastered["me"] is None  # Teachers are not ranked
+
+        # Totals are kept in class_members, so a reloaded board agrees
+        leaderboard_service._leaderboards = MemoryLeaderboards(300)
+        assert client.get(url, headers=users["alice"]).json() == data
+
+    def test_flush_batches_answers(self, users, study_class, study_set_terms, assigned):
+        for _ in range(3):
+            _grade(users["alice"], study_set_terms, ["con cho", "con meo", "con voii"])
+        assert leaderboard_flusher.pending() == 1
+        leaderboard_flusher.flush(TestingSessionLocal())
+        # Each correct answer scores, but a term is only mastered once
+        assert _member("alice") == (9, 2)
+
+    def test_terms_are_mastered_once_and_only_on_assigned_sets(self, users, study_class, study_set_terms):
+        # Answers on a set the class was not assigned do not count for it
+        _grade(users["alice"], study_set_terms, ["con chó", "con mèo", "wrong"])
+        assert leaderboard_flusher.flush(TestingSessionLocal()) == 0
+        assert _member("alice") == (0, 0)
+
+        client.post(f"/api/v1/classes/{study_class['id']}/study-sets",
+                    json={"study_set_id": study_set_terms[0]}, headers=users["teacher"])
+        # A term counts the first time it is answered exactly: not again in later batches,
+        # and not at all if that was before the set was assigned
+        _grade(users["alice"], study_set_terms, ["con cho", "con meo", "con voi"])
+        leaderboard_flusher.flush(TestingSessionLocal())
+        _grade(users["alice"], study_set_terms, ["con cho", "con meo", "con voi"])
+        leaderboard_flusher.flush(TestingSessionLocal())
+        assert _member("alice") == (6, 1)
+
+        data = client.get(f"/api/v1/classes/{study_class['id']}/leaderboard",
+                          params={"by": "terms_mastered"}, headers=users["alice"]).json()
+        assert data["me"]["value"] == 1
+
+    def test_deleted_term_does_not_block_the_flush(self, users, study_class, study_set_terms, assigned):
+        _grade(users["alice"], study_set_terms, ["con cho", "con meo", "con voi"])
+        db = TestingSessionLocal()
+        db.query(Term).filter(Term.id == study_set_terms[1][0]).delete()
+        db.commit()
+        db.close()
+
+        assert leaderboard_flusher.flush(TestingSessionLocal()) == 1
+        assert leaderboard_flusher.pending() == 0
+        assert _member("alice") == (3, 2)
+
+    def test_repeated_term_in_one_batch_scores_once(self, users, study_class, study_set_terms, assigned):
+        study_set_id, term_ids = study_set_terms
+        response = client.post(f"/api/v1/study-sets/{study_set_id}/grade", json={"answers": [
+            {"term_id": term_ids[0], "answer": "con cho"} for _ in range(5)
+        ]}, headers=users["alice"])
+        assert response.status_code == 200
+        leaderboard_flusher.flush(TestingSessionLocal())
+        assert _member("alice") == (1, 1)
+
+
+class TestSortedScores:
+    def test_matches_full_sort(self):
+        rng = random.Random(7)
+        scores = {member: rng.randint(0, 20) for member in range(50)}
+        board = SortedScores(scores)
+        for _ in range(500):
+            member, delta = rng.randrange(60), rng.randint(0, 5)
+            scores[member] = scores.get(member, 0) + delta
+            board.increment(member, delta)
+        expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        assert board.top(10) == expected[:10]
+        for rank, (member, score) in enumerate(expected):
+            assert board.rank(member) == (rank, score)
+        assert board.rank(1000) is None
+
+
+class TestMemoryLeaderboards:
+    def test_increment_skips_boards_loaded_after_the_commit_started(self):
+        boards = MemoryLeaderboards(300)
+        before_load = boards.clock()
+        boards.load("1:score", {1: 5})
+        # Committed after the load: the loaded totals miss the delta
+        boards.increment({"1:score": {1: 2}}, boards.clock())
+        assert boards.rank("1:score", 1) == (0, 7)
+
+        # The commit started before the load, which may already include the delta
+        boards.increment({"1:score": {1: 2}}, before_load)
+        assert not boards.is_loaded("1:score")
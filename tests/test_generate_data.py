@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from app.models import User, StudySet, Term
+from scripts.generate_data import Scale, _CopyStream, generate_data, iter_layout, term_rows
+
+SCALE = Scale(users=12, sets_per_user=3, median_terms=8, max_terms=60)
+
+
+class TestGenerateData:
+    def test_counters_match_loaded_rows(self, tmp_path):
+        """Test denormalized counters agree with the rows loaded in the same pass"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+        counts = generate_data(None, SCALE, seed=7, engine=engine, defer_indexes=True)
+
+        with engine.connect() as connection:
+            assert connection.scalar(select(func.count()).select_from(User)) == counts["users"] == SCALE.users
+            assert connection.scalar(select(func.count()).select_from(StudySet)) == counts["study_sets"]
+            assert connection.scalar(select(func.count()).select_from(Term)) == counts["terms"]
+
+            terms_per_set = dict(connection.execute(
+                select(Term.study_set_id, func.count()).group_by(Term.study_set_id)
+            ).all())
+            for study_set_id, terms_count in connection.execute(select(StudySet.id, StudySet.terms_count)):
+                assert terms_per_set[study_set_id] == terms_count
+
+            sets_per_user = dict(connection.execute(
+                select(StudySet.user_id, func.count()).group_by(StudySet.user_id)
+            ).all())
+            for user_id, created in connection.execute(select(User.id, User.total_study_sets_created)):
+                assert sets_per_user.get(user_id, 0) == created
+        engine.dispose()
+
+    def test_refuses_filled_tables_without_reset(self, tmp_path):
+        """Test loading again only replaces the data when reset is asked for"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+        generate_data(None, SCALE, seed=7, engine=engine)
+        with pytest.raises(ValueError, match="already hold rows"):
+            generate_data(None, SCALE, seed=8, engine=engine)
+
+        counts = generate_data(None, SCALE, seed=8, engine=engine, reset=True)
+        with engine.connect() as connection:
+            assert connection.scalar(select(func.count()).select_from(User)) == counts["users"]
+        engine.dispose()
+
+    def test_same_seed_same_data(self):
+        """Test the layout and rows are reproducible from the seed"""
+        assert list(iter_layout(SCALE, 3)) == list(iter_layout(SCALE, 3))
+        assert list(term_rows(SCALE, 3)) == list(term_rows(SCALE, 3))
+        assert list(term_rows(SCALE, 3)) != list(term_rows(SCALE, 4))
+
+    def test_copy_stream_escapes_and_chunks(self):
+        """Test COPY text rendering escapes specials and survives small reads"""
+        rows = [(1, "tab\there", None, True), (2, "line\nbreak \\ slash", 1.5, False)]
+        stream = _CopyStream(rows)
+        chunks = []
+        while True:
+            chunk = stream.read(5)
+            if not chunk:
+                break
+            assert len(chunk) <= 5
+            chunks.append(chunk)
+
+        assert "".join(chunks) == "1\ttab\\there\t\\N\tt\n2\tline\\nbreak \\\\ slash\t1.5\tf\n"
+        assert stream.count == 2
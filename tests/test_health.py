@@ -0,0 +1,106 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from app.core import database, health
+from app.core.config import settings
+from app.main import app
+from app.services.leaderboard_service import leaderboard_flusher
+
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def probe(monkeypatch):
+    """Readiness checks against the test database, with nothing cached"""
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "replica_engines", [])
+    monkeypatch.setattr(leaderboard_flusher, "is_running", lambda: True)
+    health.reset_cache()
+    yield
+    health.reset_cache()
+
+
+class TestLiveness:
+    def test_livez(self):
+        assert client.get("/livez").json() == {"status": "alive"}
+        assert client.get("/health").status_code == 200
+
+
+class TestReadiness:
+    def test_ready(self):
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["checks"]["database"]["status"] == "ok"
+        assert data["checks"]["leaderboard_flusher"]["running"] is True
+        assert "redis" not in data["checks"]  # Nothing uses Redis
+
+    def test_database_down_is_unavailable(self, monkeypatch):
+        monkeypatch.setattr(database, "engine", create_engine("sqlite:////nonexistent/directory/quizlet.db"))
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+        assert response.json()["checks"]["database"]["status"] == "fail"
+
+    def test_saturated_pool_is_unavailable(self, monkeypatch):
+        small = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=QueuePool, pool_size=1, max_overflow=0,
+                              pool_timeout=0.1, connect_args={"check_same_thread": False})
+        monkeypatch.setattr(database, "engine", small)
+        with small.connect():
+            response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["checks"]["pool"] == {"status": "fail", "usage": {"primary": 1.0}}
+
+    def test_flusher_down_is_degraded(self, monkeypatch):
+        monkeypatch.setattr(leaderboard_flusher, "is_running", lambda: False)
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "degraded"
+
+    def test_slow_check_times_out(self, monkeypatch):
+        monkeypatch.setattr(settings, "readiness_timeout", 0.1)
+        monkeypatch.setattr(health, "check_database", lambda: time.sleep(0.5) or {"status": "ok"})
+        started = time.monotonic()
+        response = client.get("/readyz")
+        assert time.monotonic() - started < 0.4
+        assert response.status_code == 503
+        assert "timed out" in response.json()["checks"]["database"]["error"]
+
+    def test_hung_check_is_not_submitted_again(self, monkeypatch):
+        """A check still running from an earlier probe keeps failing without queueing another run"""
+        monkeypatch.setattr(settings, "readiness_timeout", 0.1)
+        release = threading.Event()
+        calls = []
+        monkeypatch.setattr(health, "check_database", lambda: calls.append(1) or release.wait(5) and {"status": "ok"})
+        try:
+            for _ in range(3):
+                health._cached = None  # Expire the cached result but keep the running check
+                response = client.get("/readyz")
+                assert response.status_code == 503
+                assert "timed out" in response.json()["checks"]["database"]["error"]
+            assert len(calls) == 1
+        finally:
+            release.set()
+
+        health._in_flight["database"][1].result(timeout=1)
+        health._cached = None
+        assert client.get("/readyz").json()["status"] == "ready"
+        assert len(calls) == 2
+
+    def test_results_are_cached(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(health, "check_database", lambda: calls.append(1) or {"status": "ok"})
+        for _ in range(5):
+            assert client.get("/readyz").json()["status"] == "ready"
+        assert len(calls) == 1
+
+        health.reset_cache()
+        client.get("/readyz")
+        assert len(calls) == 2
@@ -0,0 +1,141 @@
+import hashlib
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.security import create_access_token, get_password_hash
+from app.main import app
+from app.models.user import User
+from app.services import media_service
+from app.services.media_service import MediaProcessor, media_path
+from app.utils import media
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64
+
+
+@pytest.fixture
+def auth_headers(tmp_path, monkeypatch):
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    user = User(username="uploader", email="uploader@example.com", password_hash=get_password_hash("password"))
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.username, "user_id": user.id})
+    db.close()
+    yield {"Authorization": f"Bearer {token}"}
+    Base.metadata.drop_all(bind=engine)
+
+
+def upload(body, headers, content_type="image/png"):
+    return client.post("/api/v1/media/", content=body, headers={**headers, "Content-Type": content_type})
+
+
+class TestMediaUpload:
+    def test_upload_is_content_addressed(self, auth_headers):
+        """Test the file is stored under its hash and identical uploads are stored once"""
+        response = upload(PNG, auth_headers)
+
+        assert response.status_code == 201
+        data = response.json()
+        digest = hashlib.sha256(PNG).hexdigest()
+        assert data["hash"] == digest
+        assert data["size"] == len(PNG)
+        assert data["url"] == f"/media/{digest[:2]}/{digest}.png"
+        assert data["deduplicated"] is False
+        assert media_path(f"{digest}.png").read_bytes() == PNG
+
+        again = upload(PNG, auth_headers).json()
+        assert again["url"] == data["url"]
+        assert again["deduplicated"] is True
+        # No partial files are left behind
+        assert list(media_path(f"{digest}.png").parent.parent.joinpath("partial").iterdir()) == []
+
+    def test_uploaded_file_is_served(self, auth_headers):
+        """Test the returned URL serves the content with immutable caching"""
+        url = upload(PNG, auth_headers).json()["url"]
+
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert response.content == PNG
+        assert response.headers["content-type"] == "image/png"
+        assert "immutable" in response.headers["cache-control"]
+        assert client.get("/media/ab/../../etc/passwd").status_code == 404
+        assert client.get("/media/00/" + "0" * 64 + ".png").status_code == 404
+
+    def test_url_can_be_used_for_a_term(self, auth_headers):
+        """Test the URL goes straight into a term's image_url"""
+        url = upload(PNG, auth_headers).json()["url"]
+        study_set = client.post("/api/v1/study-sets/", json={"title": "Pictures"}, headers=auth_headers).json()
+
+        response = client.post(f"/api/v1/study-sets/{study_set['id']}/terms/",
+                               json={"term": "Cat", "definition": "Meo", "image_url": url}, headers=auth_headers)
+
+        assert response.status_code == 201
+        assert response.json()["image_url"] == url
+
+    def test_thumbnail_is_scheduled_once(self, auth_headers, monkeypatch):
+        """Test new images get a thumbnail job in the pool and its URL in the response"""
+        jobs = []
+        monkeypatch.setattr(media, "thumbnails_available", lambda: True)
+        monkeypatch.setattr(media_service.media_processor, "submit", lambda fn, *args: jobs.append(args) or True)
+
+        data = upload(PNG, auth_headers).json()
+
+        assert data["thumbnail_url"] == f"/media/{data['hash'][:2]}/{data['hash']}_thumb.jpg"
+        source, target, size = jobs[0]
+        assert source == str(media_path(f"{data['hash']}.png"))
+        assert size == settings.media_thumbnail_size
+
+        # Once the thumbnail exists, uploading the same image again does not redo it
+        media_path(f"{data['hash']}_thumb.jpg").write_bytes(b"thumb")
+        assert upload(PNG, auth_headers).json()["thumbnail_url"] == data["thumbnail_url"]
+        assert len(jobs) == 1
+
+    def test_rejected_uploads(self, auth_headers, monkeypatch):
+        """Test unsupported types, empty bodies and oversized files are refused"""
+        monkeypatch.setattr(settings, "max_file_size", 1000)
+
+        assert upload(b"<html></html>", auth_headers, "text/html").status_code == 415
+        assert upload(b"", auth_headers).status_code == 400
+        assert upload(PNG, auth_headers).status_code == 413
+        assert upload(b"x" * 10, {}).status_code == 403
+
+
+class TestMediaProcessor:
+    def test_pending_jobs_are_bounded(self):
+        """Test jobs beyond max_pending are skipped instead of queued"""
+        processor = MediaProcessor(workers=1, max_pending=1)
+        try:
+            assert processor.submit(time.sleep, 0.5) is True
+            assert processor.submit(time.sleep, 0.5) is False
+            assert processor.stats()["skipped"] == 1
+        finally:
+            processor.shutdown()
+
+    def test_disabled_without_workers(self):
+        """Test no pool is started when media_workers is 0"""
+        processor = MediaProcessor(workers=0, max_pending=10)
+        assert processor.submit(time.sleep, 0) is False
+        assert processor._executor is None
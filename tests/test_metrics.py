@@ -0,0 +1,128 @@
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.boot import BootTimer
+from app.core.database import Base, get_db
+from app.core.metrics import Counter, Histogram, instrument_engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models.study_set import StudySet
+from app.models.user import User
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+@pytest.fixture
+def test_db():
+    # Other test modules install their own override; SQL is only timed on this module's engine
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+def sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestCollectors:
+    def test_counter_sums_thread_shards(self):
+        """Test increments from many threads are all counted"""
+        counter = Counter("test_sharded_total", "Test counter", ("kind",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc("a")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.values() == {("a",): 4000}
+        assert 'test_sharded_total{kind="a"} 4000' in counter.collect()
+
+    def test_histogram_exposition(self):
+        """Test cumulative buckets, sum and count"""
+        histogram = Histogram("test_latency_seconds", "Test histogram", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, "/x")
+
+        lines = histogram.collect()
+
+        assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="1"} 2' in lines
+        assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_sum{route="/x"} 5.55' in lines
+        assert 'test_latency_seconds_count{route="/x"} 3' in lines
+
+
+class TestMetricsEndpoint:
+    def test_request_metrics_by_route_template(self, test_db):
+        """Test latency and SQL usage are recorded per route template"""
+        db = TestingSessionLocal()
+        user = User(username="owner", email="owner@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        study_set = StudySet(title="Metrics", user_id=user.id, is_public=True)
+        db.add(study_set)
+        db.commit()
+        study_set_id = study_set.id
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'owner', 'user_id': user.id})}"}
+        db.close()
+
+        route = 'method="GET",route="/api/v1/study-sets/{study_set_id}"'
+        before = client.get("/metrics").text
+        count_before = sample(before, f"http_request_duration_seconds_count{{{route},status=\"200\"}}") or 0
+
+        assert client.get(f"/api/v1/study-sets/{study_set_id}", headers=headers).status_code == 200
+        assert client.get(f"/api/v1/study-sets/{study_set_id}", headers=headers).status_code == 200
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert sample(text, f"http_request_duration_seconds_count{{{route},status=\"200\"}}") == count_before + 2
+        assert sample(text, f"db_queries_per_request_sum{{{route}}}") > 0
+        assert sample(text, f"http_requests_in_flight{{{route}}}") == 0
+        assert "# TYPE db_pool_checkouts_total counter" in text
+        assert 'singleflight_stats{flight="study_set_detail",stat="executions"}' in text
+
+
+class TestBoot:
+    def test_boot_phases(self):
+        """Test boot phases are timed and exported"""
+        timer = BootTimer()
+        timer.mark("imports")
+        timer.finish()
+        timer.finish()
+        assert [phase for phase, _ in timer.phases] == ["imports", "startup events"]
+        assert timer.ready >= sum(seconds for _, seconds in timer.phases) - 1e-9
+        assert "total" in timer.report()
+
+        text = client.get("/metrics").text
+        assert sample(text, 'boot_phase_seconds{phase="import routers and models"}') > 0
@@ -0,0 +1,73 @@
+import json
+import time
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute, instrument_engine
+
+engine = create_engine("sqlite://")
+instrument_engine(engine)
+
+
+def get_connection():
+    with engine.connect() as connection:
+        yield connection
+
+
+def make_client():
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get("/work/{n}")
+    def work(n: int, connection=Depends(get_connection)):
+        total = connection.execute(text("SELECT :n * 2"), {"n": n}).scalar()
+        time.sleep(0.02)
+        return {"total": total}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def profiling_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "profiling_token", "secret")
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_sample_interval", 0.001)
+    return tmp_path
+
+
+class TestProfiling:
+    def test_profile_with_token(self, profiling_settings):
+        """Test a request with the admin token writes pstats, collapsed stacks and SQL"""
+        client = make_client()
+
+        response = client.get("/work/21", headers={"X-Profile-Token": "secret"})
+
+        assert response.status_code == 200
+        assert response.json() == {"total": 42}
+        directory = profiling_settings / "profiles" / response.headers["x-profile-id"]
+        assert (directory / "profile.pstats").stat().st_size > 0
+        stacks = (directory / "stacks.collapsed").read_text()
+        assert "test_profiling.py:work" in stacks
+        sql = json.loads((directory / "sql.json").read_text())
+        assert sql["path"] == "/work/{n}"
+        assert sql["queries"] == 1
+        assert "SELECT" in sql["statements"][0]["statement"]
+
+    def test_no_profile_without_token(self, profiling_settings):
+        """Test ordinary and wrong-token requests are not profiled"""
+        client = make_client()
+
+        assert "x-profile-id" not in client.get("/work/1").headers
+        assert "x-profile-id" not in client.get("/work/1", headers={"X-Profile-Token": "wrong"}).headers
+        assert not (profiling_settings / "profiles").exists()
+
+    def test_sampled_profile(self, profiling_settings, monkeypatch):
+        """Test the sampling rate profiles requests without the header"""
+        monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+        client = make_client()
+
+        assert "x-profile-id" in client.get("/work/1").headers
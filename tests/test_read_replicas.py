@@ -0,0 +1,143 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.core import database
+from app.core.database import Base, RoutingSession, get_db, sign_write_marker, write_marker_applies
+from app.core.security import create_access_token, get_password_hash
+from app.main import app
+from app.models.study_set import StudySet
+from app.models.user import User
+from app.services.study_set_service import StudySetService
+
+
+# Test database setup: the replica (created per test under tmp_path) never receives the writes
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def replica_engine(tmp_path):
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    yield replica
+    replica.dispose()
+
+
+@pytest.fixture
+def replicas(monkeypatch, replica_engine):
+    app.dependency_overrides[get_db] = override_get_db
+    client.cookies.clear()
+    monkeypatch.setattr(database, "replica_engines", [replica_engine])
+    monkeypatch.setattr(database, "ReplicaSessionLocal", sessionmaker(
+        class_=RoutingSession, primary=engine, replica=replica_engine, autocommit=False, autoflush=False
+    ))
+    monkeypatch.setattr(database.settings, "database_replica_lag_window", 60)
+    for bound in (engine, replica_engine):
+        Base.metadata.create_all(bind=bound)
+    yield
+    for bound in (engine, replica_engine):
+        Base.metadata.drop_all(bind=bound)
+
+
+@pytest.fixture
+def owner(replicas):
+    db = TestingSessionLocal()
+    user = User(username="owner", email="owner@example.com", password_hash=get_password_hash("password"))
+    db.add(user)
+    db.commit()
+    study_set = StudySet(title="Lagging", user_id=user.id, is_public=True)
+    db.add(study_set)
+    db.commit()
+    ids = user.id, study_set.id
+    db.close()
+    return ids
+
+
+class TestRoutingSession:
+    def test_reads_go_to_replica_and_writes_to_primary(self, owner, replica_engine):
+        """Test selects use the replica while the view counter update hits the primary"""
+        _, study_set_id = owner
+        db = RoutingSession(primary=engine, replica=replica_engine)
+        try:
+            assert db.execute(select(StudySet)).first() is None
+            StudySetService.increment_views(db, study_set_id)
+        finally:
+            db.close()
+
+        primary = TestingSessionLocal()
+        assert primary.get(StudySet, study_set_id).views_count == 1
+        primary.close()
+
+    def test_write_marker_expires(self, monkeypatch):
+        """Test a marker only pins its own user to the primary, until its deadline"""
+        now = [1000.0]
+        monkeypatch.setattr(database.time, "time", lambda: now[0])
+        marker = sign_write_marker(1, now[0] + 5)
+
+        assert write_marker_applies(marker, 1)
+        assert not write_marker_applies(marker, 2)
+        assert not write_marker_applies(marker, None)
+        assert not write_marker_applies(None, 1)
+        now[0] += 6
+        assert not write_marker_applies(marker, 1)
+
+    def test_write_marker_is_signed(self):
+        """Test a marker with a forged user id or deadline is ignored"""
+        user_id, until, signature = sign_write_marker(1, 2000000000).split(".")
+        assert not write_marker_applies(f"2.{until}.{signature}", 2)
+        assert not write_marker_applies(f"{user_id}.4000000000.{signature}", 1)
+        assert not write_marker_applies("garbage", 1)
+
+
+class TestReadRouting:
+    def test_anonymous_reads_come_from_replica(self, owner):
+        """Test read-only endpoints query the replica"""
+        response = client.get("/api/v1/study-sets/")
+        assert response.status_code == 200
+        assert response.json()["total"] == 0
+
+    def test_writer_reads_own_write_from_primary(self, owner):
+        """Test a user who just wrote is routed to the primary, others still read the replica"""
+        user_id, study_set_id = owner
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'owner', 'user_id': user_id})}"}
+        other = {"Authorization": f"Bearer {create_access_token({'sub': 'other', 'user_id': user_id + 1})}"}
+
+        # Before any write the owner reads the (empty) replica too
+        assert client.get("/api/v1/study-sets/", headers=headers).json()["total"] == 0
+
+        response = client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "Renamed"}, headers=headers)
+        assert response.status_code == 200
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["title"] == "Renamed"
+        assert client.get("/api/v1/study-sets/", headers=headers).json()["total"] == 1
+        assert client.get("/api/v1/study-sets/", headers=other).json()["total"] == 0
+
+    def test_marker_routes_reads_on_any_worker(self, owner):
+        """Test the marker from the write response is enough on its own: a client
+        without the cookie (as seen by another worker) reads the primary with it"""
+        user_id, study_set_id = owner
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'owner', 'user_id': user_id})}"}
+
+        response = client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "Renamed"}, headers=headers)
+        assert response.status_code == 200
+        marker = response.headers["X-Last-Write"]
+        client.cookies.clear()
+
+        assert client.get("/api/v1/study-sets/", headers=headers).json()["total"] == 0
+        with_marker = {**headers, "X-Last-Write": marker}
+        assert client.get("/api/v1/study-sets/", headers=with_marker).json()["total"] == 1
+        assert client.get(f"/api/v1/study-sets/{study_set_id}", headers=with_marker).json()["title"] == "Renamed"
@@ -0,0 +1,165 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.user import User
+from app.models.study_set import StudySet, Term
+from app.models.report import Report
+from app.core.security import get_password_hash
+from app.services.moderation_service import ModerationService, ModerationStats
+
+
+# Test database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+@pytest.fixture
+def test_db():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def test_user(test_db):
+    """Create a test user"""
+    db = TestingSessionLocal()
+    user = User(
+        username="testuser",
+        email="test@example.com",
+        password_hash=get_password_hash("testpassword"),
+        full_name="Test User"
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.close()
+    return user
+
+
+@pytest.fixture
+def auth_headers(test_user):
+    """Get authentication headers for test user"""
+    response = client.post("/api/v1/auth/login", json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def spam_term(test_user):
+    """Create a study set with one spammy term"""
+    db = TestingSessionLocal()
+    study_set = StudySet(title="Spam", user_id=test_user.id, is_public=True)
+    db.add(study_set)
+    db.commit()
+    term = Term(
+        term="Buy now",
+        definition="http://a.example http://b.example http://c.example",
+        study_set_id=study_set.id,
+        position=1
+    )
+    db.add(term)
+    db.commit()
+    db.refresh(term)
+    db.close()
+    return term
+
+
+class TestReports:
+    def test_create_report(self, test_db, auth_headers, spam_term):
+        """Test reporting a term"""
+        report_data = {"reported_entity_type": "term", "reported_entity_id": spam_term.id, "reason": "spam"}
+
+        response = client.post("/api/v1/reports/", json=report_data, headers=auth_headers)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["status"] == "pending"
+        assert data["reported_entity_id"] == spam_term.id
+
+        # A second open report for the same term is rejected
+        response = client.post("/api/v1/reports/", json=report_data, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_report_missing_entity(self, test_db, auth_headers):
+        """Test reporting content that does not exist"""
+        report_data = {"reported_entity_type": "study_set", "reported_entity_id": 999}
+
+        response = client.post("/api/v1/reports/", json=report_data, headers=auth_headers)
+
+        assert response.status_code == 404
+
+    def test_worker_screens_pending_reports(self, test_db, test_user, spam_term):
+        """Test the worker claims, screens and writes back a batch"""
+        db = TestingSessionLocal()
+        db.add_all([
+            Report(reported_by_user_id=test_user.id, reported_entity_type="term",
+                   reported_entity_id=spam_term.id, status="pending"),
+            Report(reported_by_user_id=test_user.id, reported_entity_type="study_set",
+                   reported_entity_id=999, status="pending")
+        ])
+        db.commit()
+        db.close()
+
+        stats = ModerationService.run_worker(TestingSessionLocal, batch_size=1, stop_when_empty=True)
+
+        assert stats.processed == 2
+        assert stats.batches == 2
+        assert stats.flagged == 1
+        assert stats.dismissed == 1
+
+        db = TestingSessionLocal()
+        reports = db.query(Report).order_by(Report.id).all()
+        assert reports[0].status == "reviewed"
+        assert reports[0].screening_score >= 0.5
+        assert reports[1].status == "dismissed"
+        assert reports[1].resolved_at is not None
+        db.close()
+
+    def test_batch_counts_only_rows_it_wrote(self, test_db, test_user, spam_term, monkeypatch):
+        """Test reports written by another worker after the claim are not counted again"""
+        db = TestingSessionLocal()
+        reports = [
+            Report(reported_by_user_id=test_user.id, reported_entity_type="term",
+                   reported_entity_id=spam_term.id, status="pending"),
+            Report(reported_by_user_id=test_user.id, reported_entity_type="study_set",
+                   reported_entity_id=999, status="pending")
+        ]
+        db.add_all(reports)
+        db.commit()
+        claimed = [(report.id, report.reported_entity_type, report.reported_entity_id) for report in reports]
+        db.close()
+
+        def claim_then_lose_race(session, batch_size):
+            # Another worker writes the flagged term report between the claim and the write
+            other = TestingSessionLocal()
+            other.query(Report).filter(Report.id == claimed[0][0]).update({Report.status: "reviewed"})
+            other.commit()
+            other.close()
+            return claimed
+
+        monkeypatch.setattr(ModerationService, "claim_batch", claim_then_lose_race)
+        stats = ModerationStats()
+        db = TestingSessionLocal()
+        assert ModerationService.process_batch(db, 10, stats) == 1
+        db.close()
+        assert (stats.processed, stats.flagged, stats.dismissed) == (1, 0, 1)
@@ -0,0 +1,43 @@
+import pytest
+import uvicorn
+from app.core import server
+from app.core.server import WorkerPlan, plan_workers, MIN_CONNECTIONS_PER_WORKER
+
+
+class TestWorkerPlan:
+    def test_one_worker_per_cpu(self):
+        """Test auto-sizing uses the CPUs and keeps the configured pool when it fits"""
+        plan = plan_workers(cpu_count=4, max_connections=100)
+        assert (plan.workers, plan.pool_size, plan.max_overflow) == (4, 5, 10)
+        assert plan.max_connections == 60
+
+    def test_pools_shrink_to_fit_connection_limit(self):
+        """Test pools are cut down so all workers stay within the database limit"""
+        for cpu_count in (1, 2, 8, 32, 96):
+            for max_connections in (2, 7, 20, 100, 500):
+                plan = plan_workers(cpu_count, max_connections)
+                assert 1 <= plan.workers <= cpu_count
+                assert plan.max_connections <= max_connections
+                assert plan.pool_size >= 1
+
+        # 32 CPUs but only 20 connections: fewer workers, each with a small pool
+        plan = plan_workers(cpu_count=32, max_connections=20)
+        assert plan.workers == 20 // MIN_CONNECTIONS_PER_WORKER
+        assert (plan.pool_size, plan.max_overflow) == (2, 0)
+
+    def test_requested_workers(self):
+        """Test an explicit worker count is kept and an impossible one refused"""
+        plan = plan_workers(cpu_count=2, max_connections=30, requested_workers=6)
+        assert (plan.workers, plan.pool_size, plan.max_overflow) == (6, 5, 0)
+
+        with pytest.raises(ValueError):
+            plan_workers(cpu_count=2, max_connections=4, requested_workers=5)
+
+
+class TestUvicornFallback:
+    def test_single_server_is_not_recycled(self, monkeypatch):
+        """Test the lone uvicorn server has no request limit: nothing would restart it"""
+        calls = []
+        monkeypatch.setattr(uvicorn, "run", lambda *args, **kwargs: calls.append(kwargs))
+        server._run_uvicorn(WorkerPlan(workers=1, pool_size=5, max_overflow=10), "127.0.0.1", 8000)
+        assert "limit_max_requests" not in calls[0]
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.core.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        """Test threads asking for the same key wait for the leader's result"""
+        flight = SingleFlight("test_concurrent")
+        release = threading.Event()
+        executions = []
+
+        def load():
+            executions.append(1)
+            release.wait(5)
+            return b"payload"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("set-1", load))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while flight.calls < 8:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert results == [b"payload"] * 8
+        assert len(executions) == 1
+        assert flight.stats() == {"calls": 8, "executions": 1, "coalesced": 7, "in_flight": 0}
+
+    def test_finished_calls_are_not_cached(self):
+        """Test a call after the flight landed runs again"""
+        flight = SingleFlight("test_sequential")
+        counter = iter(range(10))
+
+        assert flight.do("key", lambda: next(counter)) == 0
+        assert flight.do("key", lambda: next(counter)) == 1
+        assert flight.coalesced == 0
+
+    def test_exception_is_shared(self):
+        """Test waiters get the leader's exception and the key is released"""
+        flight = SingleFlight("test_exception")
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flight.do("key", fail)
+        assert flight.in_flight == 0
+        assert flight.do("key", lambda: "ok") == "ok"
+
+    def test_async_callers_join_sync_flight(self):
+        """Test async handlers coalesce with a call running in a worker thread"""
+        flight = SingleFlight("test_async")
+        release = threading.Event()
+
+        def load():
+            release.wait(5)
+            return "shared"
+
+        leader_result = []
+        leader = threading.Thread(target=lambda: leader_result.append(flight.do("key", load)))
+        leader.start()
+        while flight.in_flight == 0:
+            time.sleep(0.01)
+
+        async def followers():
+            tasks = [asyncio.ensure_future(flight.do_async("key", load)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        assert asyncio.run(followers()) == ["shared"] * 3
+        leader.join()
+        assert leader_result == ["shared"]
+        assert flight.executions == 1
+        assert flight.coalesced == 3
+
+    def test_async_leader(self):
+        """Test an async caller can lead a flight"""
+        flight = SingleFlight("test_async_leader")
+
+        async def run():
+            return await asyncio.gather(*[flight.do_async("key", lambda: 42) for _ in range(3)])
+
+        assert asyncio.run(run()) == [42, 42, 42]
+        assert flight.calls == 3
@@ -1,11 +1,17 @@
+import random
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.core.database import Base, get_db
 from app.main import app
 from app.models.user import User
 from app.models.study_set import StudySet, Term
+from app.schemas.study_set import StudySetDetailResponse
+from app.services.quiz_service import deck_features_cache
+from app.services.grading_service import references_cache
+from app.services.suggest_service import TitleIndex, title_index
+from app.services.facet_service import FacetService
 from app.core.security import get_password_hash
 
 
@@ -54,7 +60,7 @@ def test_user(test_db):
 @pytest.fixture
 def auth_headers(test_user):
     """Get authentication headers for test user"""
-    response = client.post("/api/v1/auth/login", data={
+    response = client.post("/api/v1/auth/login", json={
         "username": "testuser",
         "password": "testpassword"
     })
@@ -170,6 +176,34 @@ class TestStudySets:
         data = response.json()
         assert len(data["items"]) >= 3
 
+    def test_fuzzy_search(self, test_db, auth_headers):
+        """Test the fuzzy mode ignores accents, tolerates typos and ranks the best match first"""
+        for title, description in [("Tiếng Anh cơ bản", "Từ vựng hằng ngày"), ("Toán học", None),
+                                   ("Vocabulary", "Tiếng Anh giao tiếp nâng cao")]:
+            client.post("/api/v1/study-sets/", json={"title": title, "description": description}, headers=auth_headers)
+
+        def titles(query):
+            response = client.get(f"/api/v1/study-sets/?{query}", headers=auth_headers)
+            assert response.status_code == 200
+            return [item["title"] for item in response.json()["items"]]
+
+        assert titles("search=tieng anh") == []
+        assert titles("search=tieng anh co ban&search_mode=fuzzy") == ["Tiếng Anh cơ bản", "Vocabulary"]
+        assert titles("search=tiegn anh&search_mode=fuzzy")[0] == "Tiếng Anh cơ bản"
+        assert titles("search=TOAN&search_mode=fuzzy") == ["Toán học"]
+        assert client.get("/api/v1/study-sets/?search_mode=regex", headers=auth_headers).status_code == 422
+
+    def test_search_text_follows_edits(self, test_db, auth_headers):
+        """Test renames and clones keep the fuzzy search column current"""
+        study_set = client.post("/api/v1/study-sets/", json={"title": "Đường phố"}, headers=auth_headers).json()
+        client.put(f"/api/v1/study-sets/{study_set['id']}", json={"title": "Giao thông"}, headers=auth_headers)
+        client.post(f"/api/v1/study-sets/{study_set['id']}/clone", json={"title": "Xe đạp"}, headers=auth_headers)
+
+        db = TestingSessionLocal()
+        search_texts = [row.search_text for row in db.query(StudySet).order_by(StudySet.id)]
+        db.close()
+        assert search_texts == ["giao thong", "xe dap"]
+
 
 class TestTerms:
     def test_create_term(self, test_db, auth_headers, test_user):
@@ -221,6 +255,7 @@ class TestTerms:
         for term in terms:
             db.add(term)
         db.commit()
+        db.refresh(study_set)
         db.close()
         
         response = client.get(f"/api/v1/study-sets/{study_set.id}/terms/", headers=auth_headers)
@@ -231,6 +266,89 @@ class TestTerms:
         assert data[0]["term"] == "Hello"
         assert data[1]["term"] == "Goodbye"
 
+    def test_detail_response_matches_schema(self, test_db, auth_headers, test_user):
+        """Test the orjson fast path renders exactly what the response model would"""
+        response = client.post("/api/v1/study-sets/", json={"title": "Schema"}, headers=auth_headers)
+        study_set_id = response.json()["id"]
+        client.post(f"/api/v1/study-sets/{study_set_id}/terms/bulk", json={"terms": [
+            {"term": "Hello", "definition": "Xin chào"},
+            {"term": "Goodbye", "definition": "Tạm biệt", "image_url": "/img.png"}
+        ]}, headers=auth_headers)
+
+        data = client.get(f"/api/v1/study-sets/{study_set_id}", headers=auth_headers).json()
+
+        assert len(data["terms"]) == 2
+        assert StudySetDetailResponse.model_validate(data).model_dump(mode="json") == data
+
+    def test_paginate_terms(self, test_db, auth_headers, test_user):
+        """Test position-range pages of terms and the detail continuation cursor"""
+        response = client.post("/api/v1/study-sets/", json={"title": "Big deck"}, headers=auth_headers)
+        study_set_id = response.json()["id"]
+        client.post(f"/api/v1/study-sets/{study_set_id}/terms/bulk", json={"terms": [
+            {"term": f"Term {i}", "definition": f"Definition {i}"} for i in range(1, 6)
+        ]}, headers=auth_headers)
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}?terms_limit=2", headers=auth_headers)
+        data = response.json()
+        assert [term["term"] for term in data["terms"]] == ["Term 1", "Term 2"]
+        cursor, after_id = data["next_terms_cursor"], data["next_terms_after_id"]
+
+        seen = [term["term"] for term in data["terms"]]
+        while cursor is not None:
+            response = client.get(
+                f"/api/v1/study-sets/{study_set_id}/terms/?after_position={cursor}&after_id={after_id}&limit=2",
+                headers=auth_headers
+            )
+            assert response.status_code == 200
+            seen.extend(term["term"] for term in response.json())
+            cursor = response.headers.get("x-next-after-position")
+            after_id = response.headers.get("x-next-after-id")
+        assert seen == [f"Term {i}" for i in range(1, 6)]
+
+        # Without limits the whole deck is returned
+        data = client.get(f"/api/v1/study-sets/{study_set_id}", headers=auth_headers).json()
+        assert len(data["terms"]) == 5
+        assert data["next_terms_cursor"] is None
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}/terms/?limit=100000", headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_paginate_terms_with_tied_positions(self, test_db, auth_headers, test_user):
+        """Test pages continue after (position, id), so terms sharing a position are not skipped"""
+        response = client.post("/api/v1/study-sets/", json={"title": "Tied deck"}, headers=auth_headers)
+        study_set_id = response.json()["id"]
+        terms = client.post(f"/api/v1/study-sets/{study_set_id}/terms/bulk", json={"terms": [
+            {"term": f"Term {i}", "definition": f"Definition {i}"} for i in range(1, 5)
+        ]}, headers=auth_headers).json()
+        ids = [term["id"] for term in terms]
+        # Reordering a subset renumbers it from 1: positions become 1, 2, 2, 1
+        client.put(f"/api/v1/study-sets/{study_set_id}/terms/reorder",
+                   json={"term_ids": [ids[3]]}, headers=auth_headers)
+        expected = [term["id"] for term in client.get(
+            f"/api/v1/study-sets/{study_set_id}/terms/", headers=auth_headers
+        ).json()]
+        positions = [term["position"] for term in client.get(
+            f"/api/v1/study-sets/{study_set_id}/terms/", headers=auth_headers
+        ).json()]
+        assert len(set(positions)) < len(positions)
+
+        for limit in (1, 2, 3):
+            seen, params = [], {"limit": limit}
+            while True:
+                response = client.get(f"/api/v1/study-sets/{study_set_id}/terms/", params=params,
+                                      headers=auth_headers)
+                seen.extend(term["id"] for term in response.json())
+                if "x-next-after-position" not in response.headers:
+                    break
+                params = {"limit": limit, "after_position": response.headers["x-next-after-position"],
+                          "after_id": response.headers["x-next-after-id"]}
+            assert seen == expected
+
+            data = client.get(f"/api/v1/study-sets/{study_set_id}?terms_limit={limit}", headers=auth_headers).json()
+            assert [term["id"] for term in data["terms"]] == expected[:limit]
+            last = data["terms"][-1]
+            assert (data["next_terms_cursor"], data["next_terms_after_id"]) == (last["position"], last["id"])
+
     def test_bulk_create_terms(self, test_db, auth_headers, test_user):
         """Test creating multiple terms at once"""
         # Create a study set first
@@ -260,4 +378,645 @@ class TestTerms:
         assert len(data) == 3
         assert data[0]["term"] == "Hello"
         assert data[1]["term"] == "Goodbye"
-        assert data[2]["term"] == "Thank you" 
\ No newline at end of file
+        assert data[2]["term"] == "Thank you" 
+
+    def test_reorder_terms(self, test_db, auth_headers, test_user):
+        """Test reordering terms"""
+        response = client.post("/api/v1/study-sets/", json={"title": "Reorder"}, headers=auth_headers)
+        study_set_id = response.json()["id"]
+        response = client.post(f"/api/v1/study-sets/{study_set_id}/terms/bulk", json={"terms": [
+            {"term": "One", "definition": "Một"},
+            {"term": "Two", "definition": "Hai"},
+            {"term": "Three", "definition": "Ba"}
+        ]}, headers=auth_headers)
+        term_ids = [term["id"] for term in response.json()]
+
+        response = client.put(f"/api/v1/study-sets/{study_set_id}/terms/reorder",
+                              json={"term_ids": list(reversed(term_ids))}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [term["term"] for term in response.json()] == ["Three", "Two", "One"]
+
+
+class TestVersions:
+    def _create_study_set_with_terms(self, auth_headers):
+        response = client.post("/api/v1/study-sets/", json={"title": "Versioned"}, headers=auth_headers)
+        study_set_id = response.json()["id"]
+        terms_data = {
+            "terms": [
+                {"term": "Hello", "definition": "Xin chào"},
+                {"term": "Goodbye", "definition": "Tạm biệt"},
+                {"term": "Thank you", "definition": "Cảm ơn"}
+            ]
+        }
+        response = client.post(f"/api/v1/study-sets/{study_set_id}/terms/bulk", json=terms_data, headers=auth_headers)
+        return study_set_id, response.json()
+
+    def test_term_edits_are_versioned(self, test_db, auth_headers):
+        """Test that term edits create versions and diffs show term changes"""
+        study_set_id, terms = self._create_study_set_with_terms(auth_headers)
+        client.put(f"/api/v1/study-sets/{study_set_id}/terms/{terms[0]['id']}",
+                   json={"definition": "Chào"}, headers=auth_headers)
+        client.delete(f"/api/v1/study-sets/{study_set_id}/terms/{terms[2]['id']}", headers=auth_headers)
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}/versions", headers=auth_headers)
+        assert response.status_code == 200
+        versions = response.json()
+        assert [v["version_number"] for v in versions] == [3, 2, 1]
+        assert [v["terms_count"] for v in versions] == [3, 3, 0]
+
+        response = client.get(
+            f"/api/v1/study-sets/{study_set_id}/versions/diff?from_version=2&to_version=3",
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        diff = response.json()
+        assert diff["added"] == [] and diff["removed"] == []
+        assert len(diff["modified"]) == 1
+        assert diff["modified"][0]["before"]["definition"] == "Xin chào"
+        assert diff["modified"][0]["after"]["definition"] == "Chào"
+
+    def test_restore_version(self, test_db, auth_headers):
+        """Test restoring the terms of an earlier version"""
+        study_set_id, terms = self._create_study_set_with_terms(auth_headers)
+        client.put(f"/api/v1/study-sets/{study_set_id}/terms/{terms[0]['id']}",
+                   json={"definition": "Chào"}, headers=auth_headers)
+        client.delete(f"/api/v1/study-sets/{study_set_id}/terms/{terms[2]['id']}", headers=auth_headers)
+
+        response = client.post(f"/api/v1/study-sets/{study_set_id}/versions/2/restore", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["terms_count"] == 3
+        assert [t["definition"] for t in data["terms"]] == ["Xin chào", "Tạm biệt", "Cảm ơn"]
+        assert data["terms"][0]["id"] == terms[0]["id"]
+
+    def test_unchanged_terms_are_shared_between_versions(self, test_db, test_user):
+        """Test that a one-term edit stores one new blob and only a few manifest nodes"""
+        from app.models.study_set import TermBlob, VersionNode
+        from app.services.version_service import VersionService
+
+        db = TestingSessionLocal()
+        study_set = StudySet(title="Large", user_id=test_user.id, is_public=True)
+        db.add(study_set)
+        db.commit()
+        db.add_all([
+            Term(term=f"word {i}", definition=f"meaning {i}", study_set_id=study_set.id, position=i)
+            for i in range(1, 1001)
+        ])
+        db.commit()
+        VersionService.store_manifest(db, study_set.id)
+        db.commit()
+        blobs, nodes = db.query(TermBlob).count(), db.query(VersionNode).count()
+
+        term = db.query(Term).filter(Term.position == 500).first()
+        term.definition = "changed"
+        db.commit()
+        VersionService.store_manifest(db, study_set.id)
+        db.commit()
+
+        assert db.query(TermBlob).count() == blobs + 1
+        assert db.query(VersionNode).count() - nodes <= 4
+        db.close()
+
+    def test_term_edit_rehashes_only_the_edited_term(self, test_db, test_user, auth_headers, monkeypatch):
+        """Test that a term edit derives the manifest from the previous one instead of rehashing the deck"""
+        from app.services import version_service
+        from app.services.version_service import VersionService
+
+        db = TestingSessionLocal()
+        study_set = StudySet(title="Legacy", user_id=test_user.id, is_public=True, terms_count=200)
+        db.add(study_set)
+        db.commit()
+        db.add_all([
+            Term(term=f"word {i}", definition=f"meaning {i}", study_set_id=study_set.id, position=i)
+            for i in range(1, 201)
+        ])
+        db.commit()
+        study_set_id = study_set.id
+        term_id = db.query(Term).filter(Term.position == 100).first().id
+        db.close()
+
+        hashed = []
+        term_hash = version_service._term_hash
+        monkeypatch.setattr(version_service, "_term_hash", lambda *fields: hashed.append(fields) or term_hash(*fields))
+
+        # The set predates manifests: the old state is hashed once, the edited term once more
+        response = client.put(f"/api/v1/study-sets/{study_set_id}/terms/{term_id}",
+                              json={"definition": "changed"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(hashed) == 201
+
+        hashed.clear()
+        response = client.put(f"/api/v1/study-sets/{study_set_id}/terms/{term_id}",
+                              json={"definition": "changed again"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(hashed) == 1
+
+        db = TestingSessionLocal()
+        manifest_hash = db.query(StudySet).get(study_set_id).manifest_hash
+        assert VersionService.store_manifest(db, study_set_id) == (manifest_hash, 200)
+        db.close()
+
+    def test_update_bumps_current_version(self, test_db, auth_headers, test_user):
+        """Test that each update gets the next version number from current_version"""
+        from app.models.study_set import StudySetVersion
+
+        response = client.post("/api/v1/study-sets/", json={"title": "Original"}, headers=auth_headers)
+        study_set_id = response.json()["id"]
+        client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "Second"}, headers=auth_headers)
+        response = client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "Third"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["title"] == "Third"
+
+        db = TestingSessionLocal()
+        assert db.query(StudySet).get(study_set_id).current_version == 2
+        versions = db.query(StudySetVersion).order_by(StudySetVersion.version_number).all()
+        assert [(v.version_number, v.title) for v in versions] == [(1, "Original"), (2, "Second")]
+        db.close()
+
+
+class TestConditionalRequests:
+    def _create_study_set(self, auth_headers):
+        response = client.post("/api/v1/study-sets/", json={"title": "Cached"}, headers=auth_headers)
+        return response.json()["id"]
+
+    def test_if_none_match_returns_304(self, test_db, auth_headers):
+        """Test that unchanged study sets and term lists are not re-sent"""
+        study_set_id = self._create_study_set(auth_headers)
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}", headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        # The body carries views_count, which the tag ignores, so it is weak
+        assert etag.startswith('W/"')
+        assert response.headers["cache-control"].startswith("public")
+
+        # Viewing the set does not change its ETag
+        response = client.get(f"/api/v1/study-sets/{study_set_id}", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}/terms/", headers=auth_headers)
+        terms_etag = response.headers["etag"]
+        response = client.get(
+            f"/api/v1/study-sets/{study_set_id}/terms/", headers={**auth_headers, "If-None-Match": terms_etag}
+        )
+        assert response.status_code == 304
+
+        # Adding a term changes both
+        client.post(f"/api/v1/study-sets/{study_set_id}/terms/",
+                    json={"term": "Hello", "definition": "Xin chào"}, headers=auth_headers)
+        response = client.get(f"/api/v1/study-sets/{study_set_id}", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()["terms"]) == 1
+        response = client.get(
+            f"/api/v1/study-sets/{study_set_id}/terms/", headers={**auth_headers, "If-None-Match": terms_etag}
+        )
+        assert response.status_code == 200
+
+    def test_if_match_on_update(self, test_db, auth_headers):
+        """Test optimistic concurrency on PUT"""
+        study_set_id = self._create_study_set(auth_headers)
+        etag = client.get(f"/api/v1/study-sets/{study_set_id}", headers=auth_headers).headers["etag"]
+
+        response = client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "First"},
+                              headers={**auth_headers, "If-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+        # A second writer still holding the old ETag is rejected
+        response = client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "Second"},
+                              headers={**auth_headers, "If-Match": etag})
+        assert response.status_code == 412
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}", headers=auth_headers)
+        assert response.json()["title"] == "First"
+
+
+class TestBatch:
+    def _seed(self, test_user, count):
+        """Create public study sets with three terms each and one private set of another user"""
+        db = TestingSessionLocal()
+        other = User(username="other", email="other@example.com",
+                     password_hash=get_password_hash("otherpassword"))
+        db.add(other)
+        db.flush()
+        study_sets = [StudySet(title=f"Set {i}", user_id=test_user.id, is_public=True) for i in range(count)]
+        private = StudySet(title="Private", user_id=other.id, is_public=False)
+        db.add_all(study_sets + [private])
+        db.flush()
+        for study_set in study_sets:
+            db.add_all([
+                Term(term=f"T{p}", definition=f"D{p}", study_set_id=study_set.id, position=p) for p in range(1, 4)
+            ])
+        db.commit()
+        ids = [study_set.id for study_set in study_sets]
+        private_id = private.id
+        db.close()
+        return ids, private_id
+
+    def _count_queries(self, url, headers):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            response = client.get(url, headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        return response, len(statements)
+
+    def test_batch_fetch(self, test_db, auth_headers, test_user):
+        """Test fetching several sets with per-item access checks"""
+        ids, private_id = self._seed(test_user, 3)
+        id_list = ",".join(str(i) for i in [ids[0], 999, private_id, ids[1], ids[0]])
+
+        response = client.get(f"/api/v1/study-sets/batch?ids={id_list}&terms_limit=2", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data["items"]] == [ids[0], ids[1]]
+        assert data["missing"] == [999]
+        assert data["forbidden"] == [private_id]
+        first = data["items"][0]
+        assert first["user"]["username"] == "testuser"
+        assert [term["term"] for term in first["terms"]] == ["T1", "T2"]
+        assert (first["next_terms_cursor"], first["next_terms_after_id"]) == (2, first["terms"][-1]["id"])
+
+        # Prefetching does not count as a view
+        db = TestingSessionLocal()
+        assert db.query(StudySet).filter(StudySet.id == ids[0]).first().views_count == 0
+        db.close()
+
+    def test_batch_query_count_is_constant(self, test_db, auth_headers, test_user):
+        """Test the number of queries does not grow with the number of ids"""
+        ids, _ = self._seed(test_user, 6)
+
+        _, few = self._count_queries(f"/api/v1/study-sets/batch?ids={ids[0]}&terms_limit=2", auth_headers)
+        _, many = self._count_queries(
+            f"/api/v1/study-sets/batch?ids={','.join(map(str, ids))}&terms_limit=2", auth_headers
+        )
+
+        assert few == many
+
+    def test_batch_limits(self, test_db, auth_headers):
+        """Test invalid and oversized id lists are rejected"""
+        response = client.get("/api/v1/study-sets/batch?ids=1,abc", headers=auth_headers)
+        assert response.status_code == 400
+
+        too_many = ",".join(str(i) for i in range(1, 102))
+        response = client.get(f"/api/v1/study-sets/batch?ids={too_many}", headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestClone:
+    def _seed(self, is_public=True):
+        """Create a study set of another user with terms out of id order and one with media"""
+        db = TestingSessionLocal()
+        other = User(username="author", email="author@example.com",
+                     password_hash=get_password_hash("authorpassword"))
+        db.add(other)
+        db.flush()
+        study_set = StudySet(title="Capitals", description="Europe", user_id=other.id, is_public=is_public,
+                             language_from="en", language_to="vi", terms_count=3, views_count=42)
+        db.add(study_set)
+        db.flush()
+        db.add_all([
+            Term(term="Paris", definition="France", study_set_id=study_set.id, position=2),
+            Term(term="Rome", definition="Italy", study_set_id=study_set.id, position=1,
+                 image_url="https://cdn.example.com/rome.png", audio_url="https://cdn.example.com/rome.mp3"),
+            Term(term="Madrid", definition="Spain", study_set_id=study_set.id, position=3),
+        ])
+        db.commit()
+        study_set_id = study_set.id
+        db.close()
+        return study_set_id
+
+    def test_clone_copies_set_and_terms(self, test_db, auth_headers, test_user):
+        """Test the copy keeps terms, positions and media and resets counters"""
+        source_id = self._seed()
+
+        response = client.post(f"/api/v1/study-sets/{source_id}/clone", headers=auth_headers)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["id"] != source_id
+        assert data["user_id"] == test_user.id
+        assert data["title"] == "Capitals"
+        assert data["description"] == "Europe"
+        assert data["language_from"] == "en"
+        assert data["terms_count"] == 3
+        assert data["views_count"] == 0
+
+        terms = client.get(f"/api/v1/study-sets/{data['id']}/terms/", headers=auth_headers).json()
+        assert [(t["term"], t["position"]) for t in terms] == [("Rome", 1), ("Paris", 2), ("Madrid", 3)]
+        assert terms[0]["image_url"] == "https://cdn.example.com/rome.png"
+        assert terms[0]["audio_url"] == "https://cdn.example.com/rome.mp3"
+
+        db = TestingSessionLocal()
+        assert db.query(Term).filter(Term.study_set_id == source_id).count() == 3
+        assert db.query(User).filter(User.id == test_user.id).first().total_study_sets_created == 1
+        db.close()
+
+        # The copy is an ordinary set: its terms can be edited and versioned
+        response = client.put(
+            f"/api/v1/study-sets/{data['id']}/terms/{terms[1]['id']}",
+            json={"definition": "Capital of France"}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        versions = client.get(f"/api/v1/study-sets/{data['id']}/versions", headers=auth_headers).json()
+        assert len(versions) == 1
+
+    def test_clone_overrides(self, test_db, auth_headers):
+        """Test title and visibility can be set for the copy"""
+        source_id = self._seed()
+
+        response = client.post(f"/api/v1/study-sets/{source_id}/clone",
+                               json={"title": "My capitals", "is_public": False}, headers=auth_headers)
+
+        assert response.status_code == 201
+        assert response.json()["title"] == "My capitals"
+        assert response.json()["is_public"] is False
+
+    def test_clone_access(self, test_db, auth_headers):
+        """Test private sets of other users and missing sets cannot be cloned"""
+        private_id = self._seed(is_public=False)
+
+        assert client.post(f"/api/v1/study-sets/{private_id}/clone", headers=auth_headers).status_code == 403
+        assert client.post("/api/v1/study-sets/999/clone", headers=auth_headers).status_code == 404
+
+
+class TestQuiz:
+    def _create_deck(self, auth_headers, size=8):
+        # Ids and versions restart with every test database
+        deck_features_cache.clear()
+        study_set = client.post("/api/v1/study-sets/", json={"title": "Animals"}, headers=auth_headers).json()
+        terms = [{"term": f"animal {i}", "definition": f"con vat so {i}"} for i in range(size)]
+        # Two cards share a definition: they must never be each other's distractor
+        terms.append({"term": "kitty", "definition": "con vat so 0"})
+        client.post(f"/api/v1/study-sets/{study_set['id']}/terms/bulk", json={"terms": terms}, headers=auth_headers)
+        return study_set["id"]
+
+    def test_generate_test(self, test_db, auth_headers):
+        """Test every question has the right answer among distinct options"""
+        study_set_id = self._create_deck(auth_headers)
+        terms = {t["id"]: t for t in client.get(f"/api/v1/study-sets/{study_set_id}/terms/", headers=auth_headers).json()}
+
+        response = client.get(f"/api/v1/study-sets/{study_set_id}/test?questions=5&distractors=3&seed=1",
+                              headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["questions"]) == 5
+        assert len({q["term_id"] for q in data["questions"]}) == 5
+        for question in data["questions"]:
+            term = terms[question["term_id"]]
+            assert question["prompt"] == term["term"]
+            assert len(question["options"]) == 4
+            assert question["options"][question["answer_index"]] == term["definition"]
+            assert question["options"].count(term["definition"]) == 1
+
+        again = client.get(f"/api/v1/study-sets/{study_set_id}/test?questions=5&distractors=3&seed=1",
+                           headers=auth_headers)
+        assert again.json() == data
+
+    def test_answer_with_term_and_small_decks(self, test_db, auth_headers):
+        """Test the reverse direction and decks too small for all distractors"""
+        study_set_id = self._create_deck(auth_headers, size=1)
+        url = f"/api/v1/study-sets/{study_set_id}/test?questions=10"
+
+        # Both cards have the same definition, so neither can be the other's distractor
+        data = client.get(url, headers=auth_headers).json()
+        assert len(data["questions"]) == 2
+        assert all(question["options"] == [question["options"][0]] for question in data["questions"])
+
+        data = client.get(f"{url}&answer_with=term", headers=auth_headers).json()
+        for question in data["questions"]:
+            assert question["prompt"] == "con vat so 0"
+            assert sorted(question["options"]) == ["animal 0", "kitty"]
+
+    def test_features_cached_per_content_version(self, test_db, auth_headers):
+        """Test features are reused until the terms change"""
+        study_set_id = self._create_deck(auth_headers)
+        url = f"/api/v1/study-sets/{study_set_id}/test?questions=3"
+        client.get(url, headers=auth_headers)
+        hits = deck_features_cache.hits
+        client.get(url, headers=auth_headers)
+        assert deck_features_cache.hits == hits + 1
+
+        client.post(f"/api/v1/study-sets/{study_set_id}/terms/",
+                    json={"term": "fish", "definition": "con ca"}, headers=auth_headers)
+        data = client.get(f"/api/v1/study-sets/{study_set_id}/test?questions=100", headers=auth_headers).json()
+        assert deck_features_cache.hits == hits + 1
+        assert "fish" in {q["prompt"] for q in data["questions"]}
+
+
+class TestGrading:
+    def _create_deck(self, auth_headers):
+        # Ids and versions restart with every test database
+        references_cache.clear()
+        study_set = client.post("/api/v1/study-sets/", json={"title": "Vietnamese"}, headers=auth_headers).json()
+        terms = [
+            {"term": "Thank you", "definition": "Cảm ơn"},
+            {"term": "Street", "definition": "Đường phố"},
+            {"term": "Photosynthesis", "definition": "Quang hợp"},
+            {"term": "Car", "definition": "Xe hơi; ô tô"},
+        ]
+        client.post(f"/api/v1/study-sets/{study_set['id']}/terms/bulk", json={"terms": terms}, headers=auth_headers)
+        ids = [t["id"] for t in client.get(f"/api/v1/study-sets/{study_set['id']}/terms/", headers=auth_headers).json()]
+        return study_set["id"], ids
+
+    def test_grade_answers(self, test_db, auth_headers):
+        """Test accents, case and small typos are forgiven, wrong answers are not"""
+        study_set_id, ids = self._create_deck(auth_headers)
+        answers = [
+            {"term_id": ids[0], "answer": "cam on!"},
+            {"term_id": ids[1], "answer": "duong pho"},
+            {"term_id": ids[3], "answer": "o to"},
+            {"term_id": ids[2], "answer": "photosinthesis"},
+            {"term_id": ids[0], "answer": "xin chao"},
+            {"term_id": ids[0], "answer": ""},
+        ]
+
+        response = client.post(f"/api/v1/study-sets/{study_set_id}/grade",
+                               json={"answers": answers[:3]}, headers=auth_headers)
+        reverse = client.post(f"/api/v1/study-sets/{study_set_id}/grade",
+                              json={"answers": answers[3:], "answer_with": "term"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["total"], data["correct"]) == (3, 3)
+        assert [r["result"] for r in data["results"]] == ["exact", "exact", "exact"]
+        assert data["results"][1]["expected"] == "Đường phố"
+        results = reverse.json()["results"]
+        assert [r["result"] for r in results] == ["typo", "incorrect", "incorrect"]
+        assert results[0]["distance"] == 1
+        assert reverse.json()["correct"] == 1
+
+    def test_grading_errors_and_cache(self, test_db, auth_headers):
+        """Test unknown terms are refused and references are reused until the terms change"""
+        study_set_id, ids = self._create_deck(auth_headers)
+        url = f"/api/v1/study-sets/{study_set_id}/grade"
+
+        response = client.post(url, json={"answers": [{"term_id": 999999, "answer": "x"}]}, headers=auth_headers)
+        assert response.status_code == 400
+        assert client.post(url, json={"answers": []}, headers=auth_headers).status_code == 422
+
+        hits = references_cache.hits
+        client.post(url, json={"answers": [{"term_id": ids[0], "answer": "cam on"}]}, headers=auth_headers)
+        assert references_cache.hits == hits + 1
+
+        client.put(f"/api/v1/study-sets/{study_set_id}/terms/{ids[0]}",
+                   json={"definition": "Cảm ơn bạn"}, headers=auth_headers)
+        data = client.post(url, json={"answers": [{"term_id": ids[0], "answer": "cam on ban"}]},
+                           headers=auth_headers).json()
+        assert references_cache.hits == hits + 1
+        assert data["results"][0]["result"] == "exact"
+
+
+class TestSuggest:
+    def _create_sets(self, auth_headers):
+        ids = {}
+        for title, is_public in [("English vocabulary", True), ("Advanced English", True),
+                                 ("Tiếng Anh cơ bản", True), ("English secrets", False)]:
+            ids[title] = client.post("/api/v1/study-sets/", json={"title": title, "is_public": is_public},
+                                     headers=auth_headers).json()["id"]
+        db = TestingSessionLocal()
+        db.query(StudySet).filter(StudySet.id == ids["Advanced English"]).update({StudySet.views_count: 50})
+        db.commit()
+        db.close()
+        # Ids restart with every test database: load the index again on the next request
+        title_index.loaded_at = None
+        return ids
+
+    def test_suggest_titles(self, test_db, auth_headers):
+        """Test word-start, accent-insensitive matches of public titles, most viewed first"""
+        self._create_sets(auth_headers)
+
+        response = client.get("/api/v1/study-sets/suggest?q=eng", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [s["title"] for s in response.json()] == ["Advanced English", "English vocabulary"]
+        assert response.json()[0]["views_count"] == 50
+        assert [s["title"] for s in client.get("/api/v1/study-sets/suggest?q=tieng an", headers=auth_headers).json()] \
+            == ["Tiếng Anh cơ bản"]
+        assert client.get("/api/v1/study-sets/suggest?q=english v&limit=1", headers=auth_headers).json()[0]["title"] \
+            == "English vocabulary"
+        assert client.get("/api/v1/study-sets/suggest?q=secret", headers=auth_headers).json() == []
+        assert client.get("/api/v1/study-sets/suggest?q=", headers=auth_headers).status_code == 422
+
+    def test_index_follows_edits(self, test_db, auth_headers):
+        """Test creates, renames and deletes are applied to the loaded index"""
+        ids = self._create_sets(auth_headers)
+        url = "/api/v1/study-sets/suggest?q=en"
+        client.get(url, headers=auth_headers)
+
+        created = client.post("/api/v1/study-sets/", json={"title": "Engineering terms"}, headers=auth_headers).json()
+        assert "Engineering terms" in [s["title"] for s in client.get(url, headers=auth_headers).json()]
+
+        client.put(f"/api/v1/study-sets/{ids['English vocabulary']}", json={"title": "Vocabulary list"},
+                   headers=auth_headers)
+        client.delete(f"/api/v1/study-sets/{created['id']}", headers=auth_headers)
+        assert [s["title"] for s in client.get(url, headers=auth_headers).json()] == ["Advanced English"]
+        assert [s["title"] for s in client.get("/api/v1/study-sets/suggest?q=list", headers=auth_headers).json()] \
+            == ["Vocabulary list"]
+
+    def test_index_follows_restores(self, test_db, auth_headers):
+        """Test restoring a version puts its title back in the loaded index"""
+        ids = self._create_sets(auth_headers)
+        study_set_id = ids["English vocabulary"]
+        client.put(f"/api/v1/study-sets/{study_set_id}", json={"title": "Vocabulary list"}, headers=auth_headers)
+        assert client.get("/api/v1/study-sets/suggest?q=list", headers=auth_headers).json()[0]["id"] == study_set_id
+
+        response = client.post(f"/api/v1/study-sets/{study_set_id}/versions/1/restore", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["title"] == "English vocabulary"
+        assert client.get("/api/v1/study-sets/suggest?q=list", headers=auth_headers).json() == []
+        assert study_set_id in [s["id"] for s in client.get(
+            "/api/v1/study-sets/suggest?q=english v", headers=auth_headers
+        ).json()]
+
+    def test_cached_prefixes_match_a_full_scan(self):
+        """Test the per-prefix top lists stay exact through random upserts and removes"""
+        rng = random.Random(7)
+        index = TitleIndex(max_per_prefix=3, max_prefixes=4, max_titles=1000)
+        index.rebuild(lambda: [])
+        titles = {}
+        for _ in range(2000):
+            study_set_id = rng.randrange(40)
+            if rng.random() < 0.3:
+                index.remove(study_set_id)
+                titles.pop(study_set_id, None)
+            else:
+                title = " ".join(rng.choice(["ab", "ac", "ba", "b", "abc"]) for _ in range(2))
+                views = rng.randrange(5)
+                index.upsert(study_set_id, title, views)
+                titles[study_set_id] = (title, views)
+            prefix = rng.choice(["a", "ab", "b", "ba", "abc"])
+            expected = sorted(
+                (study_set_id for study_set_id, (title, _) in titles.items()
+                 if any(" ".join(title.split()[start:]).startswith(prefix) for start in range(len(title.split())))),
+                key=lambda study_set_id: (-titles[study_set_id][1], study_set_id)
+            )[:3]
+            assert [item["id"] for item in index.search(prefix, 3)] == expected
+
+
+class TestFacets:
+    def _pairs(self, data):
+        return {(pair["language_from"], pair["language_to"]): pair["count"] for pair in data["language_pairs"]}
+
+    def test_counts_follow_changes(self, test_db, auth_headers):
+        """Test creates, updates, visibility changes, deletes and clones keep the counts exact"""
+        def create(language_from, language_to, is_public=True):
+            return client.post("/api/v1/study-sets/", json={
+                "title": "Set", "language_from": language_from, "language_to": language_to, "is_public": is_public
+            }, headers=auth_headers).json()["id"]
+
+        first = create("en", "vi")
+        second = create("en", "vi")
+        third = create("ja", "en")
+        hidden = create("en", "vi", is_public=False)
+
+        response = client.get("/api/v1/study-sets/facets", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert self._pairs(data) == {("en", "vi"): 2, ("ja", "en"): 1}
+        assert data["ratings"][0] == {"min_rating": 0, "max_rating": 1, "count": 3}
+
+        client.put(f"/api/v1/study-sets/{second}", json={"language_to": "fr"}, headers=auth_headers)
+        client.put(f"/api/v1/study-sets/{hidden}", json={"is_public": True}, headers=auth_headers)
+        client.put(f"/api/v1/study-sets/{first}", json={"is_public": False}, headers=auth_headers)
+        client.delete(f"/api/v1/study-sets/{third}", headers=auth_headers)
+        client.post(f"/api/v1/study-sets/{second}/clone", headers=auth_headers)
+
+        data = client.get("/api/v1/study-sets/facets", headers=auth_headers).json()
+        assert self._pairs(data) == {("en", "fr"): 2, ("en", "vi"): 1}
+        assert data["total"] == 3
+        db = TestingSessionLocal()
+        assert FacetService.reconcile(db) == 0
+        db.close()
+
+    def test_reconcile_and_filters(self, test_db, auth_headers, test_user):
+        """Test rows written around the service are recounted, and filters count live"""
+        db = TestingSessionLocal()
+        db.add_all([
+            StudySet(title="Tiếng Anh", language_from="vi", language_to="en", average_rating=4.5, user_id=test_user.id),
+            StudySet(title="Math", language_from="en", language_to="en", average_rating=3.0, user_id=test_user.id),
+        ])
+        db.commit()
+        assert client.get("/api/v1/study-sets/facets", headers=auth_headers).json()["total"] == 0
+
+        assert FacetService.reconcile(db) == 4
+        db.close()
+        data = client.get("/api/v1/study-sets/facets", headers=auth_headers).json()
+        assert self._pairs(data) == {("vi", "en"): 1, ("en", "en"): 1}
+        assert [band["count"] for band in data["ratings"]] == [0, 0, 0, 1, 1]
+
+        data = client.get("/api/v1/study-sets/facets?search=tieng&search_mode=fuzzy", headers=auth_headers).json()
+        assert self._pairs(data) == {("vi", "en"): 1}
+        assert [band["count"] for band in data["ratings"]] == [0, 0, 0, 0, 1]
+        assert client.get("/api/v1/study-sets/facets?min_rating=3.5", headers=auth_headers).json()["total"] == 1
@@ -0,0 +1,39 @@
+from app.utils.text import fold, bounded_edit_distance, word_similarity
+
+
+class TestFold:
+    def test_accents_case_and_punctuation(self):
+        """Test Vietnamese tones, đ, case, punctuation and spacing are ignored"""
+        assert fold("Cảm ơn!") == "cam on"
+        assert fold("  ĐƯỜNG   phố ") == "duong pho"
+        assert fold("Straße, café") == "strasse cafe"
+
+    def test_non_latin_marks_are_kept(self):
+        """Test Japanese voiced kana are not folded onto unvoiced ones"""
+        assert fold("がっこう") == "がっこう"
+        assert fold("がっこう") != fold("かっこう")
+
+
+class TestBoundedEditDistance:
+    def test_distance_within_bound(self):
+        """Test insertions, deletions, substitutions and swaps each cost one"""
+        assert bounded_edit_distance("photosynthesis", "photosynthesis", 2) == 0
+        assert bounded_edit_distance("photosynthesis", "photosinthesis", 2) == 1
+        assert bounded_edit_distance("the", "teh", 2) == 1
+        assert bounded_edit_distance("kitten", "sitting", 3) == 3
+        assert bounded_edit_distance("", "ab", 2) == 2
+
+    def test_stops_past_bound(self):
+        """Test distances over the bound are reported as bound + 1"""
+        assert bounded_edit_distance("kitten", "sitting", 2) == 3
+        assert bounded_edit_distance("a", "abcdef", 2) == 3
+        assert bounded_edit_distance("abcdef", "uvwxyz", 0) == 1
+
+
+class TestWordSimilarity:
+    def test_similarity(self):
+        """Test whole-word matches score 1, typos less, unrelated text 0"""
+        assert word_similarity("tieng anh", "tieng anh co ban") == 1.0
+        assert 0.5 <= word_similarity("tiegn anh", "tieng anh co ban") < 1.0
+        assert word_similarity("hoc", "tieng anh") == 0.0
+        assert word_similarity("", "tieng anh") == 0.0